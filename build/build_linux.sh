@@ -4,8 +4,14 @@
 #  Produces: dist/RDC_Dashboard          (standalone binary)
 #            dist/RDC_Dashboard.tar.gz   (distributable archive)
 #  Run on Linux with Python 3.11+
+#  --onedir   startup-optimized folder build (dist/RDC_Dashboard/)
 # ============================================================
 set -e
+for arg in "$@"; do
+    case "$arg" in
+        --onedir) export RDC_BUILD_LAYOUT=onedir ;;
+    esac
+done
 echo ""
 echo "============================================================"
 echo "  RDC Dashboard  —  Linux Build"
@@ -66,7 +72,7 @@ echo "[OK] Icons generated."
 echo "[..] Running PyInstaller (2-3 min)..."
 cd "$PROJECT"
 pyinstaller --clean --noconfirm build/rdc_dashboard.spec
-echo "[OK] Built: dist/RDC_Dashboard"
+echo "[OK] Built: dist/RDC_Dashboard (${RDC_BUILD_LAYOUT:-onefile})"
 
 # ── Verify binary ────────────────────────────────────────────
 BINARY="$PROJECT/dist/RDC_Dashboard"
@@ -91,6 +97,7 @@ cat > "$LAUNCHER_DIR/launch_dashboard.sh" <<'LAUNCHER'
 #!/usr/bin/env bash
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 BINARY="$SCRIPT_DIR/../dist/RDC_Dashboard"
+[ -d "$BINARY" ] && BINARY="$BINARY/RDC_Dashboard"
 if [ ! -f "$BINARY" ]; then
     echo "[ERROR] RDC Dashboard binary not found at: $BINARY"
     echo "Please run build/build_linux.sh first."
@@ -139,6 +146,9 @@ else
     cp "$BINARY" "$STAGING/"
 fi
 
+# Headless CLI
+cp "$PROJECT/dist/rdc" "$STAGING/" 2>/dev/null || true
+
 # Copy icon and launcher
 cp "$ICON_PATH" "$STAGING/" 2>/dev/null || true
 cp "$DESKTOP_FILE" "$STAGING/"
@@ -177,7 +187,14 @@ python3 -c "
 import sys
 sys.path.insert(0, '.')
 ok = True
-for mod in ['mru_manager', 'rdc_archive', 'rdc_training_sync', 'rdc_scaffold']:
+for mod in ['mru_manager', 'rdc', 'rdc_archive', 'rdc_training_sync', 'rdc_scaffold',
+            'rdc_versions', 'rdc_ignore', 'rdc_index',
+            'rdc_quickopen', 'rdc_cache', 'rdc_extract',
+            'rdc_ai', 'rdc_chat', 'rdc_longdoc', 'rdc_uploads',
+            'rdc_mock_provider', 'rdc_async', 'rdc_metrics', 'rdc_telemetry',
+            'rdc_dedupe', 'rdc_scheduler', 'rdc_export',
+            'rdc_stats', 'rdc_storage', 'rdc_preview',
+            'rdc_history']:
     try:
         __import__(mod)
         print(f'  ✓ {mod}')
@@ -185,6 +202,18 @@ for mod in ['mru_manager', 'rdc_archive', 'rdc_training_sync', 'rdc_scaffold']:
         print(f'  ✗ {mod}: {e}')
         ok = False
 
+# Built-in regression tables (check() -> list of failures)
+for mod in ['rdc_versions', 'rdc_telemetry']:
+    try:
+        failures = __import__(mod).check()
+    except Exception as e:
+        failures = [e]
+    if failures:
+        print(f'  ✗ {mod}.check(): {failures}')
+        ok = False
+    else:
+        print(f'  ✓ {mod}.check()')
+
 try:
     from PyQt6.QtWidgets import QApplication
     print('  ✓ PyQt6 import OK')
@@ -208,5 +237,6 @@ echo "  Distributable:     dist/${DIST_NAME}.tar.gz"
 echo ""
 echo "  To run:            ./dist/RDC_Dashboard"
 echo "  To install menu:   xdg-desktop-menu install launchers/RDC_Dashboard.desktop"
+echo "  Cold start:        python build/measure_startup.py --exe $BINARY"
 echo "============================================================"
 echo ""
@@ -3,8 +3,14 @@
 #  RDC Dashboard — macOS Build
 #  Produces: dist/RDC_Dashboard.dmg
 #  Run on a Mac with Python 3.11+
+#  --onedir   startup-optimized .app (libraries not packed into one binary)
 # ============================================================
 set -e
+for arg in "$@"; do
+    case "$arg" in
+        --onedir) export RDC_BUILD_LAYOUT=onedir ;;
+    esac
+done
 echo ""
 echo "============================================================"
 echo "  RDC Dashboard  —  macOS Build"
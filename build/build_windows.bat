@@ -5,9 +5,16 @@ echo.
 echo ============================================================
 echo   RDC Dashboard  —  Windows 11 Build
 echo   Produces: dist\RDC_Dashboard_Setup_v1.0.0.exe
+echo   Options:  --onedir  startup-optimized folder build (dist\RDC_Dashboard\)
 echo ============================================================
 echo.
 
+set ISCC_DEFS=
+if /i "%~1"=="--onedir" (
+    set RDC_BUILD_LAYOUT=onedir
+    set ISCC_DEFS=/DOneDir
+)
+
 set SCRIPT_DIR=%~dp0
 pushd "%SCRIPT_DIR%.."
 set PROJECT=%CD%
@@ -61,7 +68,7 @@ if %ISCC%=="" (
     echo        Then re-run this script to produce the full Setup.exe
 ) else (
     echo [..] Building installer with Inno Setup...
-    %ISCC% "%PROJECT%\build\installer_windows.iss"
+    %ISCC% %ISCC_DEFS% "%PROJECT%\build\installer_windows.iss"
     if errorlevel 1 (
         echo [ERROR] Inno Setup failed.
     ) else (
@@ -74,6 +81,8 @@ echo ============================================================
 echo   Build complete.
 echo   Standalone exe : dist\RDC_Dashboard.exe
 echo   Full installer : dist\RDC_Dashboard_Setup_v1.0.0.exe
+echo   Cold start     : python build\measure_startup.py --exe dist\RDC_Dashboard.exe
+echo                    (onedir: dist\RDC_Dashboard\RDC_Dashboard.exe)
 echo ============================================================
 echo.
 pause
@@ -0,0 +1,159 @@
+"""
+measure_startup.py — Cold-start measurement for RDC Dashboard
+Launches the dashboard N times with RDC_STARTUP_PROBE set, so it records
+its timings and quits as soon as the window (or tray icon) is up, and
+reports time-to-window measured from process spawn. The first run is
+reported separately: right after a build or reboot it is the cold start.
+
+--importtime re-runs the source tree under `python -X importtime` and
+prints the slowest imports by cumulative time plus self time per
+top-level package (so a new eager SDK import shows up immediately).
+
+--record appends one JSON line per measurement to a history file, so cold
+start can be compared release to release.
+
+    python build/measure_startup.py                       # source tree, 5 runs
+    python build/measure_startup.py --exe dist/RDC_Dashboard/RDC_Dashboard --runs 10
+    python build/measure_startup.py --importtime --top 30
+    python build/measure_startup.py --exe dist/RDC_Dashboard.exe --record build/startup_history.jsonl
+    python build/measure_startup.py --offscreen           # headless CI (QT_QPA_PLATFORM=offscreen)
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+PROJECT = Path(__file__).resolve().parent.parent
+SRC = PROJECT / "src"
+TIMEOUT = 120
+
+
+def _command(exe: str = None, tray: bool = False, importtime: bool = False) -> list:
+    cmd = [exe] if exe else [sys.executable] + (["-X", "importtime"] if importtime else []) + \
+        [str(SRC / "rdc_dashboard.py")]
+    return cmd + (["--tray"] if tray else [])
+
+
+def _env(probe: str, offscreen: bool) -> dict:
+    env = dict(os.environ, RDC_STARTUP_PROBE=probe)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    return env
+
+
+def run_once(exe: str = None, tray: bool = False, offscreen: bool = False) -> dict:
+    """One launch. Returns the app's probe record plus spawn-to-window seconds."""
+    fd, probe = tempfile.mkstemp(prefix="rdc-startup-", suffix=".jsonl")
+    os.close(fd)
+    try:
+        spawned = time.time()
+        proc = subprocess.run(_command(exe, tray), env=_env(probe, offscreen), timeout=TIMEOUT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        lines = Path(probe).read_text(encoding="utf-8").splitlines()
+        if not lines:
+            raise RuntimeError(f"No probe record (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+        rec = json.loads(lines[-1])
+        rec["spawn_to_window_s"] = round(rec["wall"] - spawned, 4)
+        return rec
+    finally:
+        os.unlink(probe)
+
+
+def importtime(offscreen: bool = False) -> list:
+    """[(self_us, cumulative_us, module, depth)] from one -X importtime launch of the source tree."""
+    fd, probe = tempfile.mkstemp(prefix="rdc-startup-", suffix=".jsonl")
+    os.close(fd)
+    try:
+        proc = subprocess.run(_command(importtime=True), env=_env(probe, offscreen), timeout=TIMEOUT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    finally:
+        os.unlink(probe)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((int(self_us), int(cum_us), name.strip(), depth))
+    return rows
+
+
+def format_importtime(rows: list, top: int = 25) -> str:
+    total = sum(r[0] for r in rows)
+    out = [f"Imports: {len(rows)} modules, {total / 1e6:.3f}s self time in total", "",
+           f"{'Slowest imports (cumulative)':<48}{'cumul ms':>10}{'self ms':>10}"]
+    for self_us, cum_us, name, depth in sorted(rows, key=lambda r: -r[1])[:top]:
+        out.append(f"{'  ' * min(depth, 6) + name:<48}{cum_us / 1000:>10.1f}{self_us / 1000:>10.1f}")
+    by_pkg = {}
+    for self_us, _, name, _ in rows:
+        pkg = name.split(".")[0]
+        by_pkg[pkg] = by_pkg.get(pkg, 0) + self_us
+    out += ["", f"{'Self time by top-level package':<48}{'ms':>10}{'share':>10}"]
+    for pkg, us in sorted(by_pkg.items(), key=lambda kv: -kv[1])[:top]:
+        out.append(f"{pkg:<48}{us / 1000:>10.1f}{us / max(total, 1):>10.0%}")
+    return "\n".join(out)
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty", "--tags"], cwd=PROJECT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def summarize(runs: list) -> dict:
+    def stats(key):
+        vals = [r[key] for r in runs]
+        warm = vals[1:] or vals
+        return {"first": vals[0], "median": round(statistics.median(warm), 4),
+                "min": min(warm), "max": max(warm)}
+    return {k: stats(k) for k in ("spawn_to_window_s", "imports_s", "main_to_window_s")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure RDC Dashboard time-to-window")
+    parser.add_argument("--exe", help="Frozen build to launch (default: python src/rdc_dashboard.py)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tray", action="store_true", help="Measure a --tray start (login case)")
+    parser.add_argument("--offscreen", action="store_true", help="Use Qt's offscreen platform (no display)")
+    parser.add_argument("--importtime", action="store_true", help="Import-time breakdown of the source tree")
+    parser.add_argument("--top", type=int, default=25, help="Rows in the import-time tables")
+    parser.add_argument("--record", help="Append results as JSON lines to this history file")
+    parser.add_argument("--label", default="", help="Release label stored with --record")
+    args = parser.parse_args()
+
+    if args.importtime:
+        print(format_importtime(importtime(args.offscreen), args.top))
+        return
+
+    runs = []
+    for i in range(max(1, args.runs)):
+        rec = run_once(args.exe, args.tray, args.offscreen)
+        runs.append(rec)
+        print(f"run {i + 1:>2}: {rec['spawn_to_window_s']:.3f}s to window "
+              f"(imports {rec['imports_s']:.3f}s, main → window {rec['main_to_window_s']:.3f}s, "
+              f"{rec['modules']} modules)")
+    summary = summarize(runs)
+    s = summary["spawn_to_window_s"]
+    print(f"\nTime to window: first {s['first']:.3f}s · median {s['median']:.3f}s "
+          f"(min {s['min']:.3f}s, max {s['max']:.3f}s over {max(1, len(runs) - 1)} warm runs)")
+
+    if args.record:
+        entry = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "label": args.label, "rev": _git_rev(),
+                 "target": args.exe or "source", "frozen": runs[0]["frozen"], "tray": args.tray,
+                 "platform": platform.platform(), "python": platform.python_version(),
+                 "runs": len(runs), **summary}
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"Recorded → {args.record}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,41 @@
 # -*- mode: python ; coding: utf-8 -*-
 # PyInstaller spec — shared across Windows, Mac, Linux
-import sys, os
+#
+# Layout (env RDC_BUILD_LAYOUT, or --onedir on the build scripts):
+#   onefile — single executable; unpacks itself to a temp dir on every launch
+#   onedir  — startup-optimized: dist/RDC_Dashboard/ folder, nothing to unpack,
+#             no UPX (compressed Qt libraries are inflated at each load too)
+# Either way Qt modules the app does not use are left out, and the provider
+# SDKs are bundled but only imported when AI Tools first needs them.
+# build/measure_startup.py tracks the result.
+import sys, os, re
 
 block_cipher = None
 SRC = os.path.join(os.path.dirname(SPECPATH), 'src')
 ASSETS = os.path.join(os.path.dirname(SPECPATH), 'assets')
+ONEDIR = os.environ.get('RDC_BUILD_LAYOUT', 'onefile') == 'onedir'
+
+# Only QtCore / QtGui / QtWidgets are used (names match as prefixes: Quick → QuickTest, …)
+QT_UNUSED = [
+    'Network', 'Qml', 'QmlModels', 'QmlWorkerScript', 'Quick', 'QuickWidgets', 'Quick3D',
+    'WebEngineCore', 'WebEngineWidgets', 'WebChannel', 'WebSockets', 'Multimedia',
+    'MultimediaWidgets', 'Sql', 'Test', 'Pdf', 'PdfWidgets', 'Svg', 'SvgWidgets',
+    'Bluetooth', 'Nfc', 'Positioning', 'Sensors', 'SerialPort', 'Designer', 'Help',
+    'Charts', 'DataVisualization', 'RemoteObjects', 'SpatialAudio', 'TextToSpeech',
+    'Xml', '3DCore', '3DRender', '3DInput', '3DLogic', '3DExtras', '3DAnimation',
+]
+QT_UNUSED_PLUGINS = ['sqldrivers', 'multimedia', 'qmltooling', 'position', 'sensors',
+                     'webview', 'designer', 'tls', 'networkinformation', 'iconengines']
+_QT_LIB = re.compile(r'(?:^|[/\\])(?:lib)?Qt6?(?:%s)\w*(?:[._]|\.framework|$)' % '|'.join(QT_UNUSED))
+
+
+def _qt_unused(dest):
+    d = dest.replace('\\', '/')
+    return ('/Qt6/translations/' in d or '/Qt6/qml/' in d
+            or any(f'/plugins/{p}/' in d for p in QT_UNUSED_PLUGINS)
+            or 'qsvg' in d.rsplit('/', 1)[-1]           # SVG image plugin needs QtSvg
+            or bool(_QT_LIB.search(d)))
+
 
 a = Analysis(
     [os.path.join(SRC, 'rdc_dashboard.py')],
@@ -12,47 +43,65 @@ a = Analysis(
     binaries=[],
     datas=[
         (os.path.join(ASSETS, 'icon.png'), 'assets'),
+        (os.path.join(SRC, 'templates', 'rdc2_scaffold.json'), 'templates'),
     ],
     hiddenimports=[
         'mru_manager',
         'rdc_archive',
         'rdc_training_sync',
         'rdc_scaffold',
+        'rdc_versions',
+        'rdc_ignore',
+        'rdc_index',
+        'rdc_quickopen',
+        'rdc_cache',
+        'rdc_extract',
+        'rdc_ai',
+        'rdc_chat',
+        'rdc_longdoc',
+        'rdc_uploads',
+        'rdc_async',
+        'rdc_metrics',
+        'rdc_telemetry',
+        'rdc_dedupe',
+        'rdc_scheduler',
+        'rdc_export',
+        'rdc_stats',
+        'rdc_storage',
+        'rdc_preview',
+        'rdc_history',
+        'qasync',
         'anthropic',
         'openai',
         'google.generativeai',
         'PyQt6.QtWidgets',
         'PyQt6.QtCore',
         'PyQt6.QtGui',
-        'PyQt6.QtNetwork',
         'PyQt6.sip',
     ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=['tkinter', 'matplotlib', 'numpy', 'pandas'],
+    # numpy stays in (when installed at build time): the Storage panel vectorizes with it
+    excludes=['tkinter', 'matplotlib', 'pandas'] + [f'PyQt6.Qt{m}' for m in QT_UNUSED],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
 )
 
+a.binaries = [b for b in a.binaries if not _qt_unused(b[0])]
+a.datas = [d for d in a.datas if not _qt_unused(d[0])]
+
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
-    [],
+exe_options = dict(
     name='RDC_Dashboard',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=not ONEDIR,
     upx_exclude=[],
-    runtime_tmpdir=None,
     console=False,          # No terminal window on Windows/Mac
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -63,10 +112,64 @@ exe = EXE(
          else os.path.join(ASSETS, 'icon.icns'),
 )
 
+if ONEDIR:
+    exe = EXE(pyz, a.scripts, [], exclude_binaries=True, **exe_options)
+    app_dir = COLLECT(
+        exe,
+        a.binaries,
+        a.zipfiles,
+        a.datas,
+        strip=False,
+        upx=False,
+        name='RDC_Dashboard',
+    )
+else:
+    exe = EXE(pyz, a.scripts, a.binaries, a.zipfiles, a.datas, [], runtime_tmpdir=None, **exe_options)
+
+# Headless `rdc` command (console, no Qt)
+cli = Analysis(
+    [os.path.join(SRC, 'rdc.py')],
+    pathex=[SRC],
+    binaries=[],
+    datas=[(os.path.join(SRC, 'templates', 'rdc2_scaffold.json'), 'templates')],
+    hiddenimports=['mru_manager', 'rdc_archive', 'rdc_training_sync', 'rdc_scaffold',
+                   'rdc_versions', 'rdc_ignore', 'rdc_index', 'rdc_metrics', 'rdc_dedupe',
+                   'rdc_export', 'rdc_extract', 'rdc_cache', 'rdc_stats',
+                   'rdc_storage', 'rdc_history'],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    # numpy stays in (when installed at build time): `rdc stats` vectorizes with it
+    excludes=['tkinter', 'matplotlib', 'pandas', 'PyQt6', 'qasync',
+              'anthropic', 'openai', 'google'],
+    cipher=block_cipher,
+    noarchive=False,
+)
+
+cli_pyz = PYZ(cli.pure, cli.zipped_data, cipher=block_cipher)
+
+cli_exe = EXE(
+    cli_pyz,
+    cli.scripts,
+    cli.binaries,
+    cli.zipfiles,
+    cli.datas,
+    [],
+    name='rdc',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    target_arch=None,
+)
+
 # Mac .app bundle only
 if sys.platform == 'darwin':
     app = BUNDLE(
-        exe,
+        app_dir if ONEDIR else exe,
         name='RDC Dashboard.app',
         icon=os.path.join(ASSETS, 'icon.icns'),
         bundle_identifier='com.regendevcorp.rdc-dashboard',
@@ -21,6 +21,11 @@ def _config_dir() -> Path:
     return d
 
 
+def config_dir() -> Path:
+    """Per-user app data folder (created on first use)."""
+    return _config_dir()
+
+
 def _load(filename: str) -> dict:
     path = _config_dir() / filename
     if path.exists():
@@ -91,11 +96,36 @@ def clear_mru():
 def load_settings() -> dict:
     d = _load("settings.json")
     d.setdefault("rdc2_root", "")
+    d.setdefault("roots", [d["rdc2_root"]] if d["rdc2_root"] else [])
     d.setdefault("theme", "dark")
+    d.setdefault("ignore_rules", [])
+    d.setdefault("scaffold_template", "")
     d.setdefault("api_keys", {"anthropic": "", "openai": "", "google": ""})
+    d.setdefault("api_base_urls", {"anthropic": "", "openai": "", "google": ""})
+    d.setdefault("upload_attachments", True)
+    d.setdefault("api_timeout", 180)
+    d.setdefault("metrics_enabled", False)
+    d.setdefault("telemetry_enabled", True)
+    d.setdefault("schedule_enabled", False)
+    d.setdefault("schedule_on_battery", False)
+    d.setdefault("schedule", {})
+    d.setdefault("export_format", "jsonl")     # or "parquet" (needs pyarrow)
+    d.setdefault("export_shard_mb", 64)
+    d.setdefault("s3_endpoint_url", "")        # S3-compatible server (MinIO…) for s3:// roots
     d.setdefault("window", {"x": 100, "y": 100, "w": 1200, "h": 800})
     return d
 
 
 def save_settings(settings: dict):
     _save("settings.json", settings)
+
+
+def roots(settings: dict) -> list:
+    """Every configured root, the RDC2 root first, without duplicates."""
+    out, seen = [], set()
+    for r in [settings.get("rdc2_root", "")] + list(settings.get("roots", [])):
+        key = os.path.normcase(os.path.normpath(r)) if r else ""
+        if key and key not in seen:
+            seen.add(key)
+            out.append(r)
+    return out
@@ -0,0 +1,265 @@
+"""
+rdc.py — Headless command line for all RDC roots
+One command for the archive, training sync, dataset export, scaffold, scan,
+dedupe, storage stats and version history engines, without the dashboard.
+Give one or more roots on the command line, or none to use every root in
+settings ("rdc2_root" plus "roots"). Roots run side by side under one
+worker budget (--workers): up to that many roots at once, and scaffold's
+listing / mkdir threads and export's extraction processes share what is
+left over.
+
+Output is one line per event, as text or — with --json — NDJSON for
+scripts and log shippers:
+    {"event": "start",   "root": ..., "command": ..., "ts": ...}
+    {"event": "log",     "root": ..., "message": ...}
+    {"event": "result",  "root": ..., "elapsed_s": ..., <engine counts>}
+    {"event": "error",   "root": ..., "error": ...}
+    {"event": "summary", "roots": n, "ok": n, "drift": n, "failed": n, ...}
+
+Exit codes (for cron): 0 all roots OK · 1 drift found (scaffold --verify)
+· 2 usage error · 3 at least one root failed · 130 interrupted.
+
+CLI:  python rdc.py archive|sync|export|scaffold|scan|dedupe|stats|history [ROOT ...] [--json] [--quiet] [--workers 8]
+      python rdc.py archive --dry-run
+      python rdc.py scaffold --verify --json "//share1/RDC2" "//share2/RDC2"
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import mru_manager as mru
+import rdc_index
+import rdc_stats
+import rdc_storage
+import rdc_history
+import rdc_metrics as metrics
+from rdc_archive import run_archive
+from rdc_dedupe import run_dedupe
+from rdc_export import run_export
+from rdc_training_sync import run_sync
+from rdc_scaffold import build as run_scaffold, verify as verify_scaffold
+
+EXIT_OK = 0
+EXIT_DRIFT = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+EXIT_INTERRUPTED = 130
+
+MAX_WORKERS = 8
+REMOTE_COMMANDS = ("archive", "sync", "scaffold", "history")     # work on s3:// / mem:// roots (rdc_storage)
+
+
+class Reporter:
+    """Writes events as NDJSON or text lines; safe to call from worker threads."""
+
+    def __init__(self, as_json: bool = False, quiet: bool = False, stream=None):
+        self.as_json = as_json
+        self.quiet = quiet
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def __call__(self, event: str, root: str = "", **fields):
+        if self.quiet and event == "log":
+            return
+        if self.as_json:
+            rec = {"event": event, "ts": round(time.time(), 3)}
+            if root:
+                rec["root"] = root
+            rec.update(fields)
+            line = json.dumps(rec, ensure_ascii=False, default=str)
+        else:
+            line = self._text(event, root, fields)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    @staticmethod
+    def _text(event: str, root: str, f: dict) -> str:
+        tag = f"[{os.path.basename(os.path.normpath(root)) or root}] " if root else ""
+        if event == "log":
+            return tag + f["message"]
+        if event == "start":
+            return f"{tag}{f['command']} started ({root})"
+        if event == "error":
+            return f"{tag}✗ {f['error']}"
+        if event == "result":
+            counts = ", ".join(f"{k} {len(v) if isinstance(v, list) else v}" for k, v in f.items()
+                               if k not in ("command", "elapsed_s", "drift", "dry_run", "index"))
+            return f"{tag}✓ {f['command']}: {counts or 'done'} ({f['elapsed_s']:.1f}s)"
+        if event == "summary":
+            return (f"\n{f['command']}: {f['ok']} OK, {f['drift']} with drift, {f['failed']} failed "
+                    f"of {f['roots']} roots in {f['elapsed_s']:.1f}s")
+        return tag + json.dumps(f, ensure_ascii=False, default=str)
+
+
+# ── Commands ─────────────────────────────────────────────────────────────────
+# Each takes (root, args, log, workers) and returns the result fields;
+# a truthy "drift" field makes the root exit with EXIT_DRIFT.
+
+def _archive(root, args, log, workers):
+    return {"moved": run_archive(root, dry_run=args.dry_run, log_callback=log, ignore=args.ignore),
+            "dry_run": args.dry_run}
+
+
+def _sync(root, args, log, workers):
+    added, removed, manifest = run_sync(root, dry_run=args.dry_run, log_callback=log, ignore=args.ignore)
+    return {"added": added, "removed": removed, "files": len(manifest), "dry_run": args.dry_run}
+
+
+def _export(root, args, log, workers):
+    out = run_export(root, args.out, fmt=args.format, shard_bytes=args.shard_mb * 1024 * 1024,
+                     full=args.full, workers=workers, log_callback=log)
+    return {k: v for k, v in out.items() if k != "out"}
+
+
+def _scaffold(root, args, log, workers):
+    if args.verify:
+        drift = verify_scaffold(root, log=log, template=args.template, workers=workers)
+        return dict(drift, drift=sum(len(v) for v in drift.values()))
+    created = run_scaffold(root, dry_run=args.dry_run, log=log, template=args.template, workers=workers)
+    return {"created": created, "dry_run": args.dry_run}
+
+
+def _scan(root, args, log, workers):
+    previous = None if args.full else rdc_index.load(root)
+    idx = rdc_index.scan(root, previous=previous, ignore=args.ignore, log=log)
+    idx.save()
+    return {"folders": len(idx.dirs), "files": idx.file_count(), "index": str(rdc_index.index_path(idx.root))}
+
+
+def _dedupe(root, args, log, workers):
+    groups = run_dedupe(root, dry_run=args.dry_run, log_callback=log, ignore=args.ignore,
+                        min_size=args.min_size, include_archive=args.include_archive)
+    return {"groups": len(groups), "reclaimable_bytes": sum(s * (len(p) - 1) for s, p in groups),
+            "dry_run": args.dry_run}
+
+
+def _stats(root, args, log, workers):
+    report = rdc_stats.run_stats(root, top=args.top, rescan=args.rescan, ignore=args.ignore, log_callback=log)
+    return {k: report[k] for k in ("files", "bytes", "archive_files", "archive_bytes", "documents")}
+
+
+def _history(root, args, log, workers):
+    return {"documents": rdc_history.rebuild(root, ignore=args.ignore, log_callback=log)}
+
+
+COMMANDS = {"archive": _archive, "sync": _sync, "export": _export, "scaffold": _scaffold, "scan": _scan, "dedupe": _dedupe, "stats": _stats,
+            "history": _history}
+
+
+def run(command: str, roots: list, args, report: Reporter, workers: int = MAX_WORKERS) -> int:
+    """Run `command` on every root, `workers` threads in total. Returns the exit code."""
+    fn = COMMANDS[command]
+    workers = max(1, workers)
+    parallel = max(1, min(len(roots), workers))
+    per_root = max(1, workers // parallel)
+    t0 = time.perf_counter()
+
+    def one(root: str) -> int:
+        report("start", root, command=command)
+        started = time.perf_counter()
+
+        def log(msg):
+            for line in str(msg).splitlines():
+                if line.strip():
+                    report("log", root, message=line.rstrip())
+
+        try:
+            if rdc_storage.is_remote(root):
+                if command not in REMOTE_COMMANDS:
+                    raise ValueError(f"{command} needs a local folder; object-store roots support "
+                                     f"{', '.join(REMOTE_COMMANDS)}")
+            elif not os.path.isdir(root):
+                raise FileNotFoundError(f"Root not found: {root}")
+            out = fn(root, args, log, per_root)
+        except Exception as e:
+            report("error", root, command=command, error=f"{type(e).__name__}: {e}",
+                   elapsed_s=round(time.perf_counter() - started, 3))
+            return EXIT_FAILED
+        report("result", root, command=command, elapsed_s=round(time.perf_counter() - started, 3), **out)
+        return EXIT_DRIFT if out.get("drift") else EXIT_OK
+
+    pool = ThreadPoolExecutor(parallel, thread_name_prefix="rdc-root")
+    try:
+        codes = list(pool.map(one, roots))
+    except KeyboardInterrupt:
+        # Roots already running finish their current engine call; queued ones are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+        report("summary", command=command, roots=len(roots), ok=0, drift=0, failed=0,
+               interrupted=True, elapsed_s=round(time.perf_counter() - t0, 3))
+        return EXIT_INTERRUPTED
+    pool.shutdown()
+    report("summary", command=command, roots=len(roots), ok=codes.count(EXIT_OK),
+           drift=codes.count(EXIT_DRIFT), failed=codes.count(EXIT_FAILED),
+           elapsed_s=round(time.perf_counter() - t0, 3))
+    return max(codes, default=EXIT_OK)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("roots", nargs="*", metavar="ROOT",
+                        help="Root folders (default: every root in settings)")
+    common.add_argument("--json", action="store_true", help="Emit NDJSON events instead of text")
+    common.add_argument("--quiet", "-q", action="store_true", help="Only start / result / summary events")
+    common.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Worker threads shared by all roots (default {MAX_WORKERS})")
+    common.add_argument("--ignore", action="append", default=[],
+                        help="Extra ignore rule (gitignore syntax), repeatable; added to the settings rules")
+
+    parser = argparse.ArgumentParser(prog="rdc", description="RDC headless tools for one or more roots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("archive", parents=[common], help="Move older versions to _archive/")
+    p.add_argument("--dry-run", action="store_true", help="Preview only, no moves")
+    p = sub.add_parser("sync", parents=[common], help="Copy latest _TRAIN_ files to the training folder")
+    p.add_argument("--dry-run", action="store_true")
+    p = sub.add_parser("export", parents=[common], help="Export synced training files as text shards")
+    p.add_argument("--out", help="Output folder (default: the _dataset folder in the training folder)")
+    p.add_argument("--format", choices=["jsonl", "parquet"], help="Shard format (default from settings)")
+    p.add_argument("--shard-mb", type=int, help="Target compressed shard size (default from settings)")
+    p.add_argument("--full", action="store_true", help="Ignore the shard index, rewrite every shard")
+    p = sub.add_parser("scaffold", parents=[common], help="Build or verify the folder tree")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--verify", action="store_true", help="Report drift only, exit 1 if any")
+    p.add_argument("--template", help="Template file (.json / .yaml; default from settings)")
+    p = sub.add_parser("scan", parents=[common], help="Refresh the scan index used by the Files panel")
+    p.add_argument("--full", action="store_true", help="Ignore the saved index, rescan everything")
+    p = sub.add_parser("dedupe", parents=[common], help="Report byte-identical files (never deletes)")
+    p.add_argument("--dry-run", action="store_true", help="Don't write _duplicates.txt")
+    p.add_argument("--min-size", type=int, default=1, help="Ignore files smaller than this (bytes)")
+    p.add_argument("--include-archive", action="store_true", help="Also compare files in _archive/")
+    p = sub.add_parser("stats", parents=[common], help="Storage analytics from the scan index")
+    p.add_argument("--top", type=int, default=rdc_stats.TOP_N, help="Rows in the extension / offender tables")
+    p.add_argument("--rescan", action="store_true", help="Refresh the scan index first")
+    sub.add_parser("history", parents=[common],
+                   help="Rebuild the version history index from _archive/ folders (archive keeps it current)")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    settings = mru.load_settings()
+    roots = args.roots or mru.roots(settings)
+    if not roots:
+        parser.error("no roots given and none configured in settings")
+    args.ignore = list(settings.get("ignore_rules", [])) + args.ignore
+    if getattr(args, "template", None) is None and args.command == "scaffold":
+        args.template = settings.get("scaffold_template") or None
+    if args.command == "export":
+        args.format = args.format or settings.get("export_format", "jsonl")
+        args.shard_mb = args.shard_mb or int(settings.get("export_shard_mb", 64))
+    metrics.enable(settings.get("metrics_enabled", False))
+    report = Reporter(as_json=args.json, quiet=args.quiet)
+    code = run(args.command, roots, args, report, workers=args.workers)
+    metrics.flush()
+    return code
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+rdc_ai.py — Multi-provider chat completion
+One call shape for Claude, OpenAI and Gemini: a system prompt, attached
+documents and the message history go in; text plus token usage comes out.
+
+The stable prefix (system prompt + documents) is sent first and, for
+Anthropic, marked with cache_control so follow-up turns read it from the
+provider's prompt cache; the latest user turn is marked too so the growing
+history is cached incrementally. OpenAI caches matching prefixes
+automatically. Cached-token counts are reported in Usage either way.
+
+Documents already uploaded through a provider file API (see rdc_uploads)
+are passed as `files` and referenced by ID at the start of the first user
+turn instead of being re-sent. configure() points the SDK clients at other
+base URLs (e.g. rdc_mock_provider for offline testing).
+
+The async path streams responses so time to first token can be measured.
+Every call, failed ones included, is recorded in rdc_telemetry.
+
+SDKs are imported on first use (or ahead of it by preload() on a worker
+thread), never at startup.
+"""
+import time
+import asyncio
+import importlib
+from typing import NamedTuple
+
+import rdc_metrics as metrics
+import rdc_telemetry
+
+MODELS = [
+    "claude-opus-4-5-20251101",
+    "claude-sonnet-4-5-20250929",
+    "claude-haiku-4-5-20251001",
+    "gpt-4o",
+    "gpt-4o-mini",
+    "gemini-1.5-pro",
+    "gemini-1.5-flash",
+]
+MAX_TOKENS = 2048
+FILES_BETA = "files-api-2025-04-14"
+
+BASE_URLS = {}              # provider -> base URL override ("" = SDK default)
+_async_clients = {}
+
+
+def configure(base_urls: dict):
+    """Set per-provider base URLs (settings["api_base_urls"])."""
+    BASE_URLS.clear()
+    BASE_URLS.update({k: v for k, v in (base_urls or {}).items() if v})
+
+
+class Usage(NamedTuple):
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0          # prompt tokens served from the provider cache
+    cache_write_tokens: int = 0     # prompt tokens written to the cache (Anthropic)
+
+    def __add__(self, other):
+        return Usage(*(a + b for a, b in zip(self, other)))
+
+
+class FileRef(NamedTuple):
+    provider: str
+    file_id: str
+    name: str
+    mime: str
+    uri: str = ""               # Gemini file URI
+    expires: float = 0.0        # epoch seconds, 0 = no expiry reported
+
+
+class Reply(NamedTuple):
+    text: str
+    usage: Usage
+    stop_reason: str = ""
+    ttft: float = None          # seconds to first streamed token (async path only)
+
+
+def provider_for(model: str) -> str:
+    if model.startswith("claude"):
+        return "anthropic"
+    if model.startswith("gpt") or model.startswith("o1") or model.startswith("o3"):
+        return "openai"
+    if model.startswith("gemini"):
+        return "google"
+    raise ValueError(f"Unknown model: {model}")
+
+
+SDK_MODULES = {"anthropic": "anthropic", "openai": "openai", "google": "google.generativeai"}
+
+
+def preload(provider: str) -> bool:
+    """Import a provider SDK ahead of the first call. False if it is not installed."""
+    try:
+        importlib.import_module(SDK_MODULES[provider])
+    except ImportError:
+        return False
+    return True
+
+
+def documents_block(documents) -> str:
+    """Attached documents as one stable text block ((name, text) pairs, in order)."""
+    return "\n\n".join(f'<document name="{name}">\n{text}\n</document>' for name, text in documents)
+
+
+def complete(model: str, system: str, messages: list, keys: dict,
+             documents=(), max_tokens: int = MAX_TOKENS, files=(), kind: str = "chat") -> Reply:
+    """Send a conversation. `messages` is [{"role": "user"|"assistant", "content": str}].
+
+    `documents` are (name, text) pairs sent inline; `files` are FileRefs
+    for the same provider, referenced by ID. `kind` labels the call in
+    telemetry ("chat", "map", "reduce").
+    """
+    provider = provider_for(model)
+    docs = documents_block(documents)
+    files = [f for f in files if f.provider == provider]
+    call = {"anthropic": _anthropic, "openai": _openai}.get(provider, _google)
+    t0 = time.perf_counter()
+    try:
+        reply = call(model, system, docs, messages, keys, max_tokens, files)
+    except Exception as e:
+        _record(model, provider, kind, time.perf_counter() - t0, error=e)
+        raise
+    _record(model, provider, kind, time.perf_counter() - t0, reply)
+    return reply
+
+
+async def acomplete(model: str, system: str, messages: list, keys: dict,
+                    documents=(), max_tokens: int = MAX_TOKENS, files=(), kind: str = "chat") -> Reply:
+    """complete() on the async SDK clients, streamed; many calls can share one event loop."""
+    provider = provider_for(model)
+    docs = documents_block(documents)
+    files = [f for f in files if f.provider == provider]
+    call = {"anthropic": _aanthropic, "openai": _aopenai}.get(provider, _agoogle)
+    t0 = time.perf_counter()
+    try:
+        reply = await call(model, system, docs, messages, keys, max_tokens, files, t0)
+    except asyncio.CancelledError:
+        _record(model, provider, kind, time.perf_counter() - t0, error="cancelled")
+        raise
+    except Exception as e:
+        _record(model, provider, kind, time.perf_counter() - t0, error=e)
+        raise
+    _record(model, provider, kind, time.perf_counter() - t0, reply)
+    return reply
+
+
+def _record(model: str, provider: str, kind: str, seconds: float, reply: Reply = None, error=None):
+    if error is not None:
+        metrics.count(f"ai.{provider}.errors")
+        rdc_telemetry.record(model, provider, seconds, kind=kind,
+                             error=error if isinstance(error, str) else f"{type(error).__name__}: {error}")
+        return
+    rdc_telemetry.record(model, provider, seconds, reply.ttft, reply.usage, reply.stop_reason, kind=kind)
+    if not metrics.enabled():
+        return
+    metrics.add_time(f"ai.{provider}.call", seconds)
+    u = reply.usage
+    metrics.count(f"ai.{provider}.input_tokens", u.input_tokens)
+    metrics.count(f"ai.{provider}.cached_tokens", u.cached_tokens)
+    metrics.count(f"ai.{provider}.output_tokens", u.output_tokens)
+
+
+def _with_file_parts(msgs: list, parts: list) -> list:
+    """Put file parts ahead of the text of the first user message (the stable prefix)."""
+    if not parts:
+        return msgs
+    for m in msgs:
+        if m["role"] == "user":
+            text = m["content"]
+            m["content"] = parts + (text if isinstance(text, list) else [{"type": "text", "text": text}])
+            break
+    return msgs
+
+
+def anthropic_client(keys: dict):
+    import anthropic
+    return anthropic.Anthropic(api_key=keys.get("anthropic", ""), base_url=BASE_URLS.get("anthropic"))
+
+
+def openai_client(keys: dict):
+    from openai import OpenAI
+    return OpenAI(api_key=keys.get("openai", ""), base_url=BASE_URLS.get("openai"))
+
+
+def _async_client(provider: str, keys: dict):
+    """Async clients are reused (one connection pool per provider and loop)."""
+    loop = asyncio.get_running_loop()
+    key = (provider, keys.get(provider, ""), BASE_URLS.get(provider), id(loop))
+    client = _async_clients.get(key)
+    if client is None:
+        if provider == "anthropic":
+            import anthropic
+            client = anthropic.AsyncAnthropic(api_key=key[1], base_url=key[2])
+        else:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=key[1], base_url=key[2])
+        _async_clients[key] = client
+    return client
+
+
+def google_configure(keys: dict):
+    import google.generativeai as genai
+    if BASE_URLS.get("google"):
+        genai.configure(api_key=keys.get("google", ""), transport="rest",
+                        client_options={"api_endpoint": BASE_URLS["google"]})
+    else:
+        genai.configure(api_key=keys.get("google", ""))
+    return genai
+
+
+# ── Anthropic ────────────────────────────────────────────────────────────────
+def anthropic_request(model, system, docs, messages, max_tokens, files=()) -> dict:
+    cache = {"type": "ephemeral"}
+    system_blocks = [{"type": "text", "text": system or "You are a helpful assistant."}]
+    if docs:
+        system_blocks.append({"type": "text", "text": docs})
+    system_blocks[-1]["cache_control"] = cache
+    msgs = [{"role": m["role"], "content": m["content"]} for m in messages]
+    if msgs and msgs[-1]["role"] == "user":
+        msgs[-1]["content"] = [{"type": "text", "text": msgs[-1]["content"], "cache_control": cache}]
+    parts = [{"type": "document", "source": {"type": "file", "file_id": f.file_id}, "title": f.name}
+             for f in files]
+    if parts:
+        parts[-1]["cache_control"] = cache
+    return {"model": model, "max_tokens": max_tokens, "system": system_blocks,
+            "messages": _with_file_parts(msgs, parts)}
+
+
+def anthropic_usage(u) -> Usage:
+    return Usage(
+        input_tokens=(u.input_tokens or 0) + (getattr(u, "cache_read_input_tokens", 0) or 0)
+        + (getattr(u, "cache_creation_input_tokens", 0) or 0),
+        output_tokens=u.output_tokens or 0,
+        cached_tokens=getattr(u, "cache_read_input_tokens", 0) or 0,
+        cache_write_tokens=getattr(u, "cache_creation_input_tokens", 0) or 0,
+    )
+
+
+def _anthropic(model, system, docs, messages, keys, max_tokens, files=()) -> Reply:
+    client = anthropic_client(keys)
+    request = anthropic_request(model, system, docs, messages, max_tokens, files)
+    if files:
+        r = client.beta.messages.create(betas=[FILES_BETA], **request)
+    else:
+        r = client.messages.create(**request)
+    return anthropic_reply(r)
+
+
+async def _aanthropic(model, system, docs, messages, keys, max_tokens, files=(), t0=0.0) -> Reply:
+    client = _async_client("anthropic", keys)
+    request = anthropic_request(model, system, docs, messages, max_tokens, files)
+    api = client.beta.messages if files else client.messages
+    extra = {"betas": [FILES_BETA]} if files else {}
+    ttft = None
+    async with api.stream(**extra, **request) as stream:
+        async for _ in stream.text_stream:
+            if ttft is None:
+                ttft = time.perf_counter() - t0
+        r = await stream.get_final_message()
+    return anthropic_reply(r)._replace(ttft=ttft)
+
+
+def anthropic_reply(r) -> Reply:
+    text = "".join(b.text for b in r.content if getattr(b, "type", "") == "text")
+    return Reply(text, anthropic_usage(r.usage), r.stop_reason or "")
+
+
+# ── OpenAI ───────────────────────────────────────────────────────────────────
+def openai_request(model, system, docs, messages, max_tokens, files=()) -> dict:
+    # Automatic prefix caching: keep system + documents first and byte-identical
+    prefix = system + ("\n\n" + docs if docs else "")
+    msgs = [{"role": "system", "content": prefix}]
+    msgs += [{"role": m["role"], "content": m["content"]} for m in messages]
+    parts = [{"type": "file", "file": {"file_id": f.file_id}} for f in files]
+    return {"model": model, "max_tokens": max_tokens, "messages": _with_file_parts(msgs, parts)}
+
+
+def openai_usage(u) -> Usage:
+    details = getattr(u, "prompt_tokens_details", None)
+    return Usage(
+        input_tokens=u.prompt_tokens or 0,
+        output_tokens=u.completion_tokens or 0,
+        cached_tokens=(getattr(details, "cached_tokens", 0) or 0) if details else 0,
+    )
+
+
+def _openai(model, system, docs, messages, keys, max_tokens, files=()) -> Reply:
+    client = openai_client(keys)
+    r = client.chat.completions.create(**openai_request(model, system, docs, messages, max_tokens, files))
+    return openai_reply(r)
+
+
+async def _aopenai(model, system, docs, messages, keys, max_tokens, files=(), t0=0.0) -> Reply:
+    client = _async_client("openai", keys)
+    stream = await client.chat.completions.create(
+        **openai_request(model, system, docs, messages, max_tokens, files),
+        stream=True, stream_options={"include_usage": True})
+    parts, usage, finish, ttft = [], None, "", None
+    async for chunk in stream:
+        if chunk.choices:
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+                parts.append(choice.delta.content)
+            finish = choice.finish_reason or finish
+        if chunk.usage:
+            usage = chunk.usage
+    return Reply("".join(parts), openai_usage(usage) if usage else Usage(), finish, ttft)
+
+
+def openai_reply(r) -> Reply:
+    choice = r.choices[0]
+    return Reply(choice.message.content or "", openai_usage(r.usage), choice.finish_reason or "")
+
+
+# ── Google ───────────────────────────────────────────────────────────────────
+def google_usage(u) -> Usage:
+    if u is None:
+        return Usage()
+    return Usage(
+        input_tokens=getattr(u, "prompt_token_count", 0) or 0,
+        output_tokens=getattr(u, "candidates_token_count", 0) or 0,
+        cached_tokens=getattr(u, "cached_content_token_count", 0) or 0,
+    )
+
+
+def google_request(model, system, docs, messages, keys, max_tokens, files=()) -> tuple:
+    """(GenerativeModel, contents, generation_config)"""
+    genai = google_configure(keys)
+    instruction = system + ("\n\n" + docs if docs else "")
+    m = genai.GenerativeModel(model, system_instruction=instruction)
+    contents = [{"role": "model" if msg["role"] == "assistant" else "user", "parts": [msg["content"]]}
+                for msg in messages]
+    if files and contents:
+        contents[0]["parts"] = [{"file_data": {"file_uri": f.uri, "mime_type": f.mime}}
+                                for f in files] + contents[0]["parts"]
+    return m, contents, {"max_output_tokens": max_tokens}
+
+
+def google_reply(r, text: str = None) -> Reply:
+    stop = ""
+    if getattr(r, "candidates", None):
+        stop = str(getattr(r.candidates[0], "finish_reason", "") or "")
+    return Reply(r.text if text is None else text, google_usage(getattr(r, "usage_metadata", None)), stop)
+
+
+def _google(model, system, docs, messages, keys, max_tokens, files=()) -> Reply:
+    m, contents, config = google_request(model, system, docs, messages, keys, max_tokens, files)
+    return google_reply(m.generate_content(contents, generation_config=config))
+
+
+async def _agoogle(model, system, docs, messages, keys, max_tokens, files=(), t0=0.0) -> Reply:
+    m, contents, config = google_request(model, system, docs, messages, keys, max_tokens, files)
+    r = await m.generate_content_async(contents, generation_config=config, stream=True)
+    parts, last, ttft = [], None, None
+    async for chunk in r:
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+        try:
+            parts.append(chunk.text)
+        except ValueError:      # chunk without text parts (e.g. only a finish reason)
+            pass
+        last = chunk
+    reply = google_reply(last, "".join(parts)) if last is not None else Reply("", Usage())
+    return reply._replace(ttft=ttft)
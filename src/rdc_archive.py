@@ -3,93 +3,79 @@ rdc_archive.py — Version archive utility
 Scans a folder tree, groups files by base-name + extension,
 keeps the highest version, moves older versions to _archive/.
 
-Naming convention supported:
+Naming conventions supported: see rdc_versions.py
     CompanyCode_Purpose_Type_V1.23.ext
     Project Name v1.2.ext
-    project_name_v1.2.ext
+    project_name_v1.2.3.ext / name_V2.ext
+    Report 2024-03-15.ext
 
-CLI:  python rdc_archive.py "C:/RDC2" [--dry-run]
+Folders/files matched by rdc_ignore rules (.rdcignore) are skipped.
+The root may be a local folder or an object-store URL (see rdc_storage);
+moves are collected during the walk and done in one batch at the end.
+Every move is recorded in the version history index (rdc_history), so
+archived versions can be found and restored without searching the tree.
+
+CLI:  python rdc_archive.py "C:/RDC2" [--dry-run] [--ignore PATTERN ...]
 """
-import os
-import re
-import shutil
 import argparse
 from datetime import datetime
-from pathlib import Path
-
-SKIP_DIRS = {
-    "_archive", ".tmp.driveupload", "$RECYCLE.BIN",
-    ".git", "node_modules", "__pycache__", ".trash"
-}
-SKIP_PREFIXES = ("~$",)
 
-# Matches:  basename [space or _] v  major . minor  [suffix] .ext
-VERSION_RE = re.compile(
-    r'^(.+?)[\s_]+[vV](\d+)\.(\d+)(.*?)(\.[^.]+)$'
-)
+import rdc_metrics as metrics
+import rdc_storage
+import rdc_history
+from rdc_versions import parse_filename
 
 
-def _parse_version(filename: str):
-    m = VERSION_RE.match(filename)
-    if not m:
-        return None
-    base, major, minor, suffix, ext = m.groups()
-    return {
-        "base": base.strip(),
-        "major": int(major),
-        "minor": int(minor),
-        "suffix": suffix,
-        "ext": ext.lower(),
-        "sort_key": (int(major), int(minor)),
-    }
 
-
-def run_archive(root: str, dry_run: bool = False, log_callback=None):
-    root = Path(root)
+def run_archive(root: str, dry_run: bool = False, log_callback=None, ignore=(), backend=None):
+    store = backend or rdc_storage.backend_for(root)
     log = log_callback or print
     moved = 0
     skipped = 0
-    log(f"{'[DRY RUN] ' if dry_run else ''}Scanning: {root}\n")
-
-    for dirpath, dirnames, filenames in os.walk(root):
-        # Prune skip dirs in-place
-        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+    moves, archive_dirs, groups_moved = [], [], []
+    log(f"{'[DRY RUN] ' if dry_run else ''}Scanning: {store.display()}\n")
 
+    # Ignore rules prune _archive/, .git/ etc. plus any .rdcignore entries
+    for dirpath, dirnames, filenames in metrics.timed_iter("archive.scan", store.walk(extra=ignore)):
+        metrics.count("archive.files_seen", len(filenames))
         groups = {}
-        for fname in filenames:
-            if any(fname.startswith(p) for p in SKIP_PREFIXES):
-                continue
-            info = _parse_version(fname)
-            if not info:
-                continue
-            key = (info["base"].lower(), info["ext"])
-            groups.setdefault(key, []).append((info["sort_key"], fname, info))
+        with metrics.timer("archive.parse"):
+            for fname in filenames:
+                info = parse_filename(fname)
+                if not info:
+                    continue
+                groups.setdefault(info.key, []).append((info.sort_key, fname, info))
 
         for key, versions in groups.items():
             if len(versions) < 2:
                 continue
-            versions.sort(key=lambda x: x[0], reverse=True)
+            with metrics.timer("archive.group"):
+                versions.sort(key=lambda x: x[0], reverse=True)
             latest = versions[0][1]
             older = [v[1] for v in versions[1:]]
 
-            archive_dir = Path(dirpath) / "_archive"
-            if not dry_run:
-                archive_dir.mkdir(exist_ok=True)
-
+            archive_dir = f"{dirpath}/_archive" if dirpath else "_archive"
+            if archive_dir not in archive_dirs[-1:]:
+                archive_dirs.append(archive_dir)
             for old_file in older:
-                src = Path(dirpath) / old_file
-                dst = archive_dir / old_file
                 log(f"  ARCHIVE: {old_file}  →  _archive/")
-                if not dry_run:
-                    shutil.move(str(src), str(dst))
+                moves.append((f"{dirpath}/{old_file}" if dirpath else old_file, f"{archive_dir}/{old_file}"))
                 moved += 1
+            groups_moved.append((dirpath, latest, older))
 
-    # Write log file
     if not dry_run:
-        log_path = root / "_archive_log.txt"
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(f"\n[{datetime.now():%Y-%m-%d %H:%M}] Archived {moved} files\n")
-
+        if not store.implicit_dirs:
+            for d in archive_dirs:
+                store.mkdir(d)
+        with metrics.timer("archive.move"):
+            store.move_many(moves)
+        if groups_moved:
+            rdc_history.update(store, groups_moved)
+        # Write log file
+        store.append_text("_archive_log.txt", f"\n[{datetime.now():%Y-%m-%d %H:%M}] Archived {moved} files\n")
+
+    metrics.count("archive.files_moved", moved)
+    metrics.flush()
     log(f"\nDone. {moved} files archived, {skipped} skipped.")
     return moved
 
@@ -98,5 +84,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="RDC Version Archiver")
     parser.add_argument("root", help="Root folder to scan")
     parser.add_argument("--dry-run", action="store_true", help="Preview only, no moves")
+    parser.add_argument("--ignore", action="append", default=[],
+                        help="Extra ignore rule (gitignore syntax), repeatable")
+    parser.add_argument("--profile", action="store_true", help="Run under cProfile, save to the config dir")
     args = parser.parse_args()
-    run_archive(args.root, dry_run=args.dry_run)
+    if args.profile:
+        with metrics.profiled("archive"):
+            run_archive(args.root, dry_run=args.dry_run, ignore=args.ignore)
+    else:
+        run_archive(args.root, dry_run=args.dry_run, ignore=args.ignore)
@@ -0,0 +1,141 @@
+"""
+rdc_async.py — One asyncio event loop for the dashboard's background work
+API calls run as coroutines on a single loop (async SDK clients); blocking
+file work (archive, sync, scans) goes through one bounded thread pool via
+run_blocking(). Results, errors, log lines and progress reach the widgets
+on the Qt thread through ui().
+
+With qasync installed the loop *is* the Qt event loop (QEventLoop), so
+coroutines run on the GUI thread between events. Without it the loop runs
+on one background thread and ui() hops back through a queued Qt signal.
+Either way a submitted job is a Job handle that can be cancelled; the
+coroutine sees CancelledError at its next await, and a timeout cancels it
+the same way.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+try:
+    import qasync
+except ImportError:     # optional — falls back to a loop thread
+    qasync = None
+
+MAX_WORKERS = 8         # threads for blocking file work, shared by all jobs
+
+_runner = None
+
+
+class _Bridge(QObject):
+    """Runs callables on the thread that owns it (the GUI thread)."""
+    call = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.call.connect(lambda fn: fn())
+
+
+class Job:
+    """Handle for a submitted coroutine (the asyncio.Task lives on the loop)."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self.task = None
+
+    def cancel(self):
+        self._loop.call_soon_threadsafe(lambda: self.task is not None and self.task.cancel())
+
+    def done(self) -> bool:
+        return self.task is not None and self.task.done()
+
+
+class AsyncRunner:
+    def __init__(self, app=None):
+        self.integrated = qasync is not None and app is not None
+        self.executor = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="rdc-io")
+        self._bridge = _Bridge()
+        if self.integrated:
+            self.loop = qasync.QEventLoop(app)
+            asyncio.set_event_loop(self.loop)
+        else:
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(target=self.loop.run_forever, name="rdc-asyncio", daemon=True).start()
+        self.loop.set_default_executor(self.executor)
+
+    def exec(self, app) -> int:
+        """Run the Qt application (through the qasync loop when integrated)."""
+        if not self.integrated:
+            return app.exec()
+        closed = asyncio.Event()
+        app.aboutToQuit.connect(closed.set)
+        with self.loop:
+            self.loop.run_until_complete(closed.wait())
+        return 0
+
+    def ui(self, fn, *args):
+        """Call fn(*args) on the Qt thread (safe from any thread)."""
+        self._bridge.call.emit(functools.partial(fn, *args))
+
+    def ui_callback(self, fn):
+        """Wrap fn so calls from worker threads are delivered on the Qt thread."""
+        return lambda *args: self.ui(fn, *args)
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        """Await a blocking function on the shared thread pool."""
+        return await self.loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def submit(self, coro, on_result=None, on_error=None, timeout: float = None) -> Job:
+        """Schedule a coroutine. on_result(value) / on_error(exception) run on the Qt thread.
+
+        Cancellation and timeouts arrive at on_error as asyncio.CancelledError
+        and asyncio.TimeoutError.
+        """
+        async def job():
+            try:
+                result = await (asyncio.wait_for(coro, timeout) if timeout else coro)
+            except asyncio.CancelledError as e:
+                if on_error:
+                    self.ui(on_error, e)
+                raise
+            except Exception as e:
+                if on_error:
+                    self.ui(on_error, e)
+                return None
+            if on_result:
+                self.ui(on_result, result)
+            return result
+
+        handle = Job(self.loop)
+
+        def create():
+            handle.task = self.loop.create_task(job())
+
+        if self.integrated:
+            create()
+        else:
+            self.loop.call_soon_threadsafe(create)
+        return handle
+
+    def submit_blocking(self, fn, *args, on_result=None, on_error=None, **kwargs) -> Job:
+        """Shorthand: run a blocking function on the pool as a job."""
+        return self.submit(self.run_blocking(fn, *args, **kwargs), on_result, on_error)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if not self.integrated:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def start(app=None) -> AsyncRunner:
+    """Create the shared runner (call once, before any panel submits work)."""
+    global _runner
+    if _runner is None:
+        _runner = AsyncRunner(app)
+    return _runner
+
+
+def runner() -> AsyncRunner:
+    return _runner or start()
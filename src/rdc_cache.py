@@ -0,0 +1,89 @@
+"""
+rdc_cache.py — Size-bounded on-disk cache
+Files under <config dir>/cache/<name>/, keyed by (path, size, mtime) of
+the source file so an edited file is a miss. Reads refresh an entry's
+mtime; when the cache grows past max_bytes the least recently used
+entries are removed down to 90% of the limit.
+"""
+import os
+import hashlib
+import threading
+from pathlib import Path
+
+import mru_manager as mru
+
+
+def source_key(path: str, st: os.stat_result = None) -> str:
+    """Cache key for a source file's current content (path + size + mtime)."""
+    st = st or os.stat(path)
+    raw = f"{os.path.normcase(os.path.abspath(path))}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    def __init__(self, name: str, max_bytes: int):
+        self.dir = mru.config_dir() / "cache" / name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None           # computed on first write
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.dir / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = ""):
+        """Path of the cached entry, or None."""
+        p = self._path(key, suffix)
+        try:
+            os.utime(p)             # mark as recently used
+        except OSError:
+            return None
+        return p
+
+    def put(self, key: str, data: bytes, suffix: str = "") -> Path:
+        p = self._path(key, suffix)
+        p.parent.mkdir(exist_ok=True)
+        tmp = p.with_name(p.name + f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+        return p
+
+    def _entries(self):
+        for sub in self.dir.iterdir():
+            if sub.is_dir():
+                for e in os.scandir(sub):
+                    if not e.name.endswith(".tmp"):
+                        yield e
+
+    def _scan_size(self) -> int:
+        return sum(e.stat().st_size for e in self._entries())
+
+    def _evict(self):
+        entries = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._entries()))
+        target = int(self.max_bytes * 0.9)
+        size = sum(s for _, s, _ in entries)
+        for _, s, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= s
+            except OSError:
+                pass
+        self._size = size
+
+    def clear(self):
+        with self._lock:
+            for e in list(self._entries()):
+                try:
+                    os.remove(e.path)
+                except OSError:
+                    pass
+            self._size = 0
@@ -0,0 +1,115 @@
+"""
+rdc_chat.py — Persisted AI Tools conversation threads
+A thread keeps its model, system prompt, attached document paths and the
+full message history with per-turn token usage. Each thread is one JSON
+file under <config dir>/threads/<id>.json, written after every turn.
+
+Document text is not stored in the thread; it is re-read through the
+rdc_extract cache on send so the prompt prefix stays byte-identical
+between turns (which is what the provider prompt caches key on).
+"""
+import os
+import json
+import time
+import uuid
+
+import mru_manager as mru
+from rdc_ai import Usage
+
+TITLE_CHARS = 60
+
+
+def threads_dir():
+    d = mru.config_dir() / "threads"
+    d.mkdir(exist_ok=True)
+    return d
+
+
+class Thread:
+    def __init__(self, model: str = "", system: str = "", thread_id: str = None):
+        self.id = thread_id or uuid.uuid4().hex[:12]
+        self.title = ""
+        self.model = model
+        self.system = system
+        self.documents = []         # attached file paths, in attach order
+        self.messages = []          # {"role", "content", "ts", "model"?, "usage"?}
+        self.created = self.updated = time.time()
+
+    def add_user(self, text: str):
+        if not self.title:
+            self.title = " ".join(text.split())[:TITLE_CHARS]
+        self.messages.append({"role": "user", "content": text, "ts": time.time()})
+
+    def add_reply(self, reply, model: str):
+        self.messages.append({"role": "assistant", "content": reply.text, "ts": time.time(),
+                              "model": model, "usage": reply.usage._asdict()})
+        self.updated = time.time()
+
+    def history(self) -> list:
+        """Messages in the form rdc_ai.complete() takes."""
+        return [{"role": m["role"], "content": m["content"]} for m in self.messages]
+
+    def usage(self) -> Usage:
+        total = Usage()
+        for m in self.messages:
+            if "usage" in m:
+                total += Usage(**m["usage"])
+        return total
+
+    def last_usage(self) -> Usage:
+        for m in reversed(self.messages):
+            if "usage" in m:
+                return Usage(**m["usage"])
+        return Usage()
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+    def to_json(self) -> dict:
+        return {"id": self.id, "title": self.title, "model": self.model, "system": self.system,
+                "documents": self.documents, "messages": self.messages,
+                "created": self.created, "updated": self.updated}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Thread":
+        t = cls(data.get("model", ""), data.get("system", ""), data["id"])
+        t.title = data.get("title", "")
+        t.documents = data.get("documents", [])
+        t.messages = data.get("messages", [])
+        t.created = data.get("created", 0.0)
+        t.updated = data.get("updated", t.created)
+        return t
+
+    def save(self):
+        path = threads_dir() / f"{self.id}.json"
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=1, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def load_thread(thread_id: str):
+    try:
+        with open(threads_dir() / f"{thread_id}.json", encoding="utf-8") as f:
+            return Thread.from_json(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def list_threads() -> list:
+    """[(id, title, updated)] newest first, read from the thread files."""
+    out = []
+    for p in threads_dir().glob("*.json"):
+        try:
+            with open(p, encoding="utf-8") as f:
+                data = json.load(f)
+            out.append((data["id"], data.get("title") or "(untitled)", data.get("updated", 0.0)))
+        except (OSError, ValueError, KeyError):
+            continue
+    out.sort(key=lambda t: t[2], reverse=True)
+    return out
+
+
+def delete_thread(thread_id: str):
+    try:
+        os.remove(threads_dir() / f"{thread_id}.json")
+    except OSError:
+        pass
@@ -5,11 +5,19 @@ PyQt6 desktop app. Single codebase for Windows and Mac.
 Usage:
     python rdc_dashboard.py          # Open window
     python rdc_dashboard.py --tray   # Start minimised to tray
+    python rdc_dashboard.py --profile  # cProfile the session (saved under the config dir)
+
+Set RDC_STARTUP_PROBE=<file> to record startup timings to <file> and quit
+once the window is up (used by build/measure_startup.py).
 """
 import sys
 import os
-import threading
+import time
+_T0 = time.perf_counter()       # before the Qt imports, for the startup probe
+import json
+import asyncio
 import argparse
+import multiprocessing
 from pathlib import Path
 
 from PyQt6.QtWidgets import (
@@ -17,19 +25,37 @@ from PyQt6.QtWidgets import (
     QStackedWidget, QPushButton, QLabel, QLineEdit, QTextEdit,
     QFileDialog, QCheckBox, QProgressBar, QListWidget, QListWidgetItem,
     QTreeView, QSplitter, QTabWidget, QComboBox, QAbstractItemView,
-    QSystemTrayIcon, QMenu, QSizePolicy, QFrame,
+    QSystemTrayIcon, QMenu, QFileIconProvider, QDialog,
 )
 from PyQt6.QtCore import (
-    Qt, QDir, QModelIndex, pyqtSignal, QObject, QThread,
+    Qt, QModelIndex, pyqtSignal, QTimer,
+    QAbstractItemModel, QMimeData, QUrl,
 )
 from PyQt6.QtGui import (
-    QFileSystemModel, QAction, QIcon, QPixmap, QPainter, QColor, QFont,
+    QAction, QIcon, QPixmap, QPainter, QColor, QFont, QShortcut, QKeySequence,
 )
 
 import mru_manager as mru
+import rdc_index
+import rdc_quickopen
+import rdc_extract
+import rdc_ai
+import rdc_chat
+import rdc_longdoc
+import rdc_uploads
+import rdc_async
+import rdc_metrics as metrics
+import rdc_telemetry
+import rdc_scheduler
+import rdc_stats
+import rdc_storage
+import rdc_preview
+import rdc_history
+from rdc_versions import parse_filename
 from rdc_archive import run_archive
 from rdc_training_sync import run_sync
-from rdc_scaffold import build as run_scaffold
+from rdc_export import run_export
+from rdc_scaffold import build as run_scaffold, verify as verify_scaffold
 
 # ── Dark stylesheet ──────────────────────────────────────────────────────────
 DARK_QSS = """
@@ -57,40 +83,395 @@ QFrame#divider                { color: #444; }
 """
 
 
-# ── Worker signals ───────────────────────────────────────────────────────────
-class WorkerSignals(QObject):
-    log    = pyqtSignal(str)
-    done   = pyqtSignal()
-    result = pyqtSignal(object)
+# ── Drag-drop file list ──────────────────────────────────────────────────────
+class PathList(QListWidget):
+    """List of file paths that drags out as file URLs (path in UserRole, else text)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
 
+    def item_path(self, item: QListWidgetItem) -> str:
+        return item.data(Qt.ItemDataRole.UserRole) or item.text()
 
-# ── Drag-drop file list ──────────────────────────────────────────────────────
-class DropFileList(QListWidget):
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, items):
+        mime = QMimeData()
+        mime.setUrls([QUrl.fromLocalFile(self.item_path(i)) for i in items])
+        return mime
+
+
+class DropFileList(PathList):
     files_dropped = pyqtSignal(list)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, auto_add: bool = True):
         super().__init__(parent)
+        self.auto_add = auto_add
         self.setAcceptDrops(True)
-        self.setDragDropMode(QAbstractItemView.DragDropMode.DropOnly)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
 
     def dragEnterEvent(self, e):
-        if e.mimeData().hasUrls():
+        if e.mimeData().hasUrls() and e.source() is not self:
             e.acceptProposedAction()
 
     def dragMoveEvent(self, e):
-        if e.mimeData().hasUrls():
+        if e.mimeData().hasUrls() and e.source() is not self:
             e.acceptProposedAction()
 
     def dropEvent(self, e):
+        if e.source() is self:
+            return
         paths = [u.toLocalFile() for u in e.mimeData().urls()]
         self.files_dropped.emit(paths)
         for p in paths:
-            self.addItem(p)
+            if self.auto_add:
+                self.addItem(p)
             mru.add_file(p)
 
 
+# ── Version-collapsing tree model ───────────────────────────────────────────
+def _human_size(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def _human_age(ts: float) -> str:
+    secs = max(0, time.time() - ts)
+    for span, unit in ((86400 * 365, "y"), (86400 * 30, "mo"), (86400, "d"), (3600, "h"), (60, "m")):
+        if secs >= span:
+            return f"{int(secs // span)}{unit}"
+    return "now"
+
+
+class _Node:
+    __slots__ = ("parent", "rel", "name", "kind", "record", "info", "older", "children", "row")
+
+    def __init__(self, parent, rel, name, kind, record=None, info=None, older=()):
+        self.parent = parent
+        self.rel = rel              # folder path relative to the index root
+        self.name = name
+        self.kind = kind            # "dir" | "file" | "version"
+        self.record = record
+        self.info = info
+        self.older = older
+        self.children = None        # None = not fetched yet
+        self.row = 0
+
+
+class VersionTreeModel(QAbstractItemModel):
+    """Tree over a rdc_index.ScanIndex with each version group collapsed to
+    its latest file; older versions are the row's children. Folders are
+    materialised (and the name filter applied) only when expanded."""
+
+    COLUMNS = ("Name", "Version", "Size", "Age")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._index = None
+        self._filter = ""
+        self._root = _Node(None, "", "", "dir")
+        self._icons = QFileIconProvider()
+
+    def set_index(self, index):
+        self.beginResetModel()
+        self._index = index
+        self._root = _Node(None, "", "", "dir")
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        self.beginResetModel()
+        self._filter = text.strip().lower()
+        self._root = _Node(None, "", "", "dir")
+        self.endResetModel()
+
+    def filePath(self, index: QModelIndex) -> str:
+        if not index.isValid() or self._index is None:
+            return ""
+        node = index.internalPointer()
+        folder = self._index.abspath(node.rel)
+        return folder if node.kind == "dir" else os.path.join(folder, node.name)
+
+    def _node(self, index: QModelIndex) -> _Node:
+        if index.isValid():
+            return index.internalPointer()
+        if self._root.children is None:
+            self._root.children = self._build(self._root)
+        return self._root
+
+    def _build(self, node: _Node) -> list:
+        if self._index is None or node.rel not in self._index.dirs:
+            return []
+        pre = node.rel + "/" if node.rel else ""
+        kids = [_Node(node, pre + d, d, "dir") for d in self._index.dirs[node.rel].subdirs]
+        flt = self._filter
+        for rec, info, older in self._index.groups(node.rel):
+            if flt and flt not in rec.name.lower() and not any(flt in o.name.lower() for o in older):
+                continue
+            g = _Node(node, node.rel, rec.name, "file", rec, info, older)
+            g.children = [_Node(g, node.rel, o.name, "version", o, parse_filename(o.name))
+                          for o in older]
+            for i, c in enumerate(g.children):
+                c.row = i
+                c.children = []
+            kids.append(g)
+        for i, k in enumerate(kids):
+            k.row = i
+        return kids
+
+    # ── QAbstractItemModel ───────────────────────────────────────────────────
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        kids = self._node(parent).children or []
+        return self.createIndex(row, column, kids[row]) if row < len(kids) else QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        p = index.internalPointer().parent
+        if p is None or p is self._root:
+            return QModelIndex()
+        return self.createIndex(p.row, 0, p)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children or [])
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node.children is not None:
+            return bool(node.children)
+        d = self._index.dirs.get(node.rel) if self._index else None
+        return bool(d and (d.subdirs or d.files))
+
+    def canFetchMore(self, parent):
+        return self._node(parent).children is None
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node.children is not None:
+            return
+        kids = self._build(node)
+        if kids:
+            self.beginInsertRows(parent, 0, len(kids) - 1)
+        node.children = kids
+        if kids:
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node, col = index.internalPointer(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == 0:
+                return node.name
+            if node.kind == "dir":
+                return ""
+            if col == 1:
+                if node.info is None:
+                    return ""
+                return f"{node.info.label}  (+{len(node.older)})" if node.older else node.info.label
+            if col == 2:
+                return _human_size(node.record.size)
+            if col == 3:
+                return _human_age(node.record.mtime)
+        elif role == Qt.ItemDataRole.DecorationRole and col == 0:
+            kind = QFileIconProvider.IconType.Folder if node.kind == "dir" else QFileIconProvider.IconType.File
+            return self._icons.icon(kind)
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            return self.filePath(index)
+        elif role == Qt.ItemDataRole.ForegroundRole and node.kind == "version":
+            return QColor("#888")
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+                | Qt.ItemFlag.ItemIsDragEnabled)
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        mime = QMimeData()
+        paths = {self.filePath(i) for i in indexes if i.column() == 0}
+        mime.setUrls([QUrl.fromLocalFile(p) for p in sorted(paths)])
+        return mime
+
+
+# ── Quick-open palette ──────────────────────────────────────────────────────
+class QuickOpenDialog(QDialog):
+    def __init__(self, quick, parent=None):
+        super().__init__(parent)
+        self.quick = quick
+        self.selected = ""
+        self.recent = rdc_quickopen.recent_ranks()
+        self.setWindowTitle("Quick Open")
+        self.resize(720, 420)
+        v = QVBoxLayout(self)
+        self.edit = QLineEdit()
+        self.edit.setPlaceholderText("Type part of a file name or path…")
+        self.edit.textChanged.connect(self._search)
+        self.edit.returnPressed.connect(self._accept)
+        v.addWidget(self.edit)
+        self.results = QListWidget()
+        self.results.itemActivated.connect(lambda _: self._accept())
+        v.addWidget(self.results)
+        self.status = QLabel(f"{len(quick):,} paths indexed")
+        v.addWidget(self.status)
+
+    def _search(self, text: str):
+        t0 = time.perf_counter()
+        hits = self.quick.search(text, limit=50, recent=self.recent)
+        ms = (time.perf_counter() - t0) * 1000
+        self.results.clear()
+        for _, path in hits:
+            rel = os.path.relpath(os.path.dirname(path), self.quick.root)
+            item = QListWidgetItem(f"{os.path.basename(path)}    —  {rel}")
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            item.setToolTip(path)
+            self.results.addItem(item)
+        if hits:
+            self.results.setCurrentRow(0)
+        self.status.setText(f"{len(hits)} results · {ms:.1f} ms · {len(self.quick):,} paths")
+
+    def keyPressEvent(self, e):
+        if e.key() in (Qt.Key.Key_Down, Qt.Key.Key_Up) and self.results.count():
+            step = 1 if e.key() == Qt.Key.Key_Down else -1
+            row = max(0, min(self.results.count() - 1, self.results.currentRow() + step))
+            self.results.setCurrentRow(row)
+            return
+        super().keyPressEvent(e)
+
+    def _accept(self):
+        item = self.results.currentItem()
+        if item is not None:
+            self.selected = item.data(Qt.ItemDataRole.UserRole)
+            self.accept()
+
+
+class VersionHistoryDialog(QDialog):
+    """All recorded versions of one document (rdc_history), with restore."""
+
+    def __init__(self, root: str, rel: str, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.rel = rel
+        self.store = rdc_storage.backend_for(root)
+        self.restored = []          # folders touched by restores, for the caller's index
+        self.setWindowTitle(f"History — {os.path.basename(rel)}")
+        self.resize(760, 360)
+        v = QVBoxLayout(self)
+        self.list = QListWidget()
+        self.list.itemDoubleClicked.connect(lambda _: self._open(False))
+        v.addWidget(self.list)
+        row = QHBoxLayout()
+        self.btn_restore = QPushButton("⟲  Restore as Current")
+        self.btn_restore.clicked.connect(self._restore)
+        row.addWidget(self.btn_restore)
+        btn_side = QPushButton("⧉  Open Side by Side")
+        btn_side.clicked.connect(lambda: self._open(True))
+        row.addWidget(btn_side)
+        btn_open = QPushButton("📂  Open")
+        btn_open.clicked.connect(lambda: self._open(False))
+        row.addWidget(btn_open)
+        v.addLayout(row)
+        self.status = QLabel("")
+        v.addWidget(self.status)
+        self._load()
+
+    def _load(self, note: str = ""):
+        """Read the index on the pool (a stat plus, when it changed, a parse
+        of the whole file), then fill the list; `note` replaces the count."""
+        t0 = time.perf_counter()
+
+        def done(result):
+            if isinstance(result, BaseException):
+                self.status.setText(f"❌ {result}")
+                return
+            self._fill(result, note or f"{len(result)} versions · {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+        self.status.setText(note or "⏳ Loading versions…")
+        rdc_async.runner().submit_blocking(rdc_history.versions, self.root, self.rel, backend=self.store,
+                                           on_result=done, on_error=done)
+
+    def _fill(self, versions: list, note: str):
+        self.list.clear()
+        for ver in versions:
+            when = "● current" if ver.live else f"archived {time.strftime('%Y-%m-%d', time.localtime(ver.archived))}"
+            item = QListWidgetItem(f"{ver.name}    {when}    {ver.size / 1e6:,.2f} MB    "
+                                   f"saved {time.strftime('%Y-%m-%d %H:%M', time.localtime(ver.mtime))}")
+            item.setData(Qt.ItemDataRole.UserRole, ver)
+            item.setToolTip(ver.path)
+            self.list.addItem(item)
+        if versions:
+            self.list.setCurrentRow(0)
+            self.status.setText(note)
+        else:
+            self.status.setText("No archived versions recorded for this document yet "
+                                "(run Archive, or 'rdc history' to index older archives).")
+
+    def _selected(self):
+        item = self.list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+    def _open(self, side_by_side: bool):
+        ver = self._selected()
+        if ver is None:
+            return
+        paths = [ver.path]
+        if side_by_side:
+            current = [v.path for v in (self.list.item(i).data(Qt.ItemDataRole.UserRole)
+                                        for i in range(self.list.count())) if v.live]
+            paths = current[:1] + [p for p in paths if p not in current[:1]]
+        for rel in paths:
+            path = self.store.local_path(rel)
+            if path and os.path.isfile(path):
+                self.parent()._open_path(path)
+            else:
+                self.status.setText(f"⚠ {rel} is missing — rebuild the history index")
+
+    def _restore(self):
+        ver = self._selected()
+        if ver is None or ver.live:
+            self.status.setText("Pick an archived version to restore.")
+            return
+        self.btn_restore.setEnabled(False)
+        self.status.setText(f"⏳ Restoring {ver.name}…")
+
+        def done(result):
+            self.btn_restore.setEnabled(True)
+            if isinstance(result, BaseException):
+                self.status.setText(f"❌ {result}")
+                return
+            self.rel = result
+            folder = result.rpartition("/")[0]
+            self.restored += [folder, rdc_history.archive_dir(folder)]
+            self._load(f"✅ {ver.name} is now the current version.")
+
+        rdc_async.runner().submit_blocking(rdc_history.restore, self.root, ver.path, backend=self.store,
+                                           log_callback=lambda _: None, on_result=done, on_error=done)
+
+
 # ── File Panel ───────────────────────────────────────────────────────────────
 class FilePanel(QWidget):
+    PREVIEW_MEMORY = 64             # decoded previews kept for flicking back and forth
+
     def __init__(self, settings, parent=None):
         super().__init__(parent)
         self.settings = settings
@@ -102,28 +483,71 @@ class FilePanel(QWidget):
         lv.setContentsMargins(0,0,0,0)
         lbl = QLabel("Folder Tree"); lbl.setObjectName("section_title")
         lv.addWidget(lbl)
-        self.model = QFileSystemModel()
-        self.model.setRootPath(QDir.rootPath())
+        row = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter files…")
+        self.filter_edit.textChanged.connect(lambda t: self.model.set_filter(t))
+        row.addWidget(self.filter_edit)
+        self.btn_rescan = QPushButton("⟳  Rescan")
+        self.btn_rescan.clicked.connect(self._rescan)
+        row.addWidget(self.btn_rescan)
+        lv.addLayout(row)
+        self.model = VersionTreeModel()
         self.tree = QTreeView()
         self.tree.setModel(self.model)
         self.tree.setDragEnabled(True)
-        self.tree.hideColumn(1); self.tree.hideColumn(2); self.tree.hideColumn(3)
-        root = settings.get("rdc2_root", "")
-        if root and os.path.isdir(root):
-            idx = self.model.index(root)
-            self.tree.setRootIndex(idx)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setColumnWidth(0, 320)
         self.tree.doubleClicked.connect(self._open_file)
+        self.tree.selectionModel().currentChanged.connect(self._show_preview)
+        # Prefetch previews for the rows on screen once scrolling settles
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(150)
+        self._prefetch_timer.timeout.connect(self._prefetch_visible)
+        self.tree.verticalScrollBar().valueChanged.connect(self._prefetch_timer.start)
+        self.tree.expanded.connect(self._prefetch_timer.start)
+        self.model.modelReset.connect(self._prefetch_timer.start)
         lv.addWidget(self.tree)
-
+        self.index_status = QLabel("")
+        lv.addWidget(self.index_status)
+
+        row_b = QHBoxLayout()
+        btn_quick = QPushButton("🔎  Quick Open  (Ctrl+P)")
+        btn_quick.clicked.connect(self._quick_open)
+        row_b.addWidget(btn_quick)
+        btn_history = QPushButton("🕘  Version History")
+        btn_history.clicked.connect(self._history)
+        row_b.addWidget(btn_history)
         btn_open = QPushButton("📂  Open in Explorer")
         btn_open.clicked.connect(self._open_explorer)
-        lv.addWidget(btn_open)
+        row_b.addWidget(btn_open)
+        lv.addLayout(row_b)
+        QShortcut(QKeySequence("Ctrl+P"), self, activated=self._quick_open)
 
-        # Right: drop zone + MRU
+        # Right: preview + drop zone + MRU
         right = QWidget()
         rv = QVBoxLayout(right)
         rv.setContentsMargins(0,0,0,0)
 
+        lbl_p = QLabel("Preview"); lbl_p.setObjectName("section_title")
+        rv.addWidget(lbl_p)
+        self.preview_image = QLabel("Select a file")
+        self.preview_image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview_image.setFixedHeight(rdc_preview.THUMB_PX * 3 // 4)
+        rv.addWidget(self.preview_image)
+        self.preview_meta = QLabel("")
+        self.preview_meta.setWordWrap(True)
+        self.preview_meta.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        rv.addWidget(self.preview_meta)
+        self.preview_text = QTextEdit()
+        self.preview_text.setReadOnly(True)
+        self.preview_text.setMaximumHeight(120)
+        self.preview_text.hide()
+        rv.addWidget(self.preview_text)
+        self._preview_path = None
+        self._previews = {}         # path -> (Preview, QPixmap or None), most recent last
+
         lbl2 = QLabel("Drop Files Here"); lbl2.setObjectName("section_title")
         rv.addWidget(lbl2)
         self.drop_list = DropFileList()
@@ -132,7 +556,7 @@ class FilePanel(QWidget):
 
         lbl3 = QLabel("Recent Files"); lbl3.setObjectName("section_title")
         rv.addWidget(lbl3)
-        self.recent_files = QListWidget()
+        self.recent_files = PathList()
         self._refresh_mru()
         self.recent_files.itemDoubleClicked.connect(self._open_recent)
         rv.addWidget(self.recent_files)
@@ -143,8 +567,82 @@ class FilePanel(QWidget):
         splitter.setSizes([600, 400])
         layout.addWidget(splitter)
 
+        self._index = None
+        self._quick = None
+        root = settings.get("rdc2_root", "")
+        if root and os.path.isdir(root):
+            self._index = rdc_index.load(root)
+            if self._index:
+                self.model.set_index(self._index)
+            self._rescan()
+
+    def _rescan(self):
+        root = self.settings.get("rdc2_root", "")
+        if not root or not os.path.isdir(root):
+            self.index_status.setText("⚠ Set the RDC2 root in Settings.")
+            return
+        self.btn_rescan.setEnabled(False)
+        self.index_status.setText("⏳ Indexing…")
+        previous = self._index
+        ignore = self.settings.get("ignore_rules", [])
+
+        def work():
+            index = rdc_index.scan(root, previous=previous, ignore=ignore)
+            index.save()
+            # Own copy of the quick-open index, so the palette never sees a half-update
+            quick = rdc_quickopen.load(index.root) or rdc_quickopen.QuickOpenIndex(index.root)
+            quick.sync(index)
+            quick.save()
+            return index, quick
+
+        rdc_async.runner().submit_blocking(work, on_result=self._on_index, on_error=self._on_index)
+
+    def _on_index(self, result):
+        self.btn_rescan.setEnabled(True)
+        if isinstance(result, BaseException):
+            self.index_status.setText(f"❌ Index error: {result}")
+            return
+        self._index, self._quick = result
+        self._previews.clear()      # files may have changed since they were shown
+        self.model.set_index(self._index)
+        self.index_status.setText(f"{self._index.file_count():,} files indexed.")
+
+    def _quick_open(self):
+        if self._quick is None:
+            self.index_status.setText("⏳ Quick-open index is still building…")
+            return
+        dlg = QuickOpenDialog(self._quick, self)
+        if dlg.exec() and dlg.selected:
+            self._open_path(dlg.selected)
+
+    def _history(self):
+        path = self.model.filePath(self.tree.currentIndex())
+        if self._index is None or not os.path.isfile(path):
+            self.index_status.setText("Select a file to see its versions.")
+            return
+        rel = os.path.relpath(path, self._index.root).replace(os.sep, "/")
+        dlg = VersionHistoryDialog(self._index.root, rel, self)
+        dlg.exec()
+        if dlg.restored:
+            # Re-list only the folders the restore touched, no rescan
+            # (on copies, as in _rescan, so the tree and palette never see a half-update)
+            index = rdc_index.ScanIndex(self._index.root, dict(self._index.dirs), self._index.scanned_at)
+            dirs, ignore = dlg.restored, self.settings.get("ignore_rules", [])
+
+            def work():
+                index.refresh(dirs, ignore=ignore)
+                index.save()
+                quick = rdc_quickopen.load(index.root) or rdc_quickopen.QuickOpenIndex(index.root)
+                quick.sync(index)
+                quick.save()
+                return index, quick
+
+            rdc_async.runner().submit_blocking(work, on_result=self._on_index, on_error=self._on_index)
+
     def _open_file(self, idx: QModelIndex):
-        path = self.model.filePath(idx)
+        self._open_path(self.model.filePath(idx))
+
+    def _open_path(self, path: str):
         if os.path.isfile(path):
             mru.add_file(path)
             self._refresh_mru()
@@ -177,6 +675,77 @@ class FilePanel(QWidget):
         for f in mru.get_recent_files():
             self.recent_files.addItem(f)
 
+    # ── Preview ──
+    def _show_preview(self, current: QModelIndex, _previous=None):
+        path = self.model.filePath(current) if current.isValid() else ""
+        self._preview_path = path
+        if not os.path.isfile(path):
+            self.preview_image.clear()
+            self.preview_image.setText("Select a file")
+            self.preview_meta.setText("")
+            self.preview_text.hide()
+            return
+        if path in self._previews:
+            self._previews[path] = self._previews.pop(path)     # most recently used
+            self._render_preview(path, *self._previews[path])
+            return
+        self.preview_image.setText("⏳")
+        self.preview_meta.setText(os.path.basename(path))
+        self.preview_text.hide()
+        # Cache lookups go to the shared pool so they are not stuck behind
+        # renders on the preview workers; only a miss is queued for rendering.
+        def on_cached(result):
+            if result is None:
+                rdc_preview.previewer().request(path, rdc_async.runner().ui_callback(self._on_preview))
+            else:
+                self._on_preview(path, result)
+        rdc_async.runner().submit_blocking(rdc_preview.cached, path, on_result=on_cached,
+                                           on_error=lambda e: self._on_preview(path, e))
+
+    def _on_preview(self, path: str, result):
+        if isinstance(result, BaseException):
+            if path == self._preview_path:
+                self.preview_image.setText("No preview")
+                self.preview_meta.setText(f"{os.path.basename(path)}\n⚠ {result}")
+            return
+        px = None
+        if result.image:
+            px = QPixmap()
+            if not px.loadFromData(result.image):
+                px = None
+        self._previews[path] = (result, px)
+        while len(self._previews) > self.PREVIEW_MEMORY:
+            self._previews.pop(next(iter(self._previews)))
+        if path == self._preview_path:
+            self._render_preview(path, result, px)
+
+    def _render_preview(self, path: str, result, px):
+        if px is not None:
+            self.preview_image.setPixmap(px.scaled(
+                self.preview_image.width(), self.preview_image.height(),
+                Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        else:
+            self.preview_image.clear()
+            self.preview_image.setText("No thumbnail")
+        lines = [os.path.basename(path)] + [f"{k}: {v}" for k, v in result.meta.items()]
+        self.preview_meta.setText("\n".join(lines))
+        self.preview_text.setPlainText(result.text)
+        self.preview_text.setVisible(bool(result.text))
+
+    def _prefetch_visible(self):
+        """Queue the files on screen for rendering into the preview cache."""
+        paths = []
+        idx = self.tree.indexAt(self.tree.viewport().rect().topLeft())
+        bottom = self.tree.viewport().height()
+        while idx.isValid() and self.tree.visualRect(idx).top() < bottom:
+            if idx.internalPointer().kind != "dir":
+                path = self.model.filePath(idx)
+                if path not in self._previews:
+                    paths.append(path)
+            idx = self.tree.indexBelow(idx)
+        if paths:
+            rdc_preview.previewer().prefetch(paths)
+
 
 # ── Archive Panel ─────────────────────────────────────────────────────────────
 class ArchivePanel(QWidget):
@@ -228,25 +797,27 @@ class ArchivePanel(QWidget):
 
     def _run(self):
         folder = self.folder_edit.text()
-        if not folder or not os.path.isdir(folder):
+        if not folder or not (rdc_storage.is_remote(folder) or os.path.isdir(folder)):
             self.log_view.append("⚠ Invalid folder.")
             return
         self.run_btn.setEnabled(False)
         self.progress.setVisible(True)
         self.log_view.clear()
         dry = self.dry_run_cb.isChecked()
+        runner = rdc_async.runner()
 
-        signals = WorkerSignals()
-        signals.log.connect(self.log_view.append)
-        signals.done.connect(self._on_done)
-
-        def worker():
-            run_archive(folder, dry_run=dry, log_callback=signals.log.emit)
+        async def job():
+            await runner.run_blocking(run_archive, folder, dry_run=dry,
+                                      log_callback=runner.ui_callback(self.log_view.append),
+                                      ignore=self.settings.get("ignore_rules", []))
             desc = f"Archive {'(dry)' if dry else ''}: {folder}"
             mru.add_operation(desc)
-            signals.done.emit()
 
-        threading.Thread(target=worker, daemon=True).start()
+        runner.submit(job(), on_result=lambda _: self._on_done(), on_error=self._on_error)
+
+    def _on_error(self, e):
+        self.log_view.append(f"❌ Error: {e}")
+        self._on_done()
 
     def _on_done(self):
         self.run_btn.setEnabled(True)
@@ -276,9 +847,16 @@ class TrainingPanel(QWidget):
         self.dry_cb = QCheckBox("Dry run")
         layout.addWidget(self.dry_cb)
 
+        row = QHBoxLayout()
         self.sync_btn = QPushButton("🔄  Sync Training Files")
         self.sync_btn.clicked.connect(self._run)
-        layout.addWidget(self.sync_btn)
+        row.addWidget(self.sync_btn)
+        self.export_btn = QPushButton("📦  Export Dataset")
+        self.export_btn.setToolTip("Extract text from the synced files into compressed JSONL / Parquet "
+                                   "shards (only changed documents are re-extracted)")
+        self.export_btn.clicked.connect(self._export)
+        row.addWidget(self.export_btn)
+        layout.addLayout(row)
 
         self.progress = QProgressBar()
         self.progress.setRange(0, 0)
@@ -304,33 +882,57 @@ class TrainingPanel(QWidget):
 
     def _run(self):
         folder = self.folder_edit.text()
-        if not folder or not os.path.isdir(folder):
+        if not folder or not (rdc_storage.is_remote(folder) or os.path.isdir(folder)):
             self.log_view.append("⚠ Invalid folder.")
             return
         self.sync_btn.setEnabled(False)
         self.progress.setVisible(True)
         self.log_view.clear()
         dry = self.dry_cb.isChecked()
-        signals = WorkerSignals()
-        signals.log.connect(self.log_view.append)
-        signals.result.connect(self._on_result)
-        signals.done.connect(self._on_done)
-
-        def worker():
-            added, removed, manifest = run_sync(folder, dry_run=dry,
-                                                log_callback=signals.log.emit)
-            signals.result.emit(manifest)
+        runner = rdc_async.runner()
+
+        async def job():
+            added, removed, manifest = await runner.run_blocking(
+                run_sync, folder, dry_run=dry,
+                log_callback=runner.ui_callback(self.log_view.append),
+                ignore=self.settings.get("ignore_rules", []))
             mru.add_operation(f"TrainingSync {'(dry)' if dry else ''}: +{added} -{removed}")
-            signals.done.emit()
+            return manifest
+
+        runner.submit(job(), on_result=self._on_result, on_error=self._on_error)
+
+    def _export(self):
+        folder = self.folder_edit.text()
+        if not folder or not os.path.isdir(folder):
+            self.log_view.append("⚠ Invalid folder.")
+            return
+        self.sync_btn.setEnabled(False)
+        self.export_btn.setEnabled(False)
+        self.progress.setVisible(True)
+        self.log_view.clear()
+        runner = rdc_async.runner()
 
-        threading.Thread(target=worker, daemon=True).start()
+        async def job():
+            out = await runner.run_blocking(
+                run_export, folder, fmt=self.settings.get("export_format", "jsonl"),
+                shard_bytes=int(self.settings.get("export_shard_mb", 64)) * 1024 * 1024,
+                log_callback=runner.ui_callback(self.log_view.append))
+            mru.add_operation(f"DatasetExport: {out['written']} docs → {out['rewritten']} shards")
+
+        runner.submit(job(), on_result=lambda _: self._on_done(), on_error=self._on_error)
 
     def _on_result(self, manifest):
         self._manifest = manifest
         self.manifest_view.setPlainText("\n".join(manifest))
+        self._on_done()
+
+    def _on_error(self, e):
+        self.log_view.append(f"❌ Error: {e}")
+        self._on_done()
 
     def _on_done(self):
         self.sync_btn.setEnabled(True)
+        self.export_btn.setEnabled(True)
         self.progress.setVisible(False)
 
     def _copy_manifest(self):
@@ -342,6 +944,7 @@ class AIToolsPanel(QWidget):
     def __init__(self, settings, parent=None):
         super().__init__(parent)
         self.settings = settings
+        self.conv = None            # rdc_chat.Thread on screen (QObject.thread() is Qt's)
         layout = QVBoxLayout(self)
 
         lbl = QLabel("AI Tools"); lbl.setObjectName("section_title")
@@ -350,87 +953,377 @@ class AIToolsPanel(QWidget):
         row = QHBoxLayout()
         row.addWidget(QLabel("Model:"))
         self.model_combo = QComboBox()
-        self.model_combo.addItems([
-            "claude-opus-4-5-20251101",
-            "claude-sonnet-4-5-20250929",
-            "claude-haiku-4-5-20251001",
-            "gpt-4o",
-            "gpt-4o-mini",
-            "gemini-1.5-pro",
-            "gemini-1.5-flash",
-        ])
+        self.model_combo.addItems(rdc_ai.MODELS)
+        self.model_combo.currentTextChanged.connect(self._preload_sdk)
         row.addWidget(self.model_combo)
+        self._preloaded = set()
         layout.addLayout(row)
 
-        layout.addWidget(QLabel("System Prompt:"))
+        # Left: thread list
+        left = QWidget()
+        ll = QVBoxLayout(left)
+        ll.setContentsMargins(0, 0, 0, 0)
+        ll.addWidget(QLabel("Conversations:"))
+        self.thread_list = QListWidget()
+        self.thread_list.currentItemChanged.connect(self._on_thread_selected)
+        ll.addWidget(self.thread_list)
+        row_t = QHBoxLayout()
+        btn_new = QPushButton("➕  New")
+        btn_new.clicked.connect(self._new_thread)
+        row_t.addWidget(btn_new)
+        btn_del = QPushButton("🗑  Delete")
+        btn_del.clicked.connect(self._delete_thread)
+        row_t.addWidget(btn_del)
+        ll.addLayout(row_t)
+
+        # Right: prompt, attachments, transcript
+        right = QWidget()
+        rl = QVBoxLayout(right)
+        rl.setContentsMargins(0, 0, 0, 0)
+        rl.addWidget(QLabel("System Prompt:"))
         self.system_edit = QLineEdit("You are an expert regenerative development advisor.")
-        layout.addWidget(self.system_edit)
+        rl.addWidget(self.system_edit)
+
+        rl.addWidget(QLabel("Attachments (drop files here, or drag from Files → Recent):"))
+        self.attach_list = DropFileList(auto_add=False)
+        self.attach_list.setMaximumHeight(80)
+        self.attach_list.files_dropped.connect(self._attach)
+        rl.addWidget(self.attach_list)
+        row_a = QHBoxLayout()
+        btn_attach = QPushButton("📎  Attach…")
+        btn_attach.clicked.connect(self._browse_attach)
+        row_a.addWidget(btn_attach)
+        btn_detach = QPushButton("✕  Remove")
+        btn_detach.clicked.connect(self._detach)
+        row_a.addWidget(btn_detach)
+        row_a.addStretch()
+        rl.addLayout(row_a)
+        self._attachments = {}      # path -> Future[str] from rdc_extract
+
+        rl.addWidget(QLabel("Conversation:"))
+        self.response_view = QTextEdit()
+        self.response_view.setReadOnly(True)
+        rl.addWidget(self.response_view)
 
-        layout.addWidget(QLabel("Message:"))
+        rl.addWidget(QLabel("Message:"))
         self.msg_edit = QTextEdit()
         self.msg_edit.setMaximumHeight(100)
-        layout.addWidget(self.msg_edit)
+        rl.addWidget(self.msg_edit)
 
+        row_s = QHBoxLayout()
         self.send_btn = QPushButton("🤖  Send")
         self.send_btn.clicked.connect(self._send)
-        layout.addWidget(self.send_btn)
+        row_s.addWidget(self.send_btn)
+        self.stop_btn = QPushButton("■  Stop")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self._stop)
+        row_s.addWidget(self.stop_btn)
+        self.longdoc_chk = QCheckBox("Long-document mode")
+        self.longdoc_chk.setToolTip("Split attachments that exceed the model context into chunks, "
+                                    "ask each chunk in parallel and combine the answers")
+        row_s.addWidget(self.longdoc_chk)
+        self.usage_label = QLabel("")
+        row_s.addWidget(self.usage_label)
+        row_s.addStretch()
+        rl.addLayout(row_s)
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        rl.addWidget(self.progress)
+        self._job = None            # rdc_async.Job of the send in flight
 
-        layout.addWidget(QLabel("Response:"))
-        self.response_view = QTextEdit()
-        self.response_view.setReadOnly(True)
-        layout.addWidget(self.response_view)
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        splitter.addWidget(left)
+        splitter.addWidget(right)
+        splitter.setSizes([220, 680])
+        layout.addWidget(splitter)
 
+        self._refresh_threads()
+        if self.thread_list.count():
+            self.thread_list.setCurrentRow(0)
+        else:
+            self._new_thread()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._preload_sdk(self.model_combo.currentText())
+
+    def _preload_sdk(self, model: str):
+        # SDKs are not imported at startup; warm the selected one while the user types
+        provider = rdc_ai.provider_for(model)
+        if provider not in self._preloaded and self.isVisible():
+            self._preloaded.add(provider)
+            rdc_async.runner().submit_blocking(rdc_ai.preload, provider)
+
+    # ── Threads ──────────────────────────────────────────────────────────────
+    def _refresh_threads(self, select: str = None):
+        self.thread_list.blockSignals(True)
+        self.thread_list.clear()
+        for tid, title, _ in rdc_chat.list_threads():
+            item = QListWidgetItem(title)
+            item.setData(Qt.ItemDataRole.UserRole, tid)
+            self.thread_list.addItem(item)
+            if tid == select:
+                self.thread_list.setCurrentItem(item)
+        self.thread_list.blockSignals(False)
+
+    def _new_thread(self):
+        self._stash_thread()
+        self.conv = rdc_chat.Thread(self.model_combo.currentText(), self.system_edit.text())
+        self.thread_list.clearSelection()
+        self._show_thread()
+
+    def _delete_thread(self):
+        item = self.thread_list.currentItem()
+        if item is None:
+            return
+        rdc_chat.delete_thread(item.data(Qt.ItemDataRole.UserRole))
+        self.conv = None
+        self._refresh_threads()
+        if self.thread_list.count():
+            self.thread_list.setCurrentRow(0)
+        else:
+            self._new_thread()
+
+    def _on_thread_selected(self, item, _previous=None):
+        if item is None:
+            return
+        self._stash_thread()
+        t = rdc_chat.load_thread(item.data(Qt.ItemDataRole.UserRole))
+        if t is None:
+            return
+        self.conv = t
+        if t.model:
+            self.model_combo.setCurrentText(t.model)
+        self.system_edit.setText(t.system)
+        self._show_thread()
+
+    def _stash_thread(self):
+        """Keep edits to the current thread's settings (saved only once it has messages)."""
+        t = self.conv
+        if t is None:
+            return
+        t.model = self.model_combo.currentText()
+        t.system = self.system_edit.text()
+        t.documents = list(self._attachments)
+        if t.messages:
+            t.save()
+
+    def _show_thread(self):
+        self.attach_list.clear()
+        self._attachments = {}
+        self._attach(self.conv.documents)
+        self._render()
+
+    def _render(self):
+        parts = []
+        for m in self.conv.messages:
+            who = "You" if m["role"] == "user" else m.get("model", "Assistant")
+            parts.append(f"── {who} ──\n{m['content']}")
+        self.response_view.setPlainText("\n\n".join(parts))
+        self.response_view.verticalScrollBar().setValue(self.response_view.verticalScrollBar().maximum())
+        self._show_usage()
+
+    def _show_usage(self):
+        last, total = self.conv.last_usage(), self.conv.usage()
+        if not total.input_tokens:
+            self.usage_label.setText("")
+            return
+        pct = 100 * last.cached_tokens / last.input_tokens if last.input_tokens else 0
+        self.usage_label.setText(
+            f"Last turn: {last.input_tokens:,} in ({last.cached_tokens:,} cached, {pct:.0f}%) · "
+            f"{last.output_tokens:,} out   |   Thread: {total.input_tokens:,} in "
+            f"({total.cached_tokens:,} cached) · {total.output_tokens:,} out")
+
+    # ── Attachments ──────────────────────────────────────────────────────────
+    def _browse_attach(self):
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Attach Documents", self.settings.get("rdc2_root", ""),
+            "Documents (" + " ".join(f"*{e}" for e in sorted(rdc_extract.SUPPORTED)) + ")")
+        if files:
+            self._attach(files)
+
+    def _attach(self, paths: list):
+        for p in paths:
+            if p in self._attachments or not os.path.isfile(p):
+                continue
+            item = QListWidgetItem(f"⏳  {os.path.basename(p)}")
+            item.setData(Qt.ItemDataRole.UserRole, p)
+            item.setToolTip(p)
+            self.attach_list.addItem(item)
+            fut = rdc_extract.submit(p)
+            self._attachments[p] = fut
+            fut.add_done_callback(lambda f, p=p: rdc_async.runner().ui(self._on_extracted, (p, f)))
+
+    def _on_extracted(self, payload):
+        path, fut = payload
+        for i in range(self.attach_list.count()):
+            item = self.attach_list.item(i)
+            if self.attach_list.item_path(item) != path:
+                continue
+            name = os.path.basename(path)
+            err = fut.exception()
+            item.setText(f"❌  {name} — {err}" if err else f"📄  {name} — {len(fut.result()):,} chars")
+
+    def _detach(self):
+        for item in self.attach_list.selectedItems():
+            self._attachments.pop(self.attach_list.item_path(item), None)
+            self.attach_list.takeItem(self.attach_list.row(item))
+
+    # ── Sending ──────────────────────────────────────────────────────────────
     def _send(self):
-        model = self.model_combo.currentText()
-        system = self.system_edit.text()
         msg = self.msg_edit.toPlainText().strip()
         if not msg:
             return
+        self._stash_thread()
+        thread = self.conv
+        model, system = thread.model, thread.system
+        thread.add_user(msg)
+        self.msg_edit.clear()
+        self._render()
+        self.response_view.append("\n⏳ Calling API…")
         self.send_btn.setEnabled(False)
-        self.response_view.setPlainText("⏳ Calling API…")
         api_keys = self.settings.get("api_keys", {})
-        signals = WorkerSignals()
-        signals.result.connect(self._on_result)
-        signals.done.connect(lambda: self.send_btn.setEnabled(True))
-
-        def worker():
-            try:
-                response = self._call_api(model, system, msg, api_keys)
-            except Exception as e:
-                response = f"❌ Error: {e}"
-            signals.result.emit(response)
-            signals.done.emit()
-
-        threading.Thread(target=worker, daemon=True).start()
-
-    def _call_api(self, model: str, system: str, msg: str, keys: dict) -> str:
-        if model.startswith("claude"):
-            import anthropic
-            client = anthropic.Anthropic(api_key=keys.get("anthropic", ""))
-            r = client.messages.create(
-                model=model, max_tokens=2048,
-                system=system,
-                messages=[{"role": "user", "content": msg}]
-            )
-            return r.content[0].text
-        elif model.startswith("gpt"):
-            from openai import OpenAI
-            client = OpenAI(api_key=keys.get("openai", ""))
-            r = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "system", "content": system},
-                           {"role": "user", "content": msg}]
-            )
-            return r.choices[0].message.content
-        elif model.startswith("gemini"):
-            import google.generativeai as genai
-            genai.configure(api_key=keys.get("google", ""))
-            m = genai.GenerativeModel(model, system_instruction=system)
-            return m.generate_content(msg).text
-        return "Unknown model."
-
-    def _on_result(self, text: str):
-        self.response_view.setPlainText(text)
+        attachments = dict(self._attachments)
+        history = thread.history()
+        long_mode = self.longdoc_chk.isChecked()
+        use_uploads = self.settings.get("upload_attachments", True)
+        rdc_ai.configure(self.settings.get("api_base_urls", {}))
+        runner = rdc_async.runner()
+        log = runner.ui_callback(self.response_view.append)
+
+        async def job():
+            with metrics.timer("ai.send"):
+                return await send()
+
+        async def send():
+            # Waits only for extractions still running; cached ones are done
+            paths = []
+            for p, f in attachments.items():
+                try:
+                    paths.append((p, await asyncio.wrap_future(f)))
+                except Exception:
+                    continue
+            docs = [(os.path.basename(p), text) for p, text in paths]
+            if long_mode and docs and rdc_longdoc.needs_chunking(model, system, docs, history):
+                return await rdc_longdoc.arun(
+                    model, system, msg, docs, api_keys,
+                    on_progress=runner.ui_callback(lambda d, n, stage: self._on_progress(d, n)),
+                    on_partial=lambda i, label, text: log(f"\n── {label} ──\n{text}"))
+            if use_uploads:
+                return await rdc_uploads.acomplete(model, system, history, api_keys, documents=paths, log=log)
+            return await rdc_ai.acomplete(model, system, history, api_keys, documents=docs)
+
+        timeout = None if long_mode else self.settings.get("api_timeout", 180)
+        self._job = runner.submit(job(), timeout=timeout,
+                                  on_result=lambda r: self._on_result((thread, model, r)),
+                                  on_error=lambda e: self._on_result((thread, model, e)))
+        self.stop_btn.setEnabled(True)
+
+    def _stop(self):
+        if self._job is not None:
+            self._job.cancel()
+        self.stop_btn.setEnabled(False)
+
+    def _on_progress(self, done: int, total: int):
+        self.progress.setVisible(True)
+        self.progress.setMaximum(max(total, 1))
+        self.progress.setValue(done)
+
+    def _on_send_done(self):
+        self.send_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.progress.setVisible(False)
+        self._job = None
+
+    def _on_result(self, payload):
+        thread, model, result = payload
+        self._on_send_done()
+        if isinstance(result, BaseException):
+            if isinstance(result, asyncio.CancelledError):
+                result = "stopped"
+            elif isinstance(result, asyncio.TimeoutError):
+                result = f"no reply within {self.settings.get('api_timeout', 180)} s"
+            # Drop the unanswered turn so the history stays user/assistant alternating
+            text = thread.messages.pop()["content"]
+            if thread is self.conv:
+                self._render()
+                self.response_view.append(f"\n❌ Error: {result}")
+                if not self.msg_edit.toPlainText().strip():
+                    self.msg_edit.setPlainText(text)
+            return
+        thread.add_reply(result, model)
+        thread.save()
+        self._refresh_threads(select=self.conv.id if self.conv else None)
+        if thread is self.conv:
+            self._render()
+
+
+# ── Storage Panel ─────────────────────────────────────────────────────────────
+class StoragePanel(QWidget):
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self._job = None
+        layout = QVBoxLayout(self)
+
+        lbl = QLabel("Storage"); lbl.setObjectName("section_title")
+        layout.addWidget(lbl)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Root:"))
+        self.root_combo = QComboBox()
+        self.root_combo.setEditable(True)
+        self.root_combo.setMinimumWidth(320)
+        row.addWidget(self.root_combo, 1)
+        self.rescan_cb = QCheckBox("Rescan first")
+        row.addWidget(self.rescan_cb)
+        self.run_btn = QPushButton("📊  Analyze")
+        self.run_btn.clicked.connect(self._run)
+        row.addWidget(self.run_btn)
+        layout.addLayout(row)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)
+        self.progress.setVisible(False)
+        layout.addWidget(self.progress)
+
+        self.report_view = QTextEdit()
+        self.report_view.setReadOnly(True)
+        self.report_view.setFont(QFont("Consolas, Menlo, monospace", 10))
+        self.report_view.setPlaceholderText("Space and file count per folder, _archive/, document type and "
+                                            "extension, version pile-ups and growth — from the scan index.")
+        layout.addWidget(self.report_view)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        current = self.root_combo.currentText()
+        self.root_combo.clear()
+        self.root_combo.addItems(mru.roots(self.settings))
+        if current:
+            self.root_combo.setCurrentText(current)
+        if not self.report_view.toPlainText() and self.root_combo.currentText():
+            self._run()
+
+    def _run(self):
+        root = self.root_combo.currentText().strip()
+        if not root or not os.path.isdir(root):
+            self.report_view.setPlainText("⚠ Invalid folder.")
+            return
+        if self._job is not None and not self._job.done():
+            return
+        self.run_btn.setEnabled(False)
+        self.progress.setVisible(True)
+        lines = []
+        self._job = rdc_async.runner().submit_blocking(
+            rdc_stats.run_stats, root, rescan=self.rescan_cb.isChecked(),
+            ignore=self.settings.get("ignore_rules", []), log_callback=lines.append,
+            on_result=lambda _: self._on_done("\n".join(lines)),
+            on_error=lambda e: self._on_done(f"❌ Error: {e}"))
+
+    def _on_done(self, text: str):
+        self.report_view.setPlainText(text)
+        self.run_btn.setEnabled(True)
+        self.progress.setVisible(False)
 
 
 # ── Settings Panel ────────────────────────────────────────────────────────────
@@ -454,6 +1347,12 @@ class SettingsPanel(QWidget):
         btn_b.clicked.connect(self._browse_root)
         row.addWidget(btn_b)
         layout.addLayout(row)
+        layout.addWidget(QLabel("Other roots, one per line (the rdc command runs on all of them):"))
+        self.roots_edit = QTextEdit()
+        self.roots_edit.setMaximumHeight(60)
+        self.roots_edit.setPlainText("\n".join(mru.roots(settings)[1:] if settings.get("rdc2_root")
+                                               else mru.roots(settings)))
+        layout.addWidget(self.roots_edit)
 
         # API Keys
         lbl2 = QLabel("API Keys"); lbl2.setObjectName("section_title")
@@ -475,6 +1374,19 @@ class SettingsPanel(QWidget):
         self.google_key.setEchoMode(QLineEdit.EchoMode.Password)
         layout.addWidget(self.google_key)
 
+        self.upload_cb = QCheckBox("Upload attachments once and reuse the provider file ID")
+        self.upload_cb.setChecked(settings.get("upload_attachments", True))
+        layout.addWidget(self.upload_cb)
+
+        # Ignore rules
+        lbl_ign = QLabel("Ignore Rules"); lbl_ign.setObjectName("section_title")
+        layout.addWidget(lbl_ign)
+        layout.addWidget(QLabel("One per line, .gitignore syntax (e.g.  *.mp4   /98 - Code/):"))
+        self.ignore_edit = QTextEdit()
+        self.ignore_edit.setMaximumHeight(80)
+        self.ignore_edit.setPlainText("\n".join(settings.get("ignore_rules", [])))
+        layout.addWidget(self.ignore_edit)
+
         btn_save = QPushButton("💾  Save Settings")
         btn_save.clicked.connect(self._save)
         layout.addWidget(btn_save)
@@ -482,9 +1394,37 @@ class SettingsPanel(QWidget):
         lbl3 = QLabel("Tools"); lbl3.setObjectName("section_title")
         layout.addWidget(lbl3)
 
-        btn_scaffold = QPushButton("🏗  Build / Rebuild RDC2 Folder Structure")
-        btn_scaffold.clicked.connect(self._scaffold)
-        layout.addWidget(btn_scaffold)
+        layout.addWidget(QLabel("Scaffold Template (blank = built-in RDC2):"))
+        row_t = QHBoxLayout()
+        self.template_edit = QLineEdit(settings.get("scaffold_template", ""))
+        row_t.addWidget(self.template_edit)
+        btn_t = QPushButton("Browse…")
+        btn_t.clicked.connect(self._browse_template)
+        row_t.addWidget(btn_t)
+        layout.addLayout(row_t)
+
+        row_s = QHBoxLayout()
+        self.btn_scaffold = QPushButton("🏗  Build / Rebuild RDC2 Folder Structure")
+        self.btn_scaffold.clicked.connect(lambda: self._scaffold(verify=False))
+        row_s.addWidget(self.btn_scaffold)
+        self.btn_verify = QPushButton("🔍  Verify Structure")
+        self.btn_verify.clicked.connect(lambda: self._scaffold(verify=True))
+        row_s.addWidget(self.btn_verify)
+        layout.addLayout(row_s)
+
+        lbl_m = QLabel("Maintenance"); lbl_m.setObjectName("section_title")
+        layout.addWidget(lbl_m)
+        self.schedule_cb = QCheckBox("Run archive / sync / dedupe / index rebuild off-peak "
+                                     "(time windows or when idle) while the dashboard is running")
+        self.schedule_cb.setChecked(settings.get("schedule_enabled", False))
+        layout.addWidget(self.schedule_cb)
+        self.battery_cb = QCheckBox("Also run on battery power")
+        self.battery_cb.setChecked(settings.get("schedule_on_battery", False))
+        layout.addWidget(self.battery_cb)
+        self.schedule_status = QLabel("")
+        self.schedule_status.setFont(QFont("Consolas, Menlo, monospace", 9))
+        self.schedule_status.setWordWrap(True)
+        layout.addWidget(self.schedule_status)
 
         btn_clear_mru = QPushButton("🗑  Clear MRU History")
         btn_clear_mru.clicked.connect(self._clear_mru)
@@ -494,37 +1434,251 @@ class SettingsPanel(QWidget):
         layout.addWidget(self.status)
         layout.addStretch()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_schedule()
+
+    def refresh_schedule(self):
+        state = rdc_scheduler.ScheduleState()
+        self.schedule_status.setText(
+            "\n".join(rdc_scheduler.Scheduler(self.settings, state).status())
+            + f"\nTimes and intervals: \"schedule\" in settings.json · log: "
+              f"{mru.config_dir() / 'maintenance.log'}")
+
     def _browse_root(self):
         d = QFileDialog.getExistingDirectory(self, "Select RDC2 Root", self.root_edit.text())
         if d:
             self.root_edit.setText(d)
 
+    def _browse_template(self):
+        f, _ = QFileDialog.getOpenFileName(self, "Select Scaffold Template", self.template_edit.text(),
+                                           "Templates (*.json *.yaml *.yml)")
+        if f:
+            self.template_edit.setText(f)
+
     def _save(self):
         self.settings["rdc2_root"] = self.root_edit.text()
+        self.settings["roots"] = mru.roots({
+            "rdc2_root": self.settings["rdc2_root"],
+            "roots": [l.strip() for l in self.roots_edit.toPlainText().splitlines()],
+        })
+        self.settings["scaffold_template"] = self.template_edit.text()
         self.settings["api_keys"] = {
             "anthropic": self.anthropic_key.text(),
             "openai":    self.openai_key.text(),
             "google":    self.google_key.text(),
         }
+        self.settings["upload_attachments"] = self.upload_cb.isChecked()
+        self.settings["schedule_enabled"] = self.schedule_cb.isChecked()
+        self.settings["schedule_on_battery"] = self.battery_cb.isChecked()
+        self.settings["ignore_rules"] = [
+            l for l in self.ignore_edit.toPlainText().splitlines() if l.strip()
+        ]
         mru.save_settings(self.settings)
         self.settings_changed.emit(self.settings)
         self.status.setText("✅ Settings saved.")
 
-    def _scaffold(self):
+    def _scaffold(self, verify: bool = False):
         root = self.root_edit.text()
         if not root:
             self.status.setText("⚠ Set RDC2 root first.")
             return
-        self.status.setText("⏳ Building scaffold…")
-        QApplication.processEvents()
-        n = run_scaffold(root)
-        self.status.setText(f"✅ Scaffold built: {n} folders.")
+        template = self.template_edit.text() or None
+        self.btn_scaffold.setEnabled(False)
+        self.btn_verify.setEnabled(False)
+        self.status.setText("⏳ Verifying scaffold…" if verify else "⏳ Building scaffold…")
+
+        def work():
+            if verify:
+                drift = verify_scaffold(root, log=lambda _: None, template=template)
+                n = sum(len(v) for v in drift.values())
+                lines = [f"MISSING {r}" for r in drift["missing"]] + \
+                        [f"EXTRA {r}" for r in drift["extra"]] + \
+                        [f"NO README {r}" for r in drift["missing_readme"]]
+                return "✅ No drift from template." if not n else \
+                    f"⚠ {n} differences:\n" + "\n".join(lines[:15]) + \
+                    ("\n…" if len(lines) > 15 else "")
+            n = run_scaffold(root, log=lambda _: None, template=template)
+            return f"✅ Scaffold built: {n} folders created."
+
+        rdc_async.runner().submit_blocking(
+            work, on_result=self._on_scaffold_result,
+            on_error=lambda e: self._on_scaffold_result(f"❌ Scaffold error: {e}"))
+
+    def _on_scaffold_result(self, msg: str):
+        self.status.setText(msg)
+        self.btn_scaffold.setEnabled(True)
+        self.btn_verify.setEnabled(True)
 
     def _clear_mru(self):
         mru.clear_mru()
         self.status.setText("✅ MRU cleared.")
 
 
+# ── Diagnostics Panel ─────────────────────────────────────────────────────────
+class DiagnosticsPanel(QWidget):
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        layout = QVBoxLayout(self)
+
+        lbl = QLabel("Diagnostics"); lbl.setObjectName("section_title")
+        layout.addWidget(lbl)
+
+        tabs = QTabWidget()
+        layout.addWidget(tabs)
+
+        # Phases tab — rdc_metrics timers and counters
+        phases = QWidget()
+        pl = QVBoxLayout(phases)
+        self.enable_cb = QCheckBox("Collect timings and counters (scan / parse / move / copy / API)")
+        self.enable_cb.setChecked(metrics.enabled())
+        self.enable_cb.toggled.connect(self._toggle)
+        pl.addWidget(self.enable_cb)
+
+        self.table = QTextEdit()
+        self.table.setReadOnly(True)
+        self.table.setFont(QFont("Consolas, Menlo, monospace", 10))
+        pl.addWidget(self.table)
+
+        row = QHBoxLayout()
+        btn_refresh = QPushButton("🔄  Refresh")
+        btn_refresh.clicked.connect(self._refresh)
+        row.addWidget(btn_refresh)
+        btn_reset = QPushButton("🗑  Reset")
+        btn_reset.clicked.connect(self._reset)
+        row.addWidget(btn_reset)
+        btn_write = QPushButton("💾  Write metrics.json / .prom")
+        btn_write.clicked.connect(self._write)
+        row.addWidget(btn_write)
+        row.addStretch()
+        pl.addLayout(row)
+        tabs.addTab(phases, "Phases")
+
+        # AI Requests tab — rdc_telemetry store
+        calls = QWidget()
+        cl = QVBoxLayout(calls)
+        self.telemetry_cb = QCheckBox("Record every AI request (model, latency, tokens, cache hits) locally")
+        self.telemetry_cb.setChecked(self.settings.get("telemetry_enabled", True))
+        self.telemetry_cb.toggled.connect(self._toggle_telemetry)
+        cl.addWidget(self.telemetry_cb)
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Period:"))
+        self.period_combo = QComboBox()
+        for label, days in (("Last 24 hours", 1), ("Last 7 days", 7), ("Last 30 days", 30), ("All time", 0)):
+            self.period_combo.addItem(label, days)
+        self.period_combo.setCurrentIndex(1)
+        self.period_combo.currentIndexChanged.connect(self._refresh_calls)
+        row.addWidget(self.period_combo)
+        row.addSpacing(16)
+        row.addWidget(QLabel("Histogram:"))
+        self.hist_combo = QComboBox()
+        for label, col in (("Latency (ms)", "latency_ms"), ("Time to first token (ms)", "ttft_ms"),
+                           ("Input tokens", "input_tokens"), ("Output tokens", "output_tokens")):
+            self.hist_combo.addItem(label, col)
+        self.hist_combo.currentIndexChanged.connect(self._refresh_calls)
+        row.addWidget(self.hist_combo)
+        self.hist_model = QComboBox()
+        self.hist_model.addItem("All models", None)
+        self.hist_model.currentIndexChanged.connect(self._refresh_calls)
+        row.addWidget(self.hist_model)
+        row.addStretch()
+        cl.addLayout(row)
+
+        self.calls_table = QTextEdit()
+        self.calls_table.setReadOnly(True)
+        self.calls_table.setFont(QFont("Consolas, Menlo, monospace", 10))
+        cl.addWidget(self.calls_table)
+
+        row = QHBoxLayout()
+        btn_calls = QPushButton("🔄  Refresh")
+        btn_calls.clicked.connect(self._refresh_calls)
+        row.addWidget(btn_calls)
+        btn_csv = QPushButton("📄  Export CSV…")
+        btn_csv.clicked.connect(self._export_csv)
+        row.addWidget(btn_csv)
+        row.addStretch()
+        cl.addLayout(row)
+        tabs.addTab(calls, "AI Requests")
+        tabs.currentChanged.connect(lambda i: i == 1 and self._refresh_calls())
+
+        self.status = QLabel("")
+        layout.addWidget(self.status)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(2000)
+        self._timer.timeout.connect(self._refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def _toggle(self, on: bool):
+        metrics.enable(on)
+        self.settings["metrics_enabled"] = on
+        mru.save_settings(self.settings)
+        self._refresh()
+
+    def _toggle_telemetry(self, on: bool):
+        rdc_telemetry.enable(on)
+        self.settings["telemetry_enabled"] = on
+        mru.save_settings(self.settings)
+
+    def _refresh(self):
+        snap = metrics.snapshot()
+        if not metrics.enabled() and not snap["timers"] and not snap["counters"]:
+            self.table.setPlainText("Metrics are off. Tick the box above, then run an archive, "
+                                    "sync or AI request.")
+            return
+        self.table.setPlainText(metrics.format_table(snap))
+
+    def _reset(self):
+        metrics.reset()
+        self._refresh()
+
+    def _write(self):
+        was = metrics.enabled()
+        metrics.enable(True)
+        path = metrics.flush()
+        metrics.enable(was)
+        self.status.setText(f"✅ Written: {path} (+ metrics.prom)")
+
+    def _refresh_calls(self):
+        days = self.period_combo.currentData()
+        rows = rdc_telemetry.summary(days)
+        models = [r["model"] for r in rows]
+        current = self.hist_model.currentData()
+        if models != [self.hist_model.itemData(i) for i in range(1, self.hist_model.count())]:
+            self.hist_model.blockSignals(True)
+            self.hist_model.clear()
+            self.hist_model.addItem("All models", None)
+            for m in models:
+                self.hist_model.addItem(m, m)
+            self.hist_model.setCurrentIndex(max(0, self.hist_model.findData(current)))
+            self.hist_model.blockSignals(False)
+        if not rows:
+            self.calls_table.setPlainText("No AI requests recorded in this period.")
+            return
+        hist = rdc_telemetry.histogram(self.hist_combo.currentData(), self.hist_model.currentData(), days)
+        self.calls_table.setPlainText(
+            f"{rdc_telemetry.format_summary(rows)}\n\n"
+            f"{self.hist_combo.currentText()} — {self.hist_model.currentText()}\n"
+            f"{rdc_telemetry.format_histogram(hist)}")
+
+    def _export_csv(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export AI request telemetry",
+                                              str(Path.home() / "rdc-ai-requests.csv"), "CSV (*.csv)")
+        if not path:
+            return
+        n = rdc_telemetry.export_csv(path, self.period_combo.currentData())
+        self.status.setText(f"✅ Exported {n:,} requests → {path}")
+
+
 # ── Main Window ───────────────────────────────────────────────────────────────
 class MainWindow(QMainWindow):
     def __init__(self, settings: dict):
@@ -558,7 +1712,9 @@ class MainWindow(QMainWindow):
             ("🗄  Archive",   ArchivePanel(settings)),
             ("🧠  Training",  TrainingPanel(settings)),
             ("🤖  AI Tools",  AIToolsPanel(settings)),
+            ("📊  Storage",   StoragePanel(settings)),
             ("⚙  Settings",  SettingsPanel(settings)),
+            ("🩺  Diagnostics", DiagnosticsPanel(settings)),
         ]
         self.nav_buttons = []
         for i, (label, panel) in enumerate(self.panels):
@@ -575,12 +1731,21 @@ class MainWindow(QMainWindow):
         root_layout.addWidget(self.stack)
 
         # Wire settings changes
-        self.panels[4][1].settings_changed.connect(self._on_settings_changed)
+        self.settings_panel = self.panels[5][1]
+        self.settings_panel.settings_changed.connect(self._on_settings_changed)
 
         # Tray
         self._setup_tray()
         self._switch(0)
 
+        # Off-peak maintenance (archive / sync / dedupe / index) while running or in the tray
+        self.scheduler = rdc_scheduler.Scheduler(settings)
+        self._maint_job = None
+        self._maint_timer = QTimer(self)
+        self._maint_timer.setInterval(60_000)
+        self._maint_timer.timeout.connect(self._maintenance_tick)
+        self._maint_timer.start()
+
     def _switch(self, idx: int):
         self.stack.setCurrentIndex(idx)
         for i, btn in enumerate(self.nav_buttons):
@@ -608,6 +1773,9 @@ class MainWindow(QMainWindow):
             a.triggered.connect(lambda checked, idx=i: self._show_panel(idx))
             menu.addAction(a)
         menu.addSeparator()
+        menu.addAction(QAction("Run maintenance now", self,
+                               triggered=lambda: self._maintenance_tick(force=True)))
+        menu.addSeparator()
         menu.addAction(QAction("Quit", self, triggered=QApplication.quit))
         self.tray.setContextMenu(menu)
         self.tray.activated.connect(
@@ -615,6 +1783,27 @@ class MainWindow(QMainWindow):
         )
         self.tray.show()
 
+    def _maintenance_tick(self, force: bool = False):
+        if self._maint_job is not None and not self._maint_job.done():
+            return
+        due = self.scheduler.due(force=force)
+        if not due:
+            return
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(rdc_scheduler.worker(), self.scheduler.run_due, due)
+
+        self._maint_job = rdc_async.runner().submit(run(), on_result=self._on_maintenance,
+                                                    on_error=lambda e: self._on_maintenance([("maintenance", False, str(e))]))
+
+    def _on_maintenance(self, results):
+        failed = [f"{job}: {summary}" for job, ok, summary in results if not ok]
+        if failed:
+            self.tray.showMessage("RDC maintenance", "\n".join(failed)[:300],
+                                  QSystemTrayIcon.MessageIcon.Warning, 8000)
+        self.settings_panel.refresh_schedule()
+
     def _show_panel(self, idx: int):
         self.show()
         self.raise_()
@@ -633,26 +1822,56 @@ class MainWindow(QMainWindow):
 
 
 # ── Entry Point ───────────────────────────────────────────────────────────────
+def _startup_probe(path: str, t_main: float, app):
+    """Append one JSON line of startup timings to `path`, then quit."""
+    now = time.perf_counter()
+    rec = {"wall": time.time(), "imports_s": round(t_main - _T0, 4),
+           "main_to_window_s": round(now - t_main, 4), "window_s": round(now - _T0, 4),
+           "modules": len(sys.modules), "frozen": bool(getattr(sys, "frozen", False))}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec) + "\n")
+    app.quit()
+
+
 def main():
+    t_main = time.perf_counter()
     parser = argparse.ArgumentParser()
     parser.add_argument("--tray", action="store_true", help="Start minimised to tray")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run under cProfile; the profile is saved to the config dir on exit")
     args = parser.parse_args()
 
     app = QApplication(sys.argv)
     app.setApplicationName("RDC Dashboard")
     app.setStyleSheet(DARK_QSS)
     app.setQuitOnLastWindowClosed(False)
+    runner = rdc_async.start(app)
 
     settings = mru.load_settings()
+    metrics.enable(settings.get("metrics_enabled", False))
+    rdc_telemetry.enable(settings.get("telemetry_enabled", True))
     window = MainWindow(settings)
 
     if not args.tray:
         window.show()
-
-    exit_code = app.exec()
+    probe = os.environ.get("RDC_STARTUP_PROBE")
+    if probe:
+        # First turn of the event loop: the window (or tray icon) is up
+        QTimer.singleShot(0, lambda: _startup_probe(probe, t_main, app))
+
+    if args.profile:
+        with metrics.profiled("dashboard"):
+            exit_code = runner.exec(app)
+    else:
+        exit_code = runner.exec(app)
+    metrics.flush()
     window.save_geometry()
+    rdc_scheduler.shutdown()
+    rdc_preview.shutdown()
+    runner.shutdown()
     sys.exit(exit_code)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()        # dataset export workers in the frozen build
     main()
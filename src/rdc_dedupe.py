@@ -0,0 +1,120 @@
+"""
+rdc_dedupe.py — Exact duplicate finder
+Finds byte-identical files under a root. Candidates come from the scan
+index (files grouped by size, no extra stat calls); only sizes shared by
+two or more files are read — first the leading 64 KB, then a full SHA-256
+for files still tied. _archive/ folders are skipped unless asked for.
+
+Nothing is deleted: groups are returned biggest waste first and written
+to _duplicates.txt at the root for someone to review.
+
+CLI:  python rdc_dedupe.py "C:/RDC2" [--dry-run] [--min-size 1024] [--include-archive]
+"""
+import os
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import rdc_index
+import rdc_metrics as metrics
+
+HEAD_BYTES = 64 * 1024
+CHUNK = 1024 * 1024
+MAX_WORKERS = 4
+REPORT_NAME = "_duplicates.txt"
+
+
+def _digest(path: str, limit: int = None) -> str:
+    h = hashlib.sha256()
+    left = limit
+    try:
+        with open(path, "rb") as f:
+            while left is None or left > 0:
+                block = f.read(CHUNK if left is None else min(CHUNK, left))
+                if not block:
+                    break
+                h.update(block)
+                if left is not None:
+                    left -= len(block)
+    except OSError:
+        return ""           # unreadable files never match
+    return h.hexdigest()
+
+
+def _split(paths: list, pool, limit=None) -> list:
+    """Sub-groups of `paths` with equal digests (singletons dropped)."""
+    groups = {}
+    for p, d in zip(paths, pool.map(lambda p: _digest(p, limit), paths)):
+        if d:
+            groups.setdefault(d, []).append(p)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def find_duplicates(index, min_size: int = 1, include_archive: bool = False, log=None) -> list:
+    """[(size, [absolute paths])] of identical files in a rdc_index.ScanIndex,
+    largest wasted space (size × extra copies) first."""
+    by_size = {}
+    for rel, f in index.iter_files():
+        if f.size < min_size:
+            continue
+        if not include_archive and "_archive" in rel.split("/"):
+            continue
+        by_size.setdefault(f.size, []).append(os.path.join(index.abspath(rel), f.name))
+    candidates = {s: ps for s, ps in by_size.items() if len(ps) > 1}
+    if log:
+        log(f"{sum(len(p) for p in candidates.values())} files share a size with another; hashing…")
+
+    out = []
+    with ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="dedupe") as pool:
+        with metrics.timer("dedupe.hash"):
+            for size, paths in candidates.items():
+                for group in _split(paths, pool, HEAD_BYTES):
+                    out += [(size, sorted(g)) for g in
+                            (_split(group, pool) if size > HEAD_BYTES else [group])]
+    out.sort(key=lambda g: g[0] * (len(g[1]) - 1), reverse=True)
+    metrics.count("dedupe.groups", len(out))
+    return out
+
+
+def run_dedupe(root: str, dry_run: bool = False, log_callback=None, ignore=(),
+               min_size: int = 1, include_archive: bool = False):
+    """Refresh the scan index, find duplicates and write the report. Returns the groups."""
+    log = log_callback or print
+    root = os.path.normpath(os.fspath(root))
+    log(f"{'[DRY RUN] ' if dry_run else ''}Looking for duplicates: {root}\n")
+    with metrics.timer("dedupe.scan"):
+        index = rdc_index.scan(root, previous=rdc_index.load(root), ignore=ignore)
+        index.save()
+    groups = find_duplicates(index, min_size, include_archive, log)
+    wasted = sum(size * (len(paths) - 1) for size, paths in groups)
+    for size, paths in groups[:50]:
+        log(f"  {len(paths)} × {size:,} bytes: {os.path.relpath(paths[0], root)}")
+    if len(groups) > 50:
+        log(f"  … {len(groups) - 50} more groups")
+
+    if not dry_run:
+        with open(Path(root) / REPORT_NAME, "w", encoding="utf-8") as f:
+            f.write(f"RDC duplicate report — {datetime.now():%Y-%m-%d %H:%M}\n")
+            f.write(f"Groups: {len(groups)}   Reclaimable: {wasted:,} bytes\n")
+            for size, paths in groups:
+                f.write(f"\n{len(paths)} × {size:,} bytes\n")
+                f.writelines(f"  {os.path.relpath(p, root)}\n" for p in paths)
+
+    metrics.flush()
+    log(f"\nDone. {len(groups)} duplicate groups, {wasted / 1e6:,.1f} MB reclaimable.")
+    return groups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC exact duplicate finder")
+    parser.add_argument("root", help="Root folder to check")
+    parser.add_argument("--dry-run", action="store_true", help=f"Don't write {REPORT_NAME}")
+    parser.add_argument("--min-size", type=int, default=1, help="Ignore files smaller than this (bytes)")
+    parser.add_argument("--include-archive", action="store_true", help="Also compare files in _archive/")
+    parser.add_argument("--ignore", action="append", default=[],
+                        help="Extra ignore rule (gitignore syntax), repeatable")
+    args = parser.parse_args()
+    run_dedupe(args.root, dry_run=args.dry_run, ignore=args.ignore,
+               min_size=args.min_size, include_archive=args.include_archive)
@@ -0,0 +1,414 @@
+"""
+rdc_export.py — Training dataset exporter
+Turns the synced training set into text shards for fine-tuning and RAG
+pipelines, so they stop re-extracting every deck on every run. Walks the
+sync manifest (00 - _AI-Training/_manifest.txt), extracts and normalizes
+text in a process pool (rdc_extract, cache shared with AI Tools), drops
+near-identical documents (64-bit SimHash, Hamming distance <= 3) and
+streams one record per document into size-bounded shards:
+
+    00 - _AI-Training/_dataset/shard-00000.jsonl.gz     (or .parquet)
+    00 - _AI-Training/_dataset/_shards.json             shard index
+
+Record: {"id", "source", "name", "ext", "mtime", "chars", "simhash", "text"}
+
+Re-exports are incremental: a shard whose documents are all unchanged
+(same path, size and mtime) is kept as is; shards holding a changed or
+removed document are rewritten and new documents go to new shards.
+Memory stays flat — only a bounded window of documents is in flight and
+only per-document metadata (path, key, simhash) is kept.
+
+Parquet output needs pyarrow (optional).
+
+CLI:  python rdc_export.py "C:/RDC2" [--out DIR] [--format jsonl|parquet] [--shard-mb 64] [--full]
+"""
+import os
+import re
+import gzip
+import json
+import zlib
+import time
+import hashlib
+import argparse
+import unicodedata
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import rdc_extract
+import rdc_metrics as metrics
+from rdc_training_sync import TRAIN_DIR_NAME
+
+EXPORT_VERSION = 1
+DATASET_DIR_NAME = "_dataset"
+INDEX_NAME = "_shards.json"
+SHARD_BYTES = 64 * 1024 * 1024
+MAX_WORKERS = 4
+MIN_CHARS = 50                  # shorter documents (empty decks, image-only PDFs) are skipped
+
+SIMHASH_DISTANCE = 3
+_BANDS = 4                      # 64 bits in 4 bands: distance <= 3 leaves at least one band equal
+_BAND_BITS = 64 // _BANDS
+_PARQUET_BATCH = 256
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+
+# ── Text ─────────────────────────────────────────────────────────────────────
+
+def normalize(text: str) -> str:
+    """NFKC, no control characters, runs of spaces collapsed, at most one blank line."""
+    text = _CONTROL.sub("", unicodedata.normalize("NFKC", text))
+    text = re.sub(r"[ \t\u00a0]+", " ", text)
+    text = re.sub(r" ?\n[ \n]*\n", "\n\n", text)
+    return text.strip()
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles."""
+    words = _WORD.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * 64
+    for s in shingles:
+        h = int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class NearDuplicates:
+    """Band index over simhashes: find() is a few dict lookups, not a scan."""
+
+    def __init__(self, distance: int = SIMHASH_DISTANCE):
+        self.distance = distance
+        self._bands = [{} for _ in range(_BANDS)]
+
+    def _keys(self, h: int):
+        mask = (1 << _BAND_BITS) - 1
+        return [(h >> (i * _BAND_BITS)) & mask for i in range(_BANDS)]
+
+    def find(self, h: int):
+        """id of an indexed document within `distance` bits of h, or None."""
+        for band, key in zip(self._bands, self._keys(h)):
+            for other, doc_id in band.get(key, ()):
+                if bin(h ^ other).count("1") <= self.distance:
+                    return doc_id
+        return None
+
+    def add(self, h: int, doc_id: str):
+        for band, key in zip(self._bands, self._keys(h)):
+            band.setdefault(key, []).append((h, doc_id))
+
+
+def _extract(path: str):
+    """Process-pool worker: (normalized text, simhash) or (None, error)."""
+    try:
+        text = normalize(rdc_extract.get_text(path))
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    return text, simhash(text)
+
+
+def _ordered(pool, fn, items, window: int):
+    """Yield (tag, fn(arg)) for (tag, arg) items in order, like pool.map
+    but with at most `window` calls in flight."""
+    pending = []
+    for tag, arg in items:
+        pending.append((tag, pool.submit(fn, arg)))
+        if len(pending) >= window:
+            tag, fut = pending.pop(0)
+            yield tag, fut.result()
+    for tag, fut in pending:
+        yield tag, fut.result()
+
+
+# ── Sources ──────────────────────────────────────────────────────────────────
+
+def manifest_entries(train_dir: Path):
+    """Yield (synced copy, original source) for each line of the sync manifest."""
+    manifest = train_dir / "_manifest.txt"
+    if not manifest.exists():
+        raise FileNotFoundError(f"No sync manifest in {train_dir} — run Training Sync first.")
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            if "  ←  " not in line:
+                continue
+            name, src = line.rstrip("\n").split("  ←  ", 1)
+            yield train_dir / name, src
+
+
+# ── Shards ───────────────────────────────────────────────────────────────────
+
+class _JsonlShard:
+    suffix = ".jsonl.gz"
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._raw = open(path, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6, mtime=0)
+        self._unflushed = False
+
+    def write(self, rec: dict):
+        self._gz.write((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._unflushed = True
+
+    def size(self) -> int:
+        # The compressor holds back output until its buffer fills; a sync
+        # flush (a few bytes, once per record) makes tell() the real size
+        if self._unflushed:
+            self._gz.flush(zlib.Z_SYNC_FLUSH)
+            self._unflushed = False
+        return self._raw.tell()
+
+    def close(self):
+        self._gz.close()
+        self._raw.close()
+
+
+class _ParquetShard:
+    suffix = ".parquet"
+    COLUMNS = ("id", "source", "name", "ext", "mtime", "chars", "simhash", "text")
+
+    @staticmethod
+    def require():
+        try:
+            import pyarrow as pa            # optional, only for --format parquet
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is not installed — use the jsonl format or `pip install pyarrow`.")
+        return pa, pq
+
+    def __init__(self, path: Path):
+        pa, pq = self.require()
+        self._pa = pa
+        self.path = path
+        self._schema = pa.schema([("id", pa.string()), ("source", pa.string()), ("name", pa.string()),
+                                  ("ext", pa.string()), ("mtime", pa.float64()), ("chars", pa.int64()),
+                                  ("simhash", pa.string()), ("text", pa.string())])
+        self._writer = pq.ParquetWriter(str(path), self._schema, compression="zstd")
+        self._batch = []
+
+    def write(self, rec: dict):
+        self._batch.append(rec)
+        if len(self._batch) >= _PARQUET_BATCH:
+            self._flush()
+
+    def _flush(self):
+        if self._batch:
+            cols = {c: [r[c] for r in self._batch] for c in self.COLUMNS}
+            self._writer.write_table(self._pa.table(cols, schema=self._schema))
+            self._batch = []
+
+    def size(self) -> int:
+        # Row groups are written as they fill; add a rough figure for the open batch
+        pending = sum(len(r["text"]) for r in self._batch) // 3
+        return (os.path.getsize(self.path) if self.path.exists() else 0) + pending
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+FORMATS = {"jsonl": _JsonlShard, "parquet": _ParquetShard}
+
+
+class _ShardWriter:
+    """Writes records into numbered shards, starting a new one past shard_bytes."""
+
+    def __init__(self, out_dir: Path, fmt: str, shard_bytes: int, next_no: int):
+        self.out_dir = out_dir
+        self.cls = FORMATS[fmt]
+        self.shard_bytes = shard_bytes
+        self.next_no = next_no
+        self.done = []                      # shard index entries
+        self._cur = None
+        self._docs = []
+
+    def write(self, rec: dict):
+        if self._cur is None:
+            self._cur = self.cls(self.out_dir / f"shard-{self.next_no:05d}{self.cls.suffix}.tmp")
+            self.next_no += 1
+        self._cur.write(rec)
+        self._docs.append(rec["source"])
+        if self._cur.size() >= self.shard_bytes:
+            self._finish()
+
+    def _finish(self):
+        self._cur.close()
+        final = self._cur.path.with_name(self._cur.path.name[:-len(".tmp")])
+        os.replace(self._cur.path, final)
+        h = hashlib.sha256()
+        with open(final, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        self.done.append({"name": final.name, "records": len(self._docs), "bytes": final.stat().st_size,
+                          "sha256": h.hexdigest(), "docs": self._docs})
+        metrics.count("export.shards")
+        self._cur, self._docs = None, []
+
+    def close(self) -> list:
+        if self._cur is not None:
+            self._finish()
+        return self.done
+
+
+# ── Export ───────────────────────────────────────────────────────────────────
+
+def _load_index(out_dir: Path) -> dict:
+    try:
+        with open(out_dir / INDEX_NAME, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == EXPORT_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def run_export(root: str, out_dir: str = None, fmt: str = "jsonl", shard_bytes: int = SHARD_BYTES,
+               full: bool = False, workers: int = MAX_WORKERS, log_callback=None):
+    """Export the synced training set. Returns a summary dict."""
+    log = log_callback or print
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} — use one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        _ParquetShard.require()             # fail before extracting anything
+    root = Path(os.path.normpath(os.fspath(root)))
+    train_dir = root / TRAIN_DIR_NAME
+    out = Path(out_dir) if out_dir else train_dir / DATASET_DIR_NAME
+    out.mkdir(parents=True, exist_ok=True)
+    log(f"Exporting training dataset → {out} ({fmt})\n")
+
+    prev = {} if full else _load_index(out)
+    if prev.get("format") not in (None, fmt):
+        log(f"  Format changed from {prev['format']} — full re-export")
+        prev = {}
+    prev_docs = prev.get("docs", {})
+    prev_shards = {s["name"]: s for s in prev.get("shards", [])}
+
+    # Pass 1: stat only — what changed since the last export
+    with metrics.timer("export.stat"):
+        current = {}
+        unsupported = 0
+        for copy, src in manifest_entries(train_dir):
+            if copy.suffix.lower() not in rdc_extract.SUPPORTED:
+                unsupported += 1
+                continue
+            path = copy if copy.exists() else Path(src)
+            try:
+                st = path.stat()
+            except OSError:
+                log(f"  MISSING: {copy.name}")
+                continue
+            rel = os.path.relpath(src, root).replace(os.sep, "/") if os.path.isabs(src) else src
+            current[rel] = (str(path), f"{st.st_size}:{st.st_mtime_ns}", st.st_mtime)
+    dirty = {d["shard"] for rel, d in prev_docs.items()
+             if d.get("shard") and (rel not in current or current[rel][1] != d["key"])}
+    kept = [s for name, s in prev_shards.items() if name not in dirty and (out / name).exists()]
+    kept_names = {s["name"] for s in kept}
+
+    near = NearDuplicates()
+    docs = {}
+    for rel, d in prev_docs.items():
+        if d.get("shard") in kept_names:
+            near.add(int(d["simhash"], 16), rel)
+            docs[rel] = d
+
+    todo = []
+    for rel, (path, key, mtime) in current.items():
+        if rel in docs:
+            continue
+        d = prev_docs.get(rel)
+        if d and d["key"] == key and d.get("simhash"):
+            # Unchanged document that was a duplicate or too short last time: no re-extraction
+            if d.get("skipped") == "short":
+                docs[rel] = d
+                continue
+            other = near.find(int(d["simhash"], 16))
+            if other is not None:
+                docs[rel] = dict(d, shard=None, duplicate_of=other, skipped="duplicate")
+                continue
+        todo.append((rel, path, key, mtime))
+    if unsupported:
+        log(f"  {unsupported} files without extractable text (images, video…) left out")
+    log(f"  {len(current)} documents: {len(current) - len(todo)} unchanged, {len(todo)} to extract; "
+        f"{len(kept)} shards kept, {len(prev_shards) - len(kept)} to rewrite")
+
+    next_no = 1 + max((int(n[6:11]) for n in prev_shards), default=-1)
+    writer = _ShardWriter(out, fmt, shard_bytes, next_no)
+    counts = {"written": 0, "duplicates": 0, "short": 0, "failed": 0}
+    workers = max(1, workers)
+    t0 = time.perf_counter()
+    # spawn: a forked copy of the GUI process (Qt, asyncio loop, threads) is not safe
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        items = (((rel, path), path) for rel, path, _, _ in todo)
+        info = {rel: (key, mtime) for rel, _, key, mtime in todo}
+        for n, ((rel, path), (text, h)) in enumerate(
+                _ordered(pool, _extract, items, window=workers * 4), 1):
+            key, mtime = info.pop(rel)
+            if text is None:
+                log(f"  ✗ {rel}: {h}")
+                counts["failed"] += 1
+                continue
+            d = {"key": key, "simhash": f"{h:016x}", "shard": None}
+            if len(text) < MIN_CHARS:
+                docs[rel] = dict(d, skipped="short")
+                counts["short"] += 1
+                continue
+            other = near.find(h)
+            if other is not None:
+                docs[rel] = dict(d, duplicate_of=other, skipped="duplicate")
+                counts["duplicates"] += 1
+                continue
+            near.add(h, rel)
+            writer.write({"id": hashlib.sha1(rel.encode("utf-8")).hexdigest()[:16], "source": rel,
+                          "name": os.path.basename(path), "ext": os.path.splitext(path)[1].lower(),
+                          "mtime": mtime, "chars": len(text), "simhash": d["simhash"], "text": text})
+            docs[rel] = d
+            counts["written"] += 1
+            if n % 100 == 0:
+                log(f"  {n}/{len(todo)} extracted ({n / (time.perf_counter() - t0):.1f} docs/s)")
+    metrics.count("export.documents", len(todo))
+    metrics.count("export.duplicates", counts["duplicates"])
+
+    new_shards = writer.close()
+    for s in new_shards:
+        for rel in s["docs"]:
+            docs[rel]["shard"] = s["name"]
+    shards = sorted(kept + new_shards, key=lambda s: s["name"])
+    index = {"version": EXPORT_VERSION, "format": fmt, "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+             "root": str(root), "records": sum(s["records"] for s in shards),
+             "shards": shards, "docs": docs}
+    tmp = out / f"{INDEX_NAME}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, out / INDEX_NAME)
+
+    # Only now that the new index is in place do the replaced shards go
+    for name in set(prev_shards) - kept_names:
+        try:
+            os.remove(out / name)
+        except OSError:
+            pass
+
+    metrics.flush()
+    log(f"\nDone. {counts['written']} written to {len(new_shards)} new shards, "
+        f"{counts['duplicates']} near-duplicates and {counts['short']} near-empty skipped, "
+        f"{counts['failed']} failed · {index['records']} records in {len(shards)} shards.")
+    return dict(counts, shards=len(shards), rewritten=len(new_shards), kept=len(kept),
+                records=index["records"], out=str(out))
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="RDC training dataset exporter")
+    parser.add_argument("root", help="RDC2 root folder (run Training Sync first)")
+    parser.add_argument("--out", help=f"Output folder (default: {TRAIN_DIR_NAME}/{DATASET_DIR_NAME})")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="jsonl")
+    parser.add_argument("--shard-mb", type=int, default=SHARD_BYTES // (1024 * 1024),
+                        help="Target compressed size per shard")
+    parser.add_argument("--full", action="store_true", help="Ignore the shard index, rewrite everything")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Extraction processes")
+    args = parser.parse_args()
+    run_export(args.root, args.out, args.format, args.shard_mb * 1024 * 1024, args.full, args.workers)
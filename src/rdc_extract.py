@@ -0,0 +1,215 @@
+"""
+rdc_extract.py — Document text extraction with an on-disk cache
+Plain text from .pptx / .docx / .xlsx / .pdf / text files for attaching
+to AI Tools prompts. Office files are streamed part by part out of the
+zip (iterparse, never the whole XML in memory); PDFs go through pypdf
+when installed, otherwise a memory-mapped scan of the content streams.
+
+Results are cached by (path, size, mtime) in <config dir>/cache/extract,
+bounded to CACHE_MAX_BYTES, so re-attaching an unchanged deck is a file
+read. Extraction runs on a small shared worker pool.
+
+CLI:  python rdc_extract.py FILE [...]
+"""
+import os
+import re
+import mmap
+import zlib
+import zipfile
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import rdc_metrics as metrics
+from rdc_cache import DiskCache, source_key
+
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+MAX_CHARS = 2_000_000           # per document; longer text is truncated
+MAX_WORKERS = 4
+
+TEXT_EXTS = {".txt", ".md", ".csv", ".json", ".xml", ".html", ".htm", ".py", ".log"}
+SUPPORTED = TEXT_EXTS | {".pptx", ".docx", ".xlsx", ".pdf"}
+
+_NS_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_NS_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_NS_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+_cache = None
+_pool = None
+
+
+class _Budget:
+    """Collects text pieces up to MAX_CHARS."""
+
+    def __init__(self):
+        self.parts, self.n = [], 0
+
+    def add(self, s: str) -> bool:
+        if self.n >= MAX_CHARS:
+            return False
+        self.parts.append(s)
+        self.n += len(s)
+        return self.n < MAX_CHARS
+
+    def text(self) -> str:
+        return "".join(self.parts)[:MAX_CHARS]
+
+
+def _iter_xml_text(zf: zipfile.ZipFile, part: str, text_tag: str, para_tag: str, out: _Budget):
+    with zf.open(part) as f:
+        for event, el in ET.iterparse(f, events=("end",)):
+            if el.tag == text_tag and el.text:
+                if not out.add(el.text):
+                    return
+            elif el.tag == para_tag:
+                out.add("\n")
+                el.clear()
+
+
+def _slide_no(name: str) -> int:
+    m = re.search(r'(\d+)\.xml$', name)
+    return int(m.group(1)) if m else 0
+
+
+def _extract_pptx(path: str) -> str:
+    out = _Budget()
+    with zipfile.ZipFile(path) as zf:
+        slides = sorted((n for n in zf.namelist()
+                         if n.startswith("ppt/slides/slide") and n.endswith(".xml")), key=_slide_no)
+        for n in slides:
+            if not out.add(f"\n--- Slide {_slide_no(n)} ---\n"):
+                break
+            _iter_xml_text(zf, n, _NS_A + "t", _NS_A + "p", out)
+    return out.text().strip()
+
+
+def _extract_docx(path: str) -> str:
+    out = _Budget()
+    with zipfile.ZipFile(path) as zf:
+        _iter_xml_text(zf, "word/document.xml", _NS_W + "t", _NS_W + "p", out)
+    return out.text().strip()
+
+
+def _extract_xlsx(path: str) -> str:
+    out = _Budget()
+    with zipfile.ZipFile(path) as zf:
+        if "xl/sharedStrings.xml" in zf.namelist():
+            _iter_xml_text(zf, "xl/sharedStrings.xml", _NS_S + "t", _NS_S + "si", out)
+    return out.text().strip()
+
+
+_PDF_STREAM = re.compile(rb'/FlateDecode[^>]*>>\s*stream\r?\n')
+_PDF_TEXT = re.compile(rb'\((?:\\.|[^\\)])*\)\s*Tj|\[(?:[^\]])*\]\s*TJ|T\*|Td|TD|ET')
+_PDF_PART = re.compile(rb'\(((?:\\.|[^\\)])*)\)|(-?\d+(?:\.\d+)?)')
+
+
+def _pdf_unescape(raw: bytes) -> str:
+    raw = re.sub(rb'\\([nrt()\\])', lambda m: {b"n": b"\n", b"r": b"", b"t": b"\t"}.get(m.group(1), m.group(1)), raw)
+    return raw.decode("latin-1", errors="replace")
+
+
+def _pdf_reader():
+    """pypdf's PdfReader, imported on the first PDF rather than at startup."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:     # optional — crude fallback below
+        return None
+    return PdfReader
+
+
+def _extract_pdf(path: str) -> str:
+    if os.path.getsize(path) == 0:          # mmap (and pypdf) refuse empty files
+        return ""
+    out = _Budget()
+    PdfReader = _pdf_reader()
+    if PdfReader is not None:
+        with open(path, "rb") as f:         # pypdf reads pages lazily from the file
+            for page in PdfReader(f).pages:
+                if not out.add((page.extract_text() or "") + "\n"):
+                    break
+        return out.text().strip()
+    # Fallback: walk Flate content streams in a memory map (only literal strings)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in _PDF_STREAM.finditer(mm):
+            end = mm.find(b"endstream", m.end())
+            if end < 0:
+                break
+            try:
+                data = zlib.decompressobj().decompress(mm[m.end():end])
+            except zlib.error:
+                continue
+            for op in _PDF_TEXT.finditer(data):
+                tok = op.group(0)
+                if tok in (b"T*", b"Td", b"TD", b"ET"):
+                    out.add("\n" if tok != b"Td" else " ")
+                    continue
+                for part in _PDF_PART.finditer(tok):
+                    if part.group(1) is not None:
+                        out.add(_pdf_unescape(part.group(1)))
+                    elif tok.startswith(b"[") and float(part.group(2)) < -200:
+                        out.add(" ")    # wide TJ kerning gap = word space
+            if out.n >= MAX_CHARS:
+                break
+    return re.sub(r'[ \t]*\n\s*\n+', "\n\n", out.text()).strip()
+
+
+def _extract_plain(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read(MAX_CHARS)
+
+
+def extract_text(path: str) -> str:
+    """Uncached extraction. Raises ValueError for unsupported types."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pptx":
+        return _extract_pptx(path)
+    if ext == ".docx":
+        return _extract_docx(path)
+    if ext == ".xlsx":
+        return _extract_xlsx(path)
+    if ext == ".pdf":
+        return _extract_pdf(path)
+    if ext in TEXT_EXTS:
+        return _extract_plain(path)
+    raise ValueError(f"Unsupported file type: {ext or path}")
+
+
+def cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache("extract", CACHE_MAX_BYTES)
+    return _cache
+
+
+def get_text(path: str) -> str:
+    """Cached extraction keyed by (path, size, mtime)."""
+    key = source_key(path)
+    hit = cache().get(key, ".txt")
+    if hit is not None:
+        metrics.count("extract.cache_hits")
+        return hit.read_text(encoding="utf-8")
+    with metrics.timer("extract" + os.path.splitext(path)[1].lower()):
+        text = extract_text(path)
+    cache().put(key, text.encode("utf-8"), ".txt")
+    return text
+
+
+def submit(path: str):
+    """Extract on the shared worker pool. Returns a Future[str]."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="extract")
+    return _pool.submit(get_text, path)
+
+
+if __name__ == "__main__":
+    import time
+    parser = argparse.ArgumentParser(description="RDC document text extractor")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+    for p in args.files:
+        t0 = time.perf_counter()
+        text = extract_text(p) if args.no_cache else get_text(p)
+        print(f"── {p}  ({len(text):,} chars, {(time.perf_counter() - t0) * 1000:.0f} ms)")
+        print(text[:1500])
@@ -0,0 +1,263 @@
+"""
+rdc_history.py — Version history index and restore from _archive
+run_archive scatters older versions over one _archive/ folder per
+directory. This index, kept in <root>/_archive_history.json and updated by
+the archiver as it moves files, maps every document — folder + base name +
+extension, the archiver's own grouping — to all of its versions with their
+location, size, modification time and when they were archived:
+
+    "01 - RDC|rdc_investor_deck|.pptx||semver"  ->
+        RDC_Investor_Deck_V1.03.pptx   live      01 - RDC/
+        RDC_Investor_Deck_V1.02.pptx   archived  01 - RDC/_archive/
+        RDC_Investor_Deck_V1.01.pptx   archived  01 - RDC/_archive/
+
+Lookup is one dict access. Restoring a version swaps it with the live
+one(s) through the root's storage backend (a rename locally, a server-side
+copy on buckets); only the document's own folder is listed, the tree is
+never rescanned. rebuild() backfills the index for archives made before it
+existed (one walk that also lists the _archive/ folders).
+
+CLI:  python rdc_history.py ROOT FILE                 list versions of FILE
+      python rdc_history.py ROOT FILE --restore NAME  make NAME the live version
+      python rdc_history.py ROOT --rebuild
+"""
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import rdc_metrics as metrics
+import rdc_storage
+from rdc_versions import parse_filename
+
+HISTORY_FILE = "_archive_history.json"
+ARCHIVE_DIR = "_archive"
+FORMAT = 2                      # 2: the version scheme is part of the doc key
+
+_lock = threading.Lock()        # load-modify-save of one root's index
+_loaded = {}                    # display root -> (file stat, History)
+
+
+class Version(NamedTuple):
+    name: str
+    label: str                  # "V1.02" / "2024-03-15"
+    path: str                   # root-relative
+    size: int
+    mtime: float
+    archived: Optional[float]   # when the archiver moved it; None while live
+
+    @property
+    def live(self) -> bool:
+        return self.archived is None
+
+
+def _split(rel: str):
+    """(document folder, file name) for a live or archived root-relative path."""
+    folder, _, name = rel.rpartition("/")
+    if folder == ARCHIVE_DIR:
+        folder = ""
+    elif folder.endswith("/" + ARCHIVE_DIR):
+        folder = folder[:-len(ARCHIVE_DIR) - 1]
+    return folder, name
+
+
+def doc_key(folder: str, info) -> str:
+    base, ext, train, scheme = info.key
+    return f"{folder}|{base}|{ext}|{'train' if train else ''}|{scheme}"
+
+
+def archive_dir(folder: str) -> str:
+    return f"{folder}/{ARCHIVE_DIR}" if folder else ARCHIVE_DIR
+
+
+class History:
+    """The parsed index: {doc key: {file name: [path, size, mtime, archived]}}."""
+
+    def __init__(self, docs: dict = None):
+        self.docs = docs or {}
+
+    def versions(self, rel: str) -> list:
+        """All known versions of the document `rel` (live or archived), newest first."""
+        folder, name = _split(rel)
+        info = parse_filename(name)
+        if not info:
+            return []
+        entries = self.docs.get(doc_key(folder, info), {})
+        out = []
+        for n, (path, size, mtime, archived) in entries.items():
+            v = parse_filename(n)
+            out.append((v.sort_key if v else (), Version(n, v.label if v else "", path, size, mtime, archived)))
+        out.sort(key=lambda x: x[0], reverse=True)
+        return [v for _, v in out]
+
+    def record(self, store, rel: str, archived: Optional[float] = None):
+        """Note the current location of one version (stat through the backend)."""
+        folder, name = _split(rel)
+        info = parse_filename(name)
+        if not info:
+            return
+        st = store.stat(rel)
+        self.docs.setdefault(doc_key(folder, info), {})[name] = [
+            rel, st.size if st else 0, st.mtime if st else 0.0, archived]
+
+    def __len__(self):
+        return len(self.docs)
+
+
+def _stamp(store):
+    st = store.stat(HISTORY_FILE)
+    return (st.size, st.mtime) if st else None
+
+
+def load(root: str = "", backend=None) -> History:
+    """The root's index; re-read only when the file changed since the last load."""
+    store = backend or rdc_storage.backend_for(root)
+    stamp = _stamp(store)
+    if stamp is None:
+        return History()
+    hit = _loaded.get(store.display())
+    if hit and hit[0] == stamp:
+        return hit[1]
+    try:
+        data = json.loads(store.read_text(HISTORY_FILE))
+    except (OSError, ValueError):
+        return History()
+    docs = data.get("docs", {})
+    h = History(docs if data.get("format") == FORMAT else _rekey(docs))
+    _loaded[store.display()] = (stamp, h)
+    return h
+
+
+def _rekey(docs: dict) -> dict:
+    """Entries of an older index under the current doc keys (names that no
+    longer parse as versions are dropped)."""
+    out = {}
+    for entries in docs.values():
+        for name, entry in entries.items():
+            info = parse_filename(name)
+            if info:
+                out.setdefault(doc_key(_split(entry[0])[0], info), {})[name] = entry
+    return out
+
+
+def save(store, history: History):
+    store.write_text(HISTORY_FILE, json.dumps({"format": FORMAT, "docs": history.docs},
+                                              ensure_ascii=False, separators=(",", ":")))
+    _loaded[store.display()] = (_stamp(store), history)
+
+
+def update(store, groups: list, archived_at: float = None):
+    """Called by run_archive after its moves: groups = [(folder, live name, [archived names])]."""
+    archived_at = archived_at or time.time()
+    with _lock, metrics.timer("archive.history"):
+        h = load(backend=store)
+        for folder, latest, older in groups:
+            h.record(store, f"{folder}/{latest}" if folder else latest)
+            for name in older:
+                h.record(store, f"{archive_dir(folder)}/{name}", archived_at)
+        save(store, h)
+
+
+def versions(root: str, rel: str, backend=None) -> list:
+    return load(root, backend).versions(rel)
+
+
+def restore(root: str, rel: str, backend=None, log_callback=None) -> str:
+    """Move the archived version `rel` back to its folder and archive the live
+    version(s) of the same document in its place. Returns the restored path."""
+    store = backend or rdc_storage.backend_for(root)
+    log = log_callback or print
+    folder, name = _split(rel)
+    info = parse_filename(name)
+    if not info or rel == (f"{folder}/{name}" if folder else name):
+        raise ValueError(f"Not an archived version: {rel}")
+    if store.stat(rel) is None:
+        raise FileNotFoundError(f"{rel} is no longer in the archive (moved by hand?); "
+                                f"run 'python rdc_history.py ROOT --rebuild'")
+    target = f"{folder}/{name}" if folder else name
+    listing = store.listdir(folder) or (set(), set())
+    live = []
+    for n in listing[1]:
+        v = parse_filename(n)
+        if v and v.key == info.key and n != name:
+            live.append(n)
+    adir = archive_dir(folder)
+    if name in listing[1]:
+        raise FileExistsError(f"{target} already exists")
+    for n in live:
+        if store.stat(f"{adir}/{n}") is not None:
+            raise FileExistsError(f"{adir}/{n} already exists")
+
+    pairs = [(rel, target)] + [(f"{folder}/{n}" if folder else n, f"{adir}/{n}") for n in live]
+    now = time.time()
+    with _lock:
+        with metrics.timer("history.restore"):
+            store.move_many(pairs)
+        h = load(backend=store)
+        h.record(store, target)
+        for n in live:
+            h.record(store, f"{adir}/{n}", now)
+        save(store, h)
+    store.append_text("_archive_log.txt", f"\n[{datetime.now():%Y-%m-%d %H:%M}] Restored {target}"
+                      + (f" (archived {', '.join(sorted(live))})" if live else "") + "\n")
+    log(f"  RESTORE: {name}  ←  {ARCHIVE_DIR}/" + "".join(f"\n  ARCHIVE: {n}  →  {ARCHIVE_DIR}/" for n in live))
+    return target
+
+
+def rebuild(root: str, backend=None, ignore=(), log_callback=None) -> int:
+    """Re-create the index from the tree: live files plus every _archive/ folder."""
+    store = backend or rdc_storage.backend_for(root)
+    log = log_callback or print
+    log(f"Indexing versions under {store.display()}…")
+    h = History()
+    for folder, _, filenames in metrics.timed_iter("history.scan", store.walk(extra=ignore)):
+        archived = (store.listdir(archive_dir(folder)) or (set(), set()))[1]
+        if not archived:
+            continue
+        keys = set()
+        for name in archived:
+            info = parse_filename(name)
+            if info:
+                keys.add(info.key)
+                st = store.stat(f"{archive_dir(folder)}/{name}")
+                # Best guess for "archived at" is the file's own time
+                h.record(store, f"{archive_dir(folder)}/{name}", st.mtime if st else 0.0)
+        for name in filenames:
+            info = parse_filename(name)
+            if info and info.key in keys:
+                h.record(store, f"{folder}/{name}" if folder else name)
+    with _lock:
+        save(store, h)
+    count = sum(len(v) for v in h.docs.values())
+    log(f"Done. {len(h):,} documents, {count:,} versions.")
+    return len(h)
+
+
+def format_versions(vs: list) -> str:
+    lines = []
+    for v in vs:
+        when = "live" if v.live else f"archived {datetime.fromtimestamp(v.archived):%Y-%m-%d}"
+        lines.append(f"  {v.label:<12} {v.size / 1e6:>8.2f} MB  {datetime.fromtimestamp(v.mtime):%Y-%m-%d %H:%M}"
+                     f"  {when:<20} {v.path}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC version history")
+    parser.add_argument("root", help="Root folder or bucket URL")
+    parser.add_argument("file", nargs="?", help="Root-relative path of any version of the document")
+    parser.add_argument("--restore", metavar="NAME", help="File name of the version to make live")
+    parser.add_argument("--rebuild", action="store_true", help="Re-create the index from the tree")
+    args = parser.parse_args()
+    if args.rebuild:
+        rebuild(args.root)
+    if args.file:
+        if args.restore:
+            folder, _ = _split(args.file.replace("\\", "/"))
+            restore(args.root, f"{archive_dir(folder)}/{args.restore}")
+        vs = versions(args.root, args.file.replace("\\", "/"))
+        print(format_versions(vs) if vs else "No archived versions recorded for this document.")
+    elif not args.rebuild:
+        parser.error("give a FILE or --rebuild")
@@ -0,0 +1,242 @@
+"""
+rdc_ignore.py — Gitignore-style exclusion rules
+Shared by rdc_archive and rdc_training_sync. Rules come from (in order):
+    built-in defaults  →  settings["ignore_rules"]  →  <root>/.rdcignore
+    →  .rdcignore in each sub-directory (applies to that subtree)
+
+Syntax (subset of .gitignore):
+    # comment           blank lines ignored
+    name                matches a file or folder of that name at any depth
+    folder/             trailing slash: folders only
+    /98 - Code/         leading or inner slash: anchored to the ignore file's folder
+    *.mp4  clip?.mov    * ? [abc] wildcards, ** spans folders
+    !keep.mp4           negation: re-include (later rules win)
+
+Ignored folders are pruned from the walk, so nothing beneath them is listed.
+
+CLI:  python rdc_ignore.py "C:/RDC2"      # list what would be skipped
+"""
+import os
+import re
+import sys
+import argparse
+from typing import NamedTuple
+
+IGNORE_FILE = ".rdcignore"
+
+DEFAULT_RULES = [
+    "_archive/",
+    ".tmp.driveupload/",
+    "$RECYCLE.BIN/",
+    ".git/",
+    "node_modules/",
+    "__pycache__/",
+    ".trash/",
+    "~$*",
+    IGNORE_FILE,
+]
+
+_CASE_INSENSITIVE = sys.platform == "win32"
+_FLAGS = re.IGNORECASE if _CASE_INSENSITIVE else 0
+_GLOB_CHARS = re.compile(r'[*?\[]')
+
+
+class Rule(NamedTuple):
+    source: str             # original line
+    negate: bool
+    dir_only: bool
+    literal: str            # basename for plain "name" rules, else ""
+    regex: str              # root-relative regex source
+
+
+def _glob_to_re(pattern: str) -> str:
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = pattern.find("]", i + 2)
+            if j < 0:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def compile_rule(line: str, base: str = ""):
+    """Compile one ignore line relative to `base` (posix path from root, "" = root)."""
+    text = line.rstrip("\n").rstrip()
+    if not text or text.startswith("#"):
+        return None
+    negate = text.startswith("!")
+    if negate:
+        text = text[1:]
+    if text.startswith("\\"):
+        text = text[1:]
+    dir_only = text.endswith("/")
+    text = text.rstrip("/")
+    if not text:
+        return None
+    anchored = "/" in text
+    text = text.lstrip("/")
+    prefix = re.escape(base + "/") if base else ""
+    body = _glob_to_re(text)
+    if anchored:
+        regex = f"^{prefix}{body}$"
+    else:
+        regex = f"^{prefix}(?:.*/)?{body}$"
+    literal = "" if anchored or _GLOB_CHARS.search(text) else text
+    if literal and _CASE_INSENSITIVE:
+        literal = literal.lower()
+    return Rule(line.strip(), negate, dir_only, literal, regex)
+
+
+def parse_rules(lines, base: str = "") -> list:
+    return [r for r in (compile_rule(l, base) for l in lines) if r]
+
+
+class _Matcher:
+    """All rules that apply inside one directory, pre-combined."""
+
+    def __init__(self, rules: tuple):
+        self.rules = rules
+        self.has_negation = any(r.negate for r in rules)
+        plain = [r for r in rules if not r.negate]
+        self._dir_names = frozenset(r.literal for r in plain if r.literal)
+        self._file_names = frozenset(r.literal for r in plain if r.literal and not r.dir_only)
+        dir_res = [r.regex for r in plain if not r.literal]
+        file_res = [r.regex for r in plain if not r.literal and not r.dir_only]
+        self._dir_re = re.compile("|".join(dir_res), _FLAGS).match if dir_res else None
+        self._file_re = re.compile("|".join(file_res), _FLAGS).match if file_res else None
+        self._compiled = {}
+
+    def _slow(self, rel: str, is_dir: bool) -> bool:
+        ignored = False
+        for r in self.rules:
+            if r.dir_only and not is_dir:
+                continue
+            m = self._compiled.get(r.regex)
+            if m is None:
+                m = self._compiled[r.regex] = re.compile(r.regex, _FLAGS).match
+            if m(rel):
+                ignored = not r.negate
+        return ignored
+
+    def ignored(self, rel: str, name: str, is_dir: bool) -> bool:
+        if _CASE_INSENSITIVE:
+            name = name.lower()
+        if is_dir:
+            hit = name in self._dir_names or (self._dir_re is not None and self._dir_re(rel))
+        else:
+            hit = name in self._file_names or (self._file_re is not None and self._file_re(rel))
+        if not hit:
+            return False
+        return self._slow(rel, is_dir) if self.has_negation else True
+
+
+class IgnoreRules:
+    """Per-root rule set; builds and caches one _Matcher per directory."""
+
+    def __init__(self, root, extra=(), use_defaults: bool = True, read=None):
+        """`read(rel_path) -> lines` loads .rdcignore files for roots that are
+        not local folders (rdc_storage backends); default: the filesystem."""
+        self.root = os.fspath(root)
+        rules = parse_rules(DEFAULT_RULES) if use_defaults else []
+        rules += parse_rules(extra or ())
+        self._root_rules = tuple(rules)
+        self._cache = {}
+        self._read = read or self._read_file
+
+    def _read_file(self, rel: str) -> list:
+        try:
+            with open(os.path.join(self.root, *rel.split("/")), encoding="utf-8") as f:
+                return f.readlines()
+        except OSError:
+            return []
+
+    def for_dir(self, rel: str, filenames=None) -> _Matcher:
+        """Matcher for entries inside `rel`. Pass the dir listing to skip a stat."""
+        m = self._cache.get(rel)
+        if m is not None:
+            return m
+        if rel == "":
+            parent, rules = None, self._root_rules
+        else:
+            parent = self.for_dir(rel.rpartition("/")[0])
+            rules = parent.rules
+        if filenames is not None:
+            has_file = IGNORE_FILE in filenames
+        else:
+            has_file = os.path.isfile(os.path.join(self.root, rel, IGNORE_FILE))
+        if has_file:
+            own = parse_rules(self._read(f"{rel}/{IGNORE_FILE}" if rel else IGNORE_FILE), rel)
+            m = _Matcher(rules + tuple(own))
+        else:
+            m = parent or _Matcher(rules)
+        self._cache[rel] = m
+        return m
+
+    def is_ignored(self, path, is_dir: bool = False) -> bool:
+        """Check a single path (absolute or root-relative). Does not check ancestors."""
+        rel = os.fspath(path)
+        if os.path.isabs(rel):
+            rel = os.path.relpath(rel, self.root)
+        rel = rel.replace(os.sep, "/").strip("/")
+        parent, _, name = rel.rpartition("/")
+        return self.for_dir(parent).ignored(rel, name, is_dir)
+
+
+def walk(root, rules: IgnoreRules = None, extra=()):
+    """os.walk that prunes ignored folders and drops ignored files.
+
+    Yields (dirpath, dirnames, filenames) like os.walk; callers may prune
+    `dirnames` further in place.
+    """
+    root = os.fspath(root)
+    rules = rules or IgnoreRules(root, extra)
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        rel = "" if rel == "." else rel.replace(os.sep, "/")
+        m = rules.for_dir(rel, filenames)
+        pre = rel + "/" if rel else ""
+        dirnames[:] = [d for d in dirnames if not m.ignored(pre + d, d, True)]
+        filenames = [f for f in filenames if not m.ignored(pre + f, f, False)]
+        yield dirpath, dirnames, filenames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC ignore-rule checker")
+    parser.add_argument("root", help="Root folder to check")
+    args = parser.parse_args()
+    rules = IgnoreRules(args.root)
+    for dirpath, dirnames, filenames in os.walk(args.root):
+        rel = os.path.relpath(dirpath, args.root)
+        rel = "" if rel == "." else rel.replace(os.sep, "/")
+        m = rules.for_dir(rel, filenames)
+        pre = rel + "/" if rel else ""
+        for d in list(dirnames):
+            if m.ignored(pre + d, d, True):
+                print(f"  SKIP DIR:  {pre + d}/")
+                dirnames.remove(d)
+        for f in filenames:
+            if m.ignored(pre + f, f, False):
+                print(f"  SKIP FILE: {pre + f}")
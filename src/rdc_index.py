@@ -0,0 +1,216 @@
+"""
+rdc_index.py — Scan index of an RDC root
+One pass of os.scandir over the tree (ignore rules applied) records every
+folder's sub-folders and files with size + mtime. The Files panel browses
+the index instead of stat-ing the disk; later scans reuse the listing of
+any folder whose mtime has not changed.
+
+Saved per root under the config dir: index/<root-hash>.json.gz
+
+CLI:  python rdc_index.py "C:/RDC2" [--full]
+"""
+import os
+import gzip
+import json
+import time
+import hashlib
+import argparse
+from typing import NamedTuple
+
+import mru_manager as mru
+import rdc_ignore
+from rdc_versions import parse_filename
+
+INDEX_VERSION = 1
+
+
+class FileRecord(NamedTuple):
+    name: str
+    size: int
+    mtime: float
+
+
+class DirRecord(NamedTuple):
+    mtime: float
+    subdirs: tuple          # names
+    files: tuple            # FileRecords
+
+
+class ScanIndex:
+    def __init__(self, root: str, dirs: dict = None, scanned_at: float = 0.0):
+        self.root = os.path.normpath(os.fspath(root))
+        self.dirs = dirs or {}          # rel ("" = root, "/"-separated) -> DirRecord
+        self.scanned_at = scanned_at
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+    def abspath(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split("/")) if rel else self.root
+
+    def file_count(self) -> int:
+        return sum(len(d.files) for d in self.dirs.values())
+
+    def iter_files(self):
+        """Yield (rel_dir, FileRecord) for every indexed file."""
+        for rel, d in self.dirs.items():
+            for f in d.files:
+                yield rel, f
+
+    def groups(self, rel: str):
+        """Files of one folder with versions collapsed.
+
+        Returns [(latest FileRecord, VersionInfo or None, [older FileRecords
+        newest first])], sorted by name. Unversioned files are their own group.
+        """
+        d = self.dirs.get(rel)
+        if d is None:
+            return []
+        grouped, out = {}, []
+        for f in d.files:
+            info = parse_filename(f.name)
+            if info is None:
+                out.append((f, None, []))
+            else:
+                grouped.setdefault(info.key, []).append((info.sort_key, f, info))
+        for versions in grouped.values():
+            versions.sort(key=lambda v: v[0], reverse=True)
+            _, f, info = versions[0]
+            out.append((f, info, [v[1] for v in versions[1:]]))
+        out.sort(key=lambda g: g[0].name.lower())
+        return out
+
+    def refresh(self, rels, ignore=(), include_archive: bool = True):
+        """Re-list just these folders, e.g. after the caller moved files
+        between them (a restore from _archive/), instead of a full scan."""
+        rules = rdc_ignore.IgnoreRules(self.root, (["!_archive/"] if include_archive else []) + list(ignore))
+        for rel in rels:
+            path = self.abspath(rel)
+            try:
+                rec = _list_dir(path, rel, os.stat(path).st_mtime, rules)
+            except OSError:
+                rec = None
+            if rec is None:
+                self.dirs.pop(rel, None)
+            else:
+                self.dirs[rel] = rec
+        self.scanned_at = time.time()
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+    def to_json(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "root": self.root,
+            "scanned_at": self.scanned_at,
+            "dirs": {rel: [d.mtime, list(d.subdirs), [list(f) for f in d.files]]
+                     for rel, d in self.dirs.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ScanIndex":
+        dirs = {rel: DirRecord(m, tuple(subs), tuple(FileRecord(*f) for f in files))
+                for rel, (m, subs, files) in data.get("dirs", {}).items()}
+        return cls(data["root"], dirs, data.get("scanned_at", 0.0))
+
+    def save(self, path=None):
+        path = path or index_path(self.root)
+        tmp = f"{path}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f:
+            json.dump(self.to_json(), f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def index_path(root: str):
+    key = hashlib.sha1(os.path.normcase(os.path.normpath(root)).encode("utf-8")).hexdigest()[:16]
+    d = mru.config_dir() / "index"
+    d.mkdir(exist_ok=True)
+    return d / f"{key}.json.gz"
+
+
+def load(root: str):
+    """Saved index for `root`, or None."""
+    path = index_path(root)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return ScanIndex.from_json(data)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def scan(root: str, previous: ScanIndex = None, ignore=(), log=None,
+         include_archive: bool = True) -> ScanIndex:
+    """Walk `root` into a ScanIndex.
+
+    With `previous`, folders whose mtime is unchanged reuse their old listing
+    (no scandir / stat of their files). A file edited in place does not
+    change its folder's mtime, so pass previous=None for an exact rescan.
+    _archive/ folders are indexed unless include_archive is False.
+    """
+    root = os.path.normpath(os.fspath(root))
+    extra = (["!_archive/"] if include_archive else []) + list(ignore)
+    rules = rdc_ignore.IgnoreRules(root, extra)
+    old = previous.dirs if previous is not None and previous.root == root else {}
+    dirs = {}
+    reused = 0
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        path = os.path.join(root, *rel.split("/")) if rel else root
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+        prev = old.get(rel)
+        if prev is not None and prev.mtime == mtime:
+            rec = prev
+            reused += 1
+        else:
+            rec = _list_dir(path, rel, mtime, rules)
+            if rec is None:
+                continue
+        dirs[rel] = rec
+        pre = rel + "/" if rel else ""
+        stack.extend(pre + d for d in rec.subdirs)
+    index = ScanIndex(root, dirs, time.time())
+    if log:
+        log(f"Indexed {len(dirs)} folders, {index.file_count()} files "
+            f"({reused} folders unchanged).")
+    return index
+
+
+def _list_dir(path: str, rel: str, mtime: float, rules):
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return None
+    m = rules.for_dir(rel, [e.name for e in entries if not e.is_dir()])
+    pre = rel + "/" if rel else ""
+    subdirs, files = [], []
+    for e in entries:
+        try:
+            if e.is_dir(follow_symlinks=False):
+                if not m.ignored(pre + e.name, e.name, True):
+                    subdirs.append(e.name)
+            elif not m.ignored(pre + e.name, e.name, False):
+                st = e.stat()
+                files.append(FileRecord(e.name, st.st_size, st.st_mtime))
+        except OSError:
+            continue
+    subdirs.sort(key=str.lower)
+    files.sort(key=lambda f: f.name.lower())
+    return DirRecord(mtime, tuple(subdirs), tuple(files))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC scan index builder")
+    parser.add_argument("root", help="Root folder to index")
+    parser.add_argument("--full", action="store_true", help="Ignore the saved index, rescan everything")
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    idx = scan(args.root, previous=None if args.full else load(args.root), log=print)
+    idx.save()
+    print(f"Saved {index_path(idx.root)} in {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,251 @@
+"""
+rdc_longdoc.py — Map-reduce over documents larger than the model context
+Token counts are estimated locally (no API call). Documents are split on
+paragraph boundaries into overlapping chunks sized for the model, each
+chunk is asked the question in parallel (map), and the partial answers
+are combined into one (reduce) — in several rounds if the partials are
+themselves too long. Progress and each partial answer are reported
+through callbacks as they arrive.
+
+arun() is the coroutine (async SDK clients, at most MAX_CONCURRENCY calls
+in flight); cancelling its task cancels the calls still running. run()
+wraps it for scripts.
+
+CLI:  python rdc_longdoc.py MODEL "question" FILE [...]
+"""
+import re
+import asyncio
+import argparse
+
+import rdc_ai
+
+# Context window per model family (tokens); first matching prefix wins
+CONTEXT_TOKENS = [
+    ("claude", 200_000),
+    ("gpt-4o", 128_000),
+    ("gpt", 128_000),
+    ("gemini-1.5-pro", 2_000_000),
+    ("gemini", 1_000_000),
+]
+CHUNK_CAP = 30_000          # chunk size ceiling: smaller chunks finish sooner in parallel
+OVERLAP = 0.08              # fraction of a chunk repeated at the start of the next
+MAP_MAX_TOKENS = 1024
+REDUCE_MAX_TOKENS = 4096
+REDUCE_MIN_BUDGET = 3 * REDUCE_MAX_TOKENS   # a reduce call takes at least two full partials
+MAX_CONCURRENCY = 4
+
+MAP_PROMPT = (
+    "You are reading part {i} of {n} of a longer set of documents. Answer the request below "
+    "using only this part. Quote figures and names exactly. If this part has nothing "
+    "relevant, reply with NOTHING RELEVANT.\n\nRequest: {question}"
+)
+REDUCE_PROMPT = (
+    "Below are partial answers to the same request, each written from a different part of "
+    "a long document set, in document order. Combine them into one complete answer: merge "
+    "duplicates, keep every distinct fact, and ignore parts marked NOTHING RELEVANT.\n\n"
+    "Request: {question}"
+)
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+def context_tokens(model: str) -> int:
+    for prefix, n in CONTEXT_TOKENS:
+        if model.startswith(prefix):
+            return n
+    return 32_000
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate: ~4 chars per token, or one per word / punctuation mark if more."""
+    if not text:
+        return 0
+    if len(text) > 200_000:     # sample long texts instead of tokenizing all of them
+        step = len(text) // 20
+        sample = "".join(text[k:k + 5000] for k in range(0, len(text), step))
+        words = len(_WORD.findall(sample)) * len(text) / len(sample)
+    else:
+        words = len(_WORD.findall(text))
+    return int(max(len(text) / 4, words))
+
+
+def chunk_budget(model: str, system: str = "", question: str = "") -> int:
+    """Document tokens that fit in one map call for `model`."""
+    room = context_tokens(model) - estimate_tokens(system) - estimate_tokens(question) \
+        - MAP_MAX_TOKENS - 1000
+    return max(1000, min(CHUNK_CAP, room // 2))
+
+
+def needs_chunking(model: str, system: str, documents, history=()) -> bool:
+    used = estimate_tokens(system) + sum(estimate_tokens(m["content"]) for m in history)
+    used += sum(estimate_tokens(text) for _, text in documents)
+    return used + rdc_ai.MAX_TOKENS > context_tokens(model) * 0.9
+
+
+def _pieces(text: str, max_tokens: int, seps=("\n\n", "\n", ". ")) -> list:
+    """Split on paragraphs, then lines, then sentences, until every piece fits."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    if not seps:
+        size = max(1000, max_tokens * 4)
+        return [text[k:k + size] for k in range(0, len(text), size)]
+    parts = text.split(seps[0])
+    out = []
+    for k, p in enumerate(parts):
+        if k < len(parts) - 1:
+            p += seps[0]
+        out.extend(_pieces(p, max_tokens, seps[1:]))
+    return out
+
+
+def split_chunks(documents, max_tokens: int, overlap: float = OVERLAP) -> list:
+    """Pack (name, text) documents into chunks of at most ~max_tokens.
+
+    Small documents share a chunk; large ones are split with `overlap` of
+    each chunk repeated at the start of the next. Returns
+    [(label, [(name, text), ...])] — the documents of each chunk.
+    """
+    chunks, cur, cur_tokens = [], [], 0
+
+    def flush():
+        nonlocal cur, cur_tokens
+        if cur:
+            chunks.append((", ".join(name for name, _ in cur), cur))
+        cur, cur_tokens = [], 0
+
+    for name, text in documents:
+        n = estimate_tokens(text)
+        if n <= max_tokens:
+            if cur_tokens + n > max_tokens:
+                flush()
+            cur.append((name, text))
+            cur_tokens += n
+            continue
+        flush()
+        parts, part, tokens = [], [], 0
+        for p in _pieces(text, max_tokens):
+            t = estimate_tokens(p)
+            if part and tokens + t > max_tokens:
+                parts.append("".join(part))
+                # Carry the tail of this chunk into the next one
+                back, carried = [], 0
+                for q in reversed(part):
+                    carried += estimate_tokens(q)
+                    if carried > max_tokens * overlap:
+                        break
+                    back.insert(0, q)
+                part, tokens = back, sum(estimate_tokens(q) for q in back)
+            part.append(p)
+            tokens += t
+        if part:
+            parts.append("".join(part))
+        for k, body in enumerate(parts, 1):
+            label = f"{name} (part {k}/{len(parts)})"
+            chunks.append((label, [(label, body)]))
+    flush()
+    return chunks
+
+
+async def arun(model: str, system: str, question: str, documents, keys: dict,
+               on_progress=None, on_partial=None,
+               max_concurrency: int = MAX_CONCURRENCY) -> rdc_ai.Reply:
+    """Answer `question` over `documents` ((name, text) pairs) by map-reduce.
+
+    on_progress(done, total, stage) and on_partial(index, label, text) are
+    called on the event loop as calls complete. Returns the combined Reply
+    with usage summed over every call.
+    """
+    budget = chunk_budget(model, system, question)
+    chunks = split_chunks(documents, budget)
+    gate = asyncio.Semaphore(max_concurrency)
+    total = rdc_ai.Usage()
+
+    async def call(prompt, docs, max_tokens, kind):
+        nonlocal total
+        async with gate:
+            r = await rdc_ai.acomplete(model, system, [{"role": "user", "content": prompt}], keys,
+                                       documents=docs, max_tokens=max_tokens, kind=kind)
+        total += r.usage
+        return r.text
+
+    async def gather(calls, stage):
+        # Fails fast: the first error cancels the remaining calls
+        tasks = [asyncio.ensure_future(c) for c in calls]
+        try:
+            done = 0
+            for fut in asyncio.as_completed(tasks):
+                await fut
+                done += 1
+                if on_progress:
+                    on_progress(done, len(tasks), stage)
+            return [t.result() for t in tasks]
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    # Map
+    n = len(chunks)
+    if on_progress:
+        on_progress(0, n, "map")
+
+    async def map_one(i, docs):
+        text = await call(MAP_PROMPT.format(i=i + 1, n=n, question=question), docs, MAP_MAX_TOKENS, "map")
+        if on_partial:
+            on_partial(i, chunks[i][0], text)
+        return text
+
+    partials = await gather([map_one(i, docs) for i, (_, docs) in enumerate(chunks)], "map")
+    if n == 1:
+        return rdc_ai.Reply(partials[0], total, "")
+
+    # Reduce, in rounds while the partial answers do not fit one call
+    labelled = [(chunks[i][0], partials[i]) for i in range(n)
+                if "NOTHING RELEVANT" not in partials[i][:40].upper()] or \
+               [(chunks[0][0], partials[0])]
+    reduce_budget = max(budget, REDUCE_MIN_BUDGET)
+    rounds = 0
+    while True:
+        groups = split_chunks(labelled, reduce_budget, overlap=0)
+        if len(groups) > 1 and len(groups) >= len(labelled):
+            # Nothing would merge: another round costs calls and never converges
+            raise RuntimeError(f"Partial answers do not fit {reduce_budget:,} tokens two at a time "
+                               f"({len(labelled)} left after {rounds} reduce round(s))")
+        rounds += 1
+        if on_progress:
+            on_progress(0, len(groups), f"reduce {rounds}")
+        texts = await gather([call(REDUCE_PROMPT.format(question=question), docs, REDUCE_MAX_TOKENS, "reduce")
+                              for _, docs in groups], f"reduce {rounds}")
+        if len(groups) == 1:
+            return rdc_ai.Reply(texts[0], total, "")
+        labelled = [(label, t) for (label, _), t in zip(groups, texts)]
+
+
+def run(model: str, system: str, question: str, documents, keys: dict, **kwargs) -> rdc_ai.Reply:
+    """Blocking arun() for scripts."""
+    return asyncio.run(arun(model, system, question, documents, keys, **kwargs))
+
+
+if __name__ == "__main__":
+    import json
+    import time
+    import mru_manager as mru
+    import rdc_extract
+    parser = argparse.ArgumentParser(description="RDC long-document map-reduce")
+    parser.add_argument("model", choices=rdc_ai.MODELS)
+    parser.add_argument("question")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--chunks", action="store_true", help="Only show how the files would be split")
+    args = parser.parse_args()
+    docs = [(p, rdc_extract.get_text(p)) for p in args.files]
+    budget = chunk_budget(args.model, "", args.question)
+    chunks = split_chunks(docs, budget)
+    print(f"{sum(estimate_tokens(t) for _, t in docs):,} tokens → {len(chunks)} chunks of ≤{budget:,}")
+    if args.chunks:
+        for label, chunk_docs in chunks:
+            print(f"  {sum(estimate_tokens(t) for _, t in chunk_docs):>7,}  {label}")
+    else:
+        t0 = time.perf_counter()
+        reply = run(args.model, "", args.question, docs, mru.load_settings().get("api_keys", {}),
+                    on_progress=lambda d, t, s: print(f"  {s}: {d}/{t}"))
+        print(reply.text)
+        print(json.dumps(reply.usage._asdict()), f"{time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,218 @@
+"""
+rdc_metrics.py — Phase timers, counters and profiling
+Engines wrap their phases (scan, parse, group, move, copy, API calls) in
+timer() and bump count(). While metrics are disabled — the default —
+timer() returns one shared no-op context manager and count() returns at
+once, so instrumented code costs a function call per phase.
+
+When enabled, totals are kept in memory, shown in the Diagnostics panel
+and written by flush() to <config dir>/metrics/metrics.json and
+metrics.prom (Prometheus text format). profiled() wraps a run in cProfile
+and saves <config dir>/profiles/<name>-<time>.prof plus a text summary.
+
+CLI:  python rdc_metrics.py [--prom]     # print the last flushed metrics
+"""
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager, nullcontext
+
+import mru_manager as mru
+
+_enabled = False
+_lock = threading.Lock()
+_flush_lock = threading.Lock()  # engines running side by side (rdc CLI) may flush at once
+_timers = {}                # name -> [calls, total s, max s]
+_counters = {}              # name -> value
+_started = time.time()
+_NULL = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add_time(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def timer(name: str):
+    """Context manager timing one phase (no-op while disabled)."""
+    return _Timer(name) if _enabled else _NULL
+
+
+def add_time(name: str, seconds: float):
+    if not _enabled:
+        return
+    with _lock:
+        t = _timers.get(name)
+        if t is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            if seconds > t[2]:
+                t[2] = seconds
+
+
+def count(name: str, n: int = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def timed_iter(name: str, iterable):
+    """Yield from `iterable`, adding the time spent inside next() to `name`.
+
+    Used for generators such as rdc_ignore.walk whose work happens lazily.
+    """
+    if not _enabled:
+        return iterable
+    return _timed_iter(name, iter(iterable))
+
+
+def _timed_iter(name, it):
+    clock = time.perf_counter
+    while True:
+        t0 = clock()
+        try:
+            item = next(it)
+        except StopIteration:
+            add_time(name, clock() - t0)
+            return
+        add_time(name, clock() - t0)
+        yield item
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "started": _started,
+            "taken": time.time(),
+            "timers": {k: {"calls": c, "total_s": round(t, 6), "max_s": round(m, 6),
+                           "mean_ms": round(t / c * 1000, 3)}
+                       for k, (c, t, m) in sorted(_timers.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def reset():
+    global _started
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _started = time.time()
+
+
+def _label(name: str) -> str:
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus(snap: dict = None) -> str:
+    snap = snap or snapshot()
+    lines = [
+        "# HELP rdc_phase_seconds_total Time spent in an instrumented phase.",
+        "# TYPE rdc_phase_seconds_total counter",
+    ]
+    lines += [f'rdc_phase_seconds_total{{phase="{_label(k)}"}} {v["total_s"]}' for k, v in snap["timers"].items()]
+    lines += ["# HELP rdc_phase_calls_total Times an instrumented phase ran.",
+              "# TYPE rdc_phase_calls_total counter"]
+    lines += [f'rdc_phase_calls_total{{phase="{_label(k)}"}} {v["calls"]}' for k, v in snap["timers"].items()]
+    lines += ["# HELP rdc_phase_max_seconds Longest single run of a phase.",
+              "# TYPE rdc_phase_max_seconds gauge"]
+    lines += [f'rdc_phase_max_seconds{{phase="{_label(k)}"}} {v["max_s"]}' for k, v in snap["timers"].items()]
+    lines += ["# HELP rdc_events_total Instrumented event counts.",
+              "# TYPE rdc_events_total counter"]
+    lines += [f'rdc_events_total{{name="{_label(k)}"}} {v}' for k, v in snap["counters"].items()]
+    return "\n".join(lines) + "\n"
+
+
+def metrics_dir():
+    d = mru.config_dir() / "metrics"
+    d.mkdir(exist_ok=True)
+    return d
+
+
+def flush():
+    """Write metrics.json and metrics.prom (no-op while disabled). Returns the JSON path or None."""
+    if not _enabled:
+        return None
+    snap = snapshot()
+    d = metrics_dir()
+    with _flush_lock:
+        for name, text in (("metrics.json", json.dumps(snap, indent=1)), ("metrics.prom", to_prometheus(snap))):
+            tmp = d / f"{name}.tmp"
+            tmp.write_text(text, encoding="utf-8")
+            tmp.replace(d / name)
+    return d / "metrics.json"
+
+
+def format_table(snap: dict = None) -> str:
+    """Plain-text table of timers and counters for the Diagnostics panel."""
+    snap = snap or snapshot()
+    out = [f"{'Phase':<32}{'Calls':>9}{'Total s':>11}{'Mean ms':>11}{'Max ms':>11}"]
+    for k, v in snap["timers"].items():
+        out.append(f"{k:<32}{v['calls']:>9,}{v['total_s']:>11.3f}{v['mean_ms']:>11.2f}{v['max_s'] * 1000:>11.1f}")
+    if snap["counters"]:
+        out += ["", f"{'Counter':<32}{'Value':>9}"]
+        out += [f"{k:<32}{v:>9,}" for k, v in snap["counters"].items()]
+    return "\n".join(out)
+
+
+@contextmanager
+def profiled(name: str, log=print, top: int = 40):
+    """Run the block under cProfile (metrics enabled too) and save the results."""
+    import io
+    import pstats
+    import cProfile     # not needed at startup unless --profile is given
+    was = _enabled
+    enable(True)
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield prof
+    finally:
+        prof.disable()
+        try:
+            d = mru.config_dir() / "profiles"
+            d.mkdir(exist_ok=True)
+            stem = d / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+            prof.dump_stats(f"{stem}.prof")
+            buf = io.StringIO()
+            pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(top)
+            (d / f"{stem.name}.txt").write_text(format_table() + "\n\n" + buf.getvalue(), encoding="utf-8")
+            flush()
+            log(f"Profile saved: {stem}.prof (summary: {stem.name}.txt)")
+        finally:
+            enable(was)     # after flush(), which is a no-op while disabled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC metrics viewer")
+    parser.add_argument("--prom", action="store_true", help="Print Prometheus text instead of a table")
+    args = parser.parse_args()
+    path = metrics_dir() / ("metrics.prom" if args.prom else "metrics.json")
+    if not path.exists():
+        print("No metrics written yet (enable them in Diagnostics, or run with --profile).")
+    elif args.prom:
+        print(path.read_text(encoding="utf-8"))
+    else:
+        print(format_table(json.loads(path.read_text(encoding="utf-8"))))
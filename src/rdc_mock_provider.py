@@ -0,0 +1,286 @@
+"""
+rdc_mock_provider.py — Local stand-in for the Anthropic / OpenAI HTTP APIs
+Implements just enough of both for the AI Tools paths to run offline:
+file upload / lookup / delete, Messages (incl. document file blocks and
+cache_control) and Chat Completions. Replies echo what was received, and
+usage reports simulated prompt-cache hits for repeated prefixes. Unknown
+file IDs get the provider's 404, so the re-upload path can be tested too.
+Requests with "stream": true are answered as server-sent events in each
+provider's format.
+Gemini's resumable upload protocol is not implemented.
+
+Point the dashboard at it with settings "api_base_urls":
+    {"anthropic": "http://127.0.0.1:8765", "openai": "http://127.0.0.1:8765/v1"}
+
+CLI:  python rdc_mock_provider.py [--port 8765] [--latency-ms 300] [--file-ttl 0]
+"""
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+
+class MockState:
+    def __init__(self, latency: float = 0.0, file_ttl: float = 0.0):
+        self.latency = latency
+        self.file_ttl = file_ttl    # seconds until uploaded files vanish, 0 = never
+        self.files = {}             # id -> {"name", "mime", "size", "created"}
+        self.prefixes = set()       # hashes of prompt prefixes seen (simulated cache)
+        self.stats = {"uploads": 0, "upload_bytes": 0, "messages": 0, "chat_completions": 0,
+                      "file_refs": 0, "not_found": 0}
+        self.lock = threading.Lock()
+
+    def file(self, file_id: str):
+        f = self.files.get(file_id)
+        if f and self.file_ttl and time.time() - f["created"] > self.file_ttl:
+            del self.files[file_id]
+            return None
+        return f
+
+    def cached(self, prefix: str) -> bool:
+        h = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        with self.lock:
+            hit = h in self.prefixes
+            self.prefixes.add(h)
+        return hit
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class Handler(BaseHTTPRequestHandler):
+    state: MockState = None
+    server_version = "rdc-mock/1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # ── Plumbing ─────────────────────────────────────────────────────────────
+    def _send(self, code: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, events):
+        """Send (event name or None, payload) pairs as server-sent events."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        for name, data in events:
+            head = f"event: {name}\n" if name else ""
+            body = data if isinstance(data, str) else json.dumps(data)
+            self.wfile.write(f"{head}data: {body}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.close_connection = True
+
+    def _body(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n) if n else b""
+
+    def _not_found(self, file_id: str, openai_style: bool):
+        self.state.stats["not_found"] += 1
+        msg = f"File not found: {file_id}"
+        if openai_style:
+            return self._send(404, {"error": {"message": msg, "type": "invalid_request_error",
+                                              "code": "file_not_found"}})
+        return self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": msg}})
+
+    def _path(self) -> str:
+        return urlparse(self.path).path.rstrip("/")
+
+    def _delay(self):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+    # ── Routes ───────────────────────────────────────────────────────────────
+    def do_GET(self):
+        path = self._path()
+        if path == "/_stats":
+            return self._send(200, dict(self.state.stats, files=len(self.state.files)))
+        if path.startswith("/v1/files/"):
+            fid = path.rsplit("/", 1)[1]
+            f = self.state.file(fid)
+            if f is None:
+                return self._not_found(fid, fid.startswith("file-"))
+            return self._send(200, self._file_json(fid, f))
+        self._send(404, {"error": {"message": f"No route {path}"}})
+
+    def do_DELETE(self):
+        path = self._path()
+        if path.startswith("/v1/files/"):
+            fid = path.rsplit("/", 1)[1]
+            if self.state.files.pop(fid, None) is None:
+                return self._not_found(fid, fid.startswith("file-"))
+            return self._send(200, {"id": fid, "deleted": True, "type": "file_deleted"})
+        self._send(404, {"error": {"message": f"No route {path}"}})
+
+    def do_POST(self):
+        path = self._path()
+        body = self._body()
+        self._delay()
+        if path == "/v1/files":
+            return self._upload(body)
+        if path == "/v1/messages":
+            return self._messages(json.loads(body or b"{}"))
+        if path == "/v1/chat/completions":
+            return self._chat(json.loads(body or b"{}"))
+        self._send(404, {"error": {"message": f"No route {path}"}})
+
+    def _file_json(self, fid: str, f: dict) -> dict:
+        # Union of the Anthropic and OpenAI file objects
+        return {"id": fid, "type": "file", "object": "file", "filename": f["name"],
+                "mime_type": f["mime"], "size_bytes": f["size"], "bytes": f["size"],
+                "created_at": int(f["created"]), "purpose": f.get("purpose", "user_data"),
+                "downloadable": False, "status": "processed"}
+
+    def _upload(self, body: bytes):
+        head = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode()
+        msg = BytesParser(policy=HTTP).parsebytes(head + body)
+        fields, upload = {}, None
+        for part in msg.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename():
+                upload = (part.get_filename(), part.get_content_type(), part.get_payload(decode=True))
+            else:
+                fields[name] = part.get_payload(decode=True).decode("utf-8")
+        if upload is None:
+            return self._send(400, {"error": {"message": "missing file"}})
+        # OpenAI-style ids for purpose uploads, Anthropic-style otherwise
+        fid = ("file-" if "purpose" in fields else "file_") + uuid.uuid4().hex[:24]
+        f = {"name": upload[0], "mime": upload[1], "size": len(upload[2]), "created": time.time(),
+             "purpose": fields.get("purpose", "")}
+        with self.state.lock:
+            self.state.files[fid] = f
+            self.state.stats["uploads"] += 1
+            self.state.stats["upload_bytes"] += f["size"]
+        self._send(200, self._file_json(fid, f))
+
+    def _messages(self, req: dict):
+        self.state.stats["messages"] += 1
+        system = req.get("system", "")
+        prefix = json.dumps(system) if not isinstance(system, str) else system
+        seen = []
+        for m in req.get("messages", []):
+            content = m["content"]
+            if isinstance(content, str):
+                continue
+            for block in content:
+                src = block.get("source", {})
+                if block.get("type") == "document" and src.get("type") == "file":
+                    fid = src["file_id"]
+                    if self.state.file(fid) is None:
+                        return self._not_found(fid, False)
+                    seen.append(fid)
+                    prefix += fid
+        self.state.stats["file_refs"] += len(seen)
+        total = _tokens(json.dumps(req.get("messages", []))) + _tokens(prefix)
+        for fid in seen:
+            total += _tokens("x" * self.state.files[fid]["size"])
+        cached = total - _tokens(json.dumps(req["messages"][-1:])) if self.state.cached(prefix) else 0
+        text = f"[mock {req.get('model')}] {len(req.get('messages', []))} messages, {len(seen)} files"
+        usage = {"input_tokens": total - cached, "output_tokens": _tokens(text),
+                 "cache_read_input_tokens": cached, "cache_creation_input_tokens": 0 if cached else total}
+        message = {"id": "msg_" + uuid.uuid4().hex[:24], "type": "message", "role": "assistant",
+                   "model": req.get("model"), "content": [{"type": "text", "text": text}],
+                   "stop_reason": "end_turn", "stop_sequence": None, "usage": usage}
+        if not req.get("stream"):
+            return self._send(200, message)
+        start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+        words = text.split(" ")
+        self._stream(
+            [("message_start", {"type": "message_start", "message": start}),
+             ("content_block_start", {"type": "content_block_start", "index": 0,
+                                      "content_block": {"type": "text", "text": ""}})]
+            + [("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                        "delta": {"type": "text_delta", "text": w + (" " if k < len(words) - 1 else "")}})
+               for k, w in enumerate(words)]
+            + [("content_block_stop", {"type": "content_block_stop", "index": 0}),
+               ("message_delta", {"type": "message_delta",
+                                  "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                  "usage": {"output_tokens": usage["output_tokens"]}}),
+               ("message_stop", {"type": "message_stop"})])
+
+    def _chat(self, req: dict):
+        self.state.stats["chat_completions"] += 1
+        msgs = req.get("messages", [])
+        prefix, seen = "", []
+        for m in msgs:
+            content = m["content"]
+            if isinstance(content, str):
+                if m["role"] == "system":
+                    prefix += content
+                continue
+            for part in content:
+                if part.get("type") == "file":
+                    fid = part["file"]["file_id"]
+                    if self.state.file(fid) is None:
+                        return self._not_found(fid, True)
+                    seen.append(fid)
+                    prefix += fid
+        self.state.stats["file_refs"] += len(seen)
+        total = _tokens(json.dumps(msgs))
+        # Automatic caching only applies to prompts of 1024+ tokens
+        cached = _tokens(prefix) if total >= 1024 and self.state.cached(prefix) else 0
+        text = f"[mock {req.get('model')}] {len(msgs)} messages, {len(seen)} files"
+        usage = {"prompt_tokens": total, "completion_tokens": _tokens(text),
+                 "total_tokens": total + _tokens(text), "prompt_tokens_details": {"cached_tokens": cached}}
+        cid, created = "chatcmpl-" + uuid.uuid4().hex[:24], int(time.time())
+        if not req.get("stream"):
+            return self._send(200, {
+                "id": cid, "object": "chat.completion", "created": created, "model": req.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": usage})
+
+        def chunk(delta, finish=None, with_usage=False):
+            return (None, {"id": cid, "object": "chat.completion.chunk", "created": created,
+                           "model": req.get("model"),
+                           "choices": [] if with_usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+                           "usage": usage if with_usage else None})
+
+        words = text.split(" ")
+        events = [chunk({"role": "assistant", "content": ""})]
+        events += [chunk({"content": w + (" " if k < len(words) - 1 else "")}) for k, w in enumerate(words)]
+        events.append(chunk({}, "stop"))
+        if (req.get("stream_options") or {}).get("include_usage"):
+            events.append(chunk({}, with_usage=True))
+        events.append((None, "[DONE]"))
+        self._stream(events)
+
+
+def serve(port: int = 0, latency: float = 0.0, file_ttl: float = 0.0):
+    """Start the mock server on a background thread. Returns (server, state); port 0 = any free port."""
+    state = MockState(latency, file_ttl)
+    handler = type("BoundHandler", (Handler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC mock AI provider server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every POST")
+    parser.add_argument("--file-ttl", type=float, default=0, help="Seconds before uploads expire")
+    args = parser.parse_args()
+    server, state = serve(args.port, args.latency_ms / 1000, args.file_ttl)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Mock provider on {base}")
+    print(f'  "api_base_urls": {{"anthropic": "{base}", "openai": "{base}/v1"}}')
+    print(f"  stats: {base}/_stats   (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,309 @@
+"""
+rdc_preview.py — Thumbnail and metadata previews for the Files panel
+Renders a small first-page image plus metadata for a file without opening
+it in its application:
+
+    .pptx .docx .xlsx   docProps/thumbnail.jpeg (saved by Office when the
+                        file is written) + docProps/core.xml / app.xml
+                        (title, author, last saved by, slides / pages)
+    .pdf                first page via PyMuPDF or poppler's pdftoppm when
+                        available; page count and title via pypdf
+    images              downscaled with Pillow when installed
+    anything else       size / dates, plus the start of the text that
+                        rdc_extract can pull out
+
+Results are cached by (path, size, mtime) in <config dir>/cache/preview,
+bounded to CACHE_MAX_BYTES, so a folder of decks previews instantly the
+second time. Rendering runs on a small worker pool fed by a priority
+queue: the selected file goes first, prefetch of the rows on screen after
+it, and prefetch requests from a previous scroll position are dropped.
+
+CLI:  python rdc_preview.py FILE [...] [--no-cache] [--save DIR]
+"""
+import io
+import os
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import itertools
+import threading
+import subprocess
+import xml.etree.ElementTree as ET
+from queue import PriorityQueue
+from typing import NamedTuple
+
+import rdc_extract
+import rdc_metrics as metrics
+from rdc_cache import DiskCache, source_key
+
+CACHE_MAX_BYTES = 100 * 1024 * 1024
+THUMB_PX = 320                  # longest side of rendered thumbnails
+MAX_WORKERS = 3
+SNIPPET_CHARS = 1200
+MAX_RAW_IMAGE = 2 * 1024 * 1024     # without Pillow, images up to this size are kept as they are
+
+OFFICE_EXTS = {".pptx", ".docx", ".xlsx", ".pptm", ".docm", ".xlsm"}
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp"}
+
+_NS_CORE = {"dc": "http://purl.org/dc/elements/1.1/",
+            "cp": "http://schemas.openxmlformats.org/package/2006/metadata/core-properties",
+            "dcterms": "http://purl.org/dc/terms/"}
+_NS_APP = "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}"
+
+PRIORITY_SELECTED = 0
+PRIORITY_PREFETCH = 1
+
+_cache = None
+_previewer = None
+
+
+class Preview(NamedTuple):
+    meta: dict                  # label -> value, in display order
+    image: bytes = b""          # PNG / JPEG, empty if none
+    text: str = ""              # text snippet when there is no image
+
+
+# ── Rendering ────────────────────────────────────────────────────────────────
+
+def _scale(data: bytes) -> bytes:
+    """Downscale to THUMB_PX with Pillow when installed; otherwise unchanged."""
+    try:
+        from PIL import Image       # optional
+    except ImportError:
+        return data
+    with Image.open(io.BytesIO(data)) as im:
+        if max(im.size) <= THUMB_PX:
+            return data
+        im.thumbnail((THUMB_PX, THUMB_PX))
+        out = io.BytesIO()
+        im.convert("RGB").save(out, "JPEG", quality=85)
+        return out.getvalue()
+
+
+def _office(path: str, meta: dict) -> bytes:
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        if "docProps/core.xml" in names:
+            root = ET.fromstring(zf.read("docProps/core.xml"))
+            for label, tag in (("Title", "dc:title"), ("Author", "dc:creator"),
+                               ("Last saved by", "cp:lastModifiedBy"), ("Saved", "dcterms:modified")):
+                el = root.find(tag, _NS_CORE)
+                value = (el.text or "").strip() if el is not None else ""
+                if value:
+                    meta[label] = value.replace("T", " ").rstrip("Z") if tag == "dcterms:modified" else value
+        if "docProps/app.xml" in names:
+            root = ET.fromstring(zf.read("docProps/app.xml"))
+            for label, tag in (("Slides", "Slides"), ("Pages", "Pages"), ("Words", "Words")):
+                el = root.find(_NS_APP + tag)
+                if el is not None and (el.text or "0") != "0":
+                    meta[label] = el.text
+        for thumb in ("docProps/thumbnail.jpeg", "docProps/thumbnail.jpg", "docProps/thumbnail.png"):
+            if thumb in names:
+                return _scale(zf.read(thumb))
+    return b""
+
+
+def _pdf(path: str, meta: dict) -> bytes:
+    PdfReader = rdc_extract._pdf_reader()
+    if PdfReader is not None:
+        try:
+            with open(path, "rb") as f:
+                reader = PdfReader(f)
+                meta["Pages"] = str(len(reader.pages))
+                title = (reader.metadata or {}).get("/Title")
+                if title:
+                    meta["Title"] = str(title)
+        except Exception:
+            pass
+    try:
+        import fitz                 # PyMuPDF, optional
+    except ImportError:
+        fitz = None
+    if fitz is not None:
+        with fitz.open(path) as doc:
+            page = doc[0]
+            zoom = THUMB_PX / max(page.rect.width, page.rect.height)
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+    if shutil.which("pdftoppm"):
+        r = subprocess.run(["pdftoppm", "-png", "-singlefile", "-f", "1", "-l", "1",
+                            "-scale-to", str(THUMB_PX), path, "-"], capture_output=True, timeout=30)
+        if r.returncode == 0:
+            return r.stdout
+    return b""
+
+
+def render(path: str) -> Preview:
+    """Uncached preview of one file."""
+    st = os.stat(path)
+    ext = os.path.splitext(path)[1].lower()
+    meta = {"Size": f"{st.st_size / 1e6:,.2f} MB" if st.st_size >= 1e5 else f"{st.st_size:,} bytes",
+            "Modified": time.strftime("%Y-%m-%d %H:%M", time.localtime(st.st_mtime))}
+    image = b""
+    try:
+        if ext in OFFICE_EXTS:
+            image = _office(path, meta)
+        elif ext == ".pdf":
+            try:
+                image = _pdf(path, meta)
+            except Exception as e:      # PyMuPDF raises its own (FileDataError, RuntimeError, ...)
+                meta["Preview"] = f"unavailable ({type(e).__name__})"
+        elif ext in IMAGE_EXTS:
+            with open(path, "rb") as f:
+                image = _scale(f.read())
+            if len(image) > MAX_RAW_IMAGE:      # no Pillow and too big to cache as-is
+                image = b""
+    except (OSError, zipfile.BadZipFile, ET.ParseError, subprocess.SubprocessError) as e:
+        meta["Preview"] = f"unavailable ({type(e).__name__})"
+    text = ""
+    if not image and ext in rdc_extract.SUPPORTED:
+        try:
+            text = rdc_extract.get_text(path)[:SNIPPET_CHARS]
+        except Exception:
+            pass
+    return Preview(meta, image, text)
+
+
+# ── Cache ────────────────────────────────────────────────────────────────────
+
+def cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache("preview", CACHE_MAX_BYTES)
+    return _cache
+
+
+def cached(path: str):
+    """Preview from the cache, or None (also None if the file is gone)."""
+    try:
+        key = source_key(path)
+    except OSError:
+        return None
+    hit = cache().get(key, ".json")
+    if hit is None:
+        return None
+    try:
+        data = json.loads(hit.read_text(encoding="utf-8"))
+        image = b""
+        if data.get("image"):
+            img = cache().get(key, ".img")
+            if img is None:
+                return None
+            image = img.read_bytes()
+    except (OSError, ValueError):
+        return None
+    metrics.count("preview.cache_hits")
+    return Preview(data["meta"], image, data.get("text", ""))
+
+
+def get_preview(path: str) -> Preview:
+    """Cached render keyed by (path, size, mtime)."""
+    hit = cached(path)
+    if hit is not None:
+        return hit
+    key = source_key(path)
+    with metrics.timer("preview" + os.path.splitext(path)[1].lower()):
+        p = render(path)
+    if p.image:
+        cache().put(key, p.image, ".img")
+    # Written last: a .json entry means the image (if any) is there too
+    cache().put(key, json.dumps({"meta": p.meta, "text": p.text, "image": bool(p.image)},
+                                ensure_ascii=False).encode("utf-8"), ".json")
+    return p
+
+
+# ── Worker pool ──────────────────────────────────────────────────────────────
+
+class Previewer:
+    """Background renderer. request() for the selected file, prefetch() for
+    the rows on screen; callbacks run on a worker thread (wrap them with
+    rdc_async.runner().ui_callback for widgets)."""
+
+    def __init__(self, workers: int = MAX_WORKERS):
+        self._queue = PriorityQueue()
+        self._seq = itertools.count()
+        self._generation = 0
+        self._rendering = set()     # paths a worker is on right now
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, name=f"preview-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def request(self, path: str, callback):
+        """Render `path` ahead of any prefetch; callback(path, Preview or exception)."""
+        self._queue.put((PRIORITY_SELECTED, next(self._seq), None, path, callback))
+
+    def prefetch(self, paths):
+        """Warm the cache for `paths`, replacing any earlier prefetch still queued.
+
+        Every path is queued again under the new generation (entries from the
+        old one are dropped unrun); paths already cached cost one lookup."""
+        with self._lock:
+            self._generation += 1
+            gen = self._generation
+        for p in paths:
+            self._queue.put((PRIORITY_PREFETCH, next(self._seq), gen, p, None))
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._queue.put((PRIORITY_SELECTED, next(self._seq), None, None, None))
+
+    def _work(self):
+        while True:
+            _, _, gen, path, callback = self._queue.get()
+            if path is None:
+                return
+            with self._lock:
+                if gen is not None and (gen != self._generation or path in self._rendering):
+                    metrics.count("preview.prefetch_dropped")
+                    continue
+                self._rendering.add(path)
+            try:
+                result = get_preview(path)
+            except Exception as e:
+                result = e
+            finally:
+                with self._lock:
+                    self._rendering.discard(path)
+            if callback is not None:
+                callback(path, result)
+
+
+def previewer() -> Previewer:
+    """The shared worker pool (started on first use)."""
+    global _previewer
+    if _previewer is None:
+        _previewer = Previewer()
+    return _previewer
+
+
+def shutdown():
+    """Stop the workers after their current file (called when the app quits)."""
+    global _previewer
+    if _previewer is not None:
+        _previewer.shutdown()
+        _previewer = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC file preview renderer")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--save", metavar="DIR", help="Write the thumbnails to this folder")
+    args = parser.parse_args()
+    for p in args.files:
+        t0 = time.perf_counter()
+        pv = render(p) if args.no_cache else get_preview(p)
+        print(f"── {p}  ({(time.perf_counter() - t0) * 1000:.0f} ms, "
+              f"{'image ' + format(len(pv.image), ',') + ' bytes' if pv.image else 'no image'})")
+        for k, v in pv.meta.items():
+            print(f"   {k}: {v}")
+        if pv.text:
+            print("   " + pv.text[:300].replace("\n", "\n   "))
+        if args.save and pv.image:
+            os.makedirs(args.save, exist_ok=True)
+            ext = ".png" if pv.image[:4] == b"\x89PNG" else ".jpg"
+            with open(os.path.join(args.save, os.path.basename(p) + ext), "wb") as f:
+                f.write(pv.image)
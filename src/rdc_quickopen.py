@@ -0,0 +1,383 @@
+"""
+rdc_quickopen.py — Quick-open path index
+In-memory trigram index over every file path in a rdc_index.ScanIndex.
+A query is narrowed by intersecting the posting lists of each token's
+rarest trigram (smallest first), then scored on fuzzy match, MRU recency
+and latest-version preference. A token with no match is treated as a
+typo and replaced by the closest word from the index's vocabulary.
+
+Built in the background, saved per root under the config dir
+(quickopen/<root-hash>.pkl) and updated incrementally from later scans.
+
+Latency (synthetic 500k-path index, one core): most keystrokes take
+1-5 ms. The 10 ms per-keystroke goal is NOT met in two cases, which take
+up to ~12 ms: a pasted query of several common tokens (e.g. "pitch
+investor v2", before any posting set is cached) and a keystroke that
+falls back to typo correction.
+
+CLI:  python rdc_quickopen.py "C:/RDC2" "inv deck"
+"""
+import os
+import re
+import time
+import pickle
+import hashlib
+import argparse
+from array import array
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from heapq import nlargest
+from itertools import islice
+
+import mru_manager as mru
+
+INDEX_VERSION = 2
+CANDIDATE_CAP = 500         # most candidates scored per keystroke
+SAMPLE = 1000               # ids tested to estimate how dense the hits are
+SCAN_BUDGET = 15000         # ids a dense query may test before intersecting pays off
+NARROW_ENOUGH = 64          # stop intersecting posting lists below this many ids
+POSTING_SETS = 16           # posting lists kept as sets between keystrokes
+FUZZY_WORDS = 2000          # vocabulary words compared against a typo
+FUZZY_MIN_RATIO = 0.75      # difflib similarity for a typo correction
+SHORT_TYPO = 4              # typos up to this long are also looked up by bigram
+
+_WORD = re.compile(r"[a-z]{3,}")
+
+
+def _matcher(tokens: list, lower: list):
+    """id -> True if the path contains every token. Short tokens first: the
+    trigram postings say nothing about them, so they reject the most ids."""
+    tokens = sorted(tokens, key=len)
+    if len(tokens) == 1:
+        t = tokens[0]
+        return lambda i: t in lower[i]
+    if len(tokens) == 2:
+        a, b = tokens
+        return lambda i: a in (s := lower[i]) and b in s
+    if len(tokens) == 3:
+        a, b, c = tokens
+        return lambda i: a in (s := lower[i]) and b in s and c in s
+    return lambda i: all(t in lower[i] for t in tokens)
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _bigrams(text: str) -> set:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _contains(sorted_ids: array, i: int) -> bool:
+    k = bisect_left(sorted_ids, i)
+    return k < len(sorted_ids) and sorted_ids[k] == i
+
+
+class QuickOpenIndex:
+    def __init__(self, root: str):
+        self.root = os.path.normpath(root)
+        self.paths = []             # rel posix path, None once removed
+        self.lower = []
+        self.latest = bytearray()   # 1 = newest of its version group (or unversioned)
+        self.postings = {}          # trigram -> array('I') of path ids
+        self._ids = {}              # rel path -> id
+        self._bases = None          # sorted [(basename lower, id)], built lazily
+        self.words = set()          # vocabulary (letters-only words) for typo correction
+        self._word_grams = None     # bigram / trigram -> [word], built lazily
+        self._sets = {}             # trigram -> set of ids, most recent last
+        self.removed = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ── Building ─────────────────────────────────────────────────────────────
+    def add(self, rel: str, is_latest: bool = True):
+        if rel in self._ids:
+            self.latest[self._ids[rel]] = is_latest
+            return
+        i = len(self.paths)
+        low = rel.lower()
+        self.paths.append(rel)
+        self.lower.append(low)
+        self.latest.append(1 if is_latest else 0)
+        self._ids[rel] = i
+        self._sets.clear()
+        postings = self.postings
+        for t in _trigrams(low):
+            p = postings.get(t)
+            if p is None:
+                postings[t] = array("I", (i,))
+            else:
+                p.append(i)
+        self._bases = None
+        words = _WORD.findall(low)
+        if not self.words.issuperset(words):
+            self.words.update(words)
+            self._word_grams = None
+
+    def remove(self, rel: str):
+        i = self._ids.pop(rel, None)
+        if i is not None:
+            self.paths[i] = None
+            self.removed += 1
+            self._bases = None
+
+    def sync(self, scan_index) -> tuple:
+        """Bring the index in line with a rdc_index.ScanIndex. Returns (added, removed)."""
+        current = {}
+        for rel, d in scan_index.dirs.items():
+            if not d.files:
+                continue
+            pre = rel + "/" if rel else ""
+            for f, _, older in scan_index.groups(rel):
+                current[pre + f.name] = True
+                for o in older:
+                    current[pre + o.name] = False
+        gone = [p for p in self._ids if p not in current]
+        for p in gone:
+            self.remove(p)
+        before = len(self._ids)
+        for p, is_latest in current.items():
+            self.add(p, is_latest)
+        if self.removed > max(1000, len(self.paths) // 5):
+            self._compact()
+        self._prepare()
+        return len(self._ids) - before, len(gone)
+
+    def _compact(self):
+        live = [(p, self.latest[i]) for i, p in enumerate(self.paths) if p is not None]
+        self.__init__(self.root)
+        for p, is_latest in live:
+            self.add(p, bool(is_latest))
+
+    # ── Search ───────────────────────────────────────────────────────────────
+    def _prepare(self):
+        """Build the basename table for 1-2 character queries and the
+        vocabulary bigrams / trigrams for typos (done off the UI thread)."""
+        if self._bases is None:
+            self._bases = sorted((low.rsplit("/", 1)[-1], i)
+                                 for i, low in enumerate(self.lower) if self.paths[i] is not None)
+        if self._word_grams is None:
+            grams = {}
+            for w in self.words:
+                for g in _trigrams(w) | _bigrams(w):
+                    grams.setdefault(g, []).append(w)
+            self._word_grams = grams
+
+    def _base_prefix(self, token: str):
+        """Ids whose file name starts with `token`, in name order."""
+        self._prepare()
+        bases = self._bases
+        j = bisect_left(bases, (token, -1))
+        while j < len(bases) and bases[j][0].startswith(token):
+            yield bases[j][1]
+            j += 1
+
+    def _candidates(self, tokens: list, fuzzy: bool = True) -> list:
+        long_tokens = [t for t in tokens if len(t) >= 3]
+        if not long_tokens:
+            ids = self._base_prefix(tokens[0])
+            if len(tokens) > 1:
+                ids = filter(_matcher(tokens, self.lower), islice(ids, SCAN_BUDGET))
+            return list(islice(ids, CANDIDATE_CAP))
+        # Rarest trigram posting of each token: a path containing every token
+        # is in all of them
+        rarest = []
+        for t in long_tokens:
+            best = None
+            for tri in _trigrams(t):
+                q = self.postings.get(tri)
+                if q is None:
+                    return self._fuzzy(tokens) if fuzzy else []
+                if best is None or len(q) < len(best[1]):
+                    best = (tri, q)
+            rarest.append(best)
+        rarest.sort(key=lambda tp: len(tp[1]))
+        match = _matcher(tokens, self.lower)
+        ids = rarest[0][1]
+        if len(rarest) > 1 and len(ids) > SAMPLE:
+            # Dense hits fill the cap from the head of the smallest list
+            # (early-stopping scan below); sparse ones are intersected first.
+            hits = sum(map(match, ids[:SAMPLE]))
+            if hits * SCAN_BUDGET < CANDIDATE_CAP * SAMPLE:
+                ids = self._intersect(rarest)
+        paths = self.paths
+        out = [i for i in islice(filter(match, ids), CANDIDATE_CAP) if paths[i] is not None]
+        return out if out or not fuzzy else self._fuzzy(tokens)
+
+    def _posting_set(self, tri: str, posting: array) -> set:
+        st = self._sets.pop(tri, None)
+        if st is None:
+            st = set(posting)
+            if len(self._sets) >= POSTING_SETS:
+                del self._sets[next(iter(self._sets))]
+        self._sets[tri] = st
+        return st
+
+    def _intersect(self, rarest: list) -> set:
+        """Ids in every posting list, smallest list first. Set operations stay
+        in C; once few ids are left a binary search per id is cheaper."""
+        tri, p = rarest[0]
+        ids = self._posting_set(tri, p)
+        for tri, p in rarest[1:]:
+            if len(ids) <= NARROW_ENOUGH:
+                break
+            if len(ids) * 16 < len(p):
+                ids = {i for i in ids if _contains(p, i)}
+            else:
+                # A set kept from an earlier keystroke beats walking the list
+                ids = ids.intersection(self._sets.get(tri, p))
+        return ids
+
+    def _corrections(self, token: str) -> list:
+        """Vocabulary words closest to a mistyped token, best first. Words
+        sharing a trigram with it are compared; short tokens (a 3-letter typo
+        has one trigram, and it is not in the index) go by bigrams too."""
+        self._prepare()
+        grams = _trigrams(token)
+        if len(token) <= SHORT_TYPO:
+            grams |= _bigrams(token)
+        seen = set()
+        for g in sorted(grams, key=lambda g: len(self._word_grams.get(g, ()))):
+            seen.update(self._word_grams.get(g, ()))
+            if len(seen) >= FUZZY_WORDS:
+                break
+        sm = SequenceMatcher(None, "", token)     # caches the token side
+        scored = []
+        for w in seen:
+            sm.set_seq1(w)
+            if sm.real_quick_ratio() >= FUZZY_MIN_RATIO and sm.quick_ratio() >= FUZZY_MIN_RATIO:
+                r = sm.ratio()
+                if r >= FUZZY_MIN_RATIO:
+                    scored.append((r, w))
+        return [w for _, w in sorted(scored, reverse=True)]
+
+    def _fuzzy(self, tokens: list) -> list:
+        """Typo-tolerant fallback: swap each token that is not a word of the
+        index for its closest vocabulary word and search once more."""
+        fixed = []
+        for t in tokens:
+            if len(t) >= 3 and t not in self.words:
+                t = (self._corrections(t) or [t])[0]
+            fixed.append(t)
+        return self._candidates(fixed, fuzzy=False) if fixed != tokens else []
+
+    def search(self, query: str, limit: int = 50, recent: dict = None) -> list:
+        """Ranked [(score, absolute path)].
+
+        `recent` maps absolute paths to MRU rank (0 = most recent).
+        """
+        tokens = query.lower().replace("\\", "/").split()
+        if not tokens or not self._ids:
+            return []
+        lower, latest = self.lower, self.latest
+        boost = {}
+        for path, rank in (recent or {}).items():
+            i = self._ids.get(self._rel(path))
+            if i is not None and all(t in lower[i] for t in tokens):
+                boost[i] = 20 - rank
+        cands = self._candidates(tokens)
+        seen = set(cands)
+        cands.extend(i for i in boost if i not in seen)
+
+        def score(i):
+            low = lower[i]
+            cut = low.rfind("/") + 1
+            s = 3.0 if latest[i] else -4.0
+            for t in tokens:
+                k = low.find(t, cut)
+                if k >= 0:
+                    s += 12 if k == cut else 8
+                else:
+                    s += 3 if t in low else 1   # 1 = fuzzy-only match
+            return s - len(low) * 0.005 + boost.get(i, 0)
+
+        top = nlargest(limit, ((score(i), i) for i in cands))
+        root, paths = self.root, self.paths
+        return [(sc, os.path.join(root, *paths[i].split("/"))) for sc, i in top]
+
+    def _rel(self, path: str) -> str:
+        try:
+            rel = os.path.relpath(path, self.root)
+        except ValueError:          # different drive on Windows
+            return ""
+        return rel.replace(os.sep, "/")
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+    def save(self, path=None):
+        path = path or index_path(self.root)
+        if self.removed:
+            self._compact()
+        data = {
+            "version": INDEX_VERSION,
+            "root": self.root,
+            "paths": self.paths,
+            "latest": bytes(self.latest),
+            "words": sorted(self.words),
+            "postings": {t: p.tobytes() for t, p in self.postings.items()},
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_data(cls, data: dict) -> "QuickOpenIndex":
+        q = cls(data["root"])
+        q.paths = data["paths"]
+        q.lower = [p.lower() for p in q.paths]
+        q.latest = bytearray(data["latest"])
+        q._ids = {p: i for i, p in enumerate(q.paths)}
+        q.words = set(data["words"])
+        for t, raw in data["postings"].items():
+            a = array("I")
+            a.frombytes(raw)
+            q.postings[t] = a
+        q._prepare()
+        return q
+
+
+def index_path(root: str):
+    key = hashlib.sha1(os.path.normcase(os.path.normpath(root)).encode("utf-8")).hexdigest()[:16]
+    d = mru.config_dir() / "quickopen"
+    d.mkdir(exist_ok=True)
+    return d / f"{key}.pkl"
+
+
+def load(root: str):
+    """Saved quick-open index for `root`, or None. The file is our own cache in the config dir."""
+    path = index_path(root)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return QuickOpenIndex.from_data(data)
+    except Exception:
+        return None
+
+
+def recent_ranks() -> dict:
+    return {os.path.normpath(p): r for r, p in enumerate(mru.get_recent_files())}
+
+
+if __name__ == "__main__":
+    import rdc_index
+    parser = argparse.ArgumentParser(description="RDC quick-open search")
+    parser.add_argument("root", help="Indexed root folder")
+    parser.add_argument("query", help="Search text")
+    args = parser.parse_args()
+    q = load(args.root)
+    if q is None:
+        idx = rdc_index.load(args.root) or rdc_index.scan(args.root)
+        q = QuickOpenIndex(idx.root)
+        q.sync(idx)
+        q.save()
+    t0 = time.perf_counter()
+    results = q.search(args.query, recent=recent_ranks())
+    ms = (time.perf_counter() - t0) * 1000
+    for score, path in results[:20]:
+        print(f"{score:6.1f}  {path}")
+    print(f"\n{len(results)} results in {ms:.1f} ms ({len(q)} paths)")
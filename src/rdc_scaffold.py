@@ -1,94 +1,211 @@
 """
 rdc_scaffold.py — Build the RDC2 folder tree
-Creates the standard 149-directory structure across all companies.
+Creates the folder structure described by a declarative template
+(templates/rdc2_scaffold.json by default, JSON or YAML).
 
-CLI:  python rdc_scaffold.py "C:/RDC2" [--dry-run]
+Each parent folder is listed once to find what is missing; only missing
+folders are created, level by level, in parallel. Verify mode reports
+drift between the template and the real tree without touching it.
+The root may be a local folder or an object-store URL (see rdc_storage),
+where the listings come from one bulk prefix listing.
+
+Template format:
+    {
+      "readme_file": "_README.txt",            # dropped in each top-level folder
+      "readme": ["line", ...],
+      "sets":    {"standard": ["01-Corp-Legal", ...]},
+      "folders": {"01 - RDC": ["@standard", "09-Platform-Models", "10-Dataroom/01-Legal"]}
+    }
+    "@name" expands a set; "a/b" creates nested folders.
+
+CLI:  python rdc_scaffold.py "C:/RDC2" [--dry-run] [--verify] [--template FILE]
 """
-import os
+import sys
+import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-STANDARD_SUBS = [
-    "01-Corp-Legal",
-    "02-Business-Dev",
-    "03-Decks-Investor",
-    "04-Marketing",
-    "05-Research-Articles",
-    "06-Projects",
-    "07-Resumes-BIOs",
-    "08-Vendors-Partners",
-    "_archive",
-]
-
-COMPANIES = {
-    "00 - _AI-Training":        [],
-    "01 - RDC":                 STANDARD_SUBS + ["09-Platform-Models", "10-Website-Social"],
-    "02 - The-Place-Fund":      STANDARD_SUBS + ["09-LP-Returns", "10-Dataroom"],
-    "03 - Future-Places-SAAS":  STANDARD_SUBS + ["09-SaaS-Platform", "10-Dataroom"],
-    "04 - Living-Building-Systems": STANDARD_SUBS + ["09-Engineering", "10-Dataroom"],
-    "05 - Life-AI":             STANDARD_SUBS + ["09-AI-Exports", "10-Agents-Workflows"],
-    "06 - Regen-Consulting":    STANDARD_SUBS,
-    "07 - Division-Six":        STANDARD_SUBS,
-    "08 - Demeter":             STANDARD_SUBS,
-    "09 - SPIG":                STANDARD_SUBS,
-    "10 - Regenity":            STANDARD_SUBS,
-    "11 - Datarooms-Shared":    ["_archive"],
-    "12 - FBI":                 STANDARD_SUBS,
-    "13 - SSA":                 STANDARD_SUBS,
-    "90 - Dave-IP":             STANDARD_SUBS,
-    "97 - Uploads":             [],
-    "98 - Code":                [
-        "01-RDC-Dashboard",
-        "02-Archive-Tools",
-        "03-AI-Tools",
-        "04-VB-Outlook",
-        "05-VB-PowerPoint",
-        "06-VB-Word",
-        "07-Utilities",
-        "_archive",
-    ],
-    "99 - Office-Tools":        ["_archive"],
-}
-
-README = """RDC2 File Naming Convention
-============================
-Format:  CompanyCode_Purpose_Type_VX.XX.ext
-
-Company codes: RDC, TPF, FP, LBS, LifeAI, RC, D6, DEM, SPIG, REG
-Types:         Deck, Exec_Sum, One_Pager, Overview, BizPlan, NDA, PPM
-Training tag:  CompanyCode_Purpose_TRAIN_VX.XX.ext  (syncs to 00-AI-Training)
-Archive:       Older versions auto-move to _archive/ via rdc_archive.py
-"""
+import rdc_metrics as metrics
+import rdc_storage
+
+MAX_WORKERS = 8
+
+
+def _template_dir() -> Path:
+    base = getattr(sys, "_MEIPASS", None) or Path(__file__).parent
+    return Path(base) / "templates"
+
+
+DEFAULT_TEMPLATE = _template_dir() / "rdc2_scaffold.json"
+
+
+def load_template(path=None) -> dict:
+    path = Path(path) if path else DEFAULT_TEMPLATE
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml     # optional, and only needed for YAML templates
+        except ImportError:
+            raise RuntimeError("PyYAML is not installed — use a .json template or `pip install pyyaml`.")
+        return yaml.safe_load(text) or {}
+    return json.loads(text)
+
+
+def expand(template: dict) -> list:
+    """Ordered list of relative folder paths (parents before children)."""
+    sets = template.get("sets", {})
+    out, seen = [], set()
+
+    def add(rel):
+        parts = rel.split("/")
+        for i in range(1, len(parts) + 1):
+            p = "/".join(parts[:i])
+            if p not in seen:
+                seen.add(p)
+                out.append(p)
+
+    for top, subs in template.get("folders", {}).items():
+        add(top)
+        for sub in subs or []:
+            if sub.startswith("@"):
+                if sub[1:] not in sets:
+                    raise ValueError(f"Template set not found: {sub}")
+                for s in sets[sub[1:]]:
+                    add(f"{top}/{s}")
+            else:
+                add(f"{top}/{sub.strip('/')}")
+    return out
+
+
+def _survey(store, rels: list, pool, also=()) -> dict:
+    """List every template parent (plus `also`) that exists — once each, in parallel."""
+    parents = {r.rpartition("/")[0] for r in rels} | set(also)
+    listings = {}
+    # Walk level by level so children of missing folders are never listed
+    by_depth = {}
+    for p in parents:
+        by_depth.setdefault(0 if p == "" else p.count("/") + 1, []).append(p)
+    for depth in sorted(by_depth):
+        todo = [p for p in by_depth[depth]
+                if p == "" or _exists(listings, p)]
+        for p, result in zip(todo, pool.map(store.listdir, todo)):
+            listings[p] = result
+    return listings
 
 
-def build(root: str, dry_run: bool = False, log=print):
-    root = Path(root)
-    created = 0
-    for company, subs in COMPANIES.items():
-        co_path = root / company
+def _exists(listings: dict, rel: str) -> bool:
+    parent, _, name = rel.rpartition("/")
+    entry = listings.get(parent)
+    return entry is not None and name in entry[0]
+
+
+def build(root: str, dry_run: bool = False, log=print, template=None, workers: int = MAX_WORKERS,
+          backend=None):
+    """Create missing template folders. `template` is a dict or a file path.
+
+    `workers` caps the listing / mkdir threads (the rdc CLI splits one
+    budget across the roots it runs at once).
+    """
+    store = backend or rdc_storage.backend_for(root)
+    tpl = template if isinstance(template, dict) else load_template(template)
+    rels = expand(tpl)
+    readme_name = tpl.get("readme_file", "_README.txt")
+    readme = "\n".join(tpl.get("readme", [])) + "\n"
+
+    with ThreadPoolExecutor(max(1, workers)) as pool:
         if not dry_run:
-            co_path.mkdir(parents=True, exist_ok=True)
-        else:
-            log(f"  [DRY] mkdir {co_path}")
-        created += 1
-        for sub in subs:
-            sub_path = co_path / sub
+            store.mkdir("")
+        tops = tpl.get("folders", {}) if tpl.get("readme") else ()
+        with metrics.timer("scaffold.survey"):
+            listings = _survey(store, rels, pool, also=tops)
+        missing = [r for r in rels if not _exists(listings, r)]
+
+        levels = {}
+        for r in missing:
+            levels.setdefault(r.count("/"), []).append(r)
+        for depth in sorted(levels):
+            for r in levels[depth]:
+                log(f"  {'[DRY] ' if dry_run else ''}mkdir {store.display(r)}")
             if not dry_run:
-                sub_path.mkdir(exist_ok=True)
-            else:
-                log(f"  [DRY] mkdir {sub_path}")
-            created += 1
-        # Drop README in company root
-        readme_path = co_path / "_README.txt"
-        if not dry_run and not readme_path.exists():
-            readme_path.write_text(README, encoding="utf-8")
-    log(f"\nScaffold complete: {created} directories {'(dry run)' if dry_run else 'created'}.")
-    return created
+                with metrics.timer("scaffold.mkdir"):
+                    list(pool.map(store.mkdir, levels[depth]))
+
+        # Drop README in each top-level folder
+        if not dry_run and tpl.get("readme"):
+            for top in tpl.get("folders", {}):
+                entry = listings.get(top)
+                if entry is None or readme_name not in entry[1]:
+                    with metrics.timer("scaffold.readme"):
+                        store.write_text(f"{top}/{readme_name}", readme)
+
+    metrics.count("scaffold.dirs_created" if not dry_run else "scaffold.dirs_missing", len(missing))
+    metrics.flush()
+    log(f"\nScaffold complete: {len(missing)} directories "
+        f"{'to create (dry run)' if dry_run else 'created'}, "
+        f"{len(rels) - len(missing)} already present.")
+    return len(missing)
+
+
+def verify(root: str, log=print, template=None, workers: int = MAX_WORKERS, backend=None) -> dict:
+    """Report drift between the template and the tree. Makes no changes.
+
+    Returns {"missing": [...], "extra": [...], "missing_readme": [...]}
+    with paths relative to root. "extra" lists undeclared folders directly
+    under the root or under a folder the template declares children for
+    (hidden folders skipped); leaf folders' contents are user data.
+    """
+    store = backend or rdc_storage.backend_for(root)
+    tpl = template if isinstance(template, dict) else load_template(template)
+    rels = expand(tpl)
+    expected = set(rels)
+    declared_parents = {r.rpartition("/")[0] for r in rels}
+    readme_name = tpl.get("readme_file", "_README.txt")
+    drift = {"missing": [], "extra": [], "missing_readme": []}
+
+    with ThreadPoolExecutor(max(1, workers)) as pool:
+        tops = tpl.get("folders", {}) if tpl.get("readme") else ()
+        with metrics.timer("scaffold.survey"):
+            listings = _survey(store, rels, pool, also=tops)
+
+    drift["missing"] = [r for r in rels if not _exists(listings, r)]
+    for parent, entry in listings.items():
+        if entry is None or parent not in declared_parents:
+            continue
+        for name in sorted(entry[0]):
+            rel = f"{parent}/{name}" if parent else name
+            if rel not in expected and not name.startswith("."):
+                drift["extra"].append(rel)
+    if tpl.get("readme"):
+        drift["missing_readme"] = [
+            top for top in tpl.get("folders", {})
+            if listings.get(top) is not None and readme_name not in listings[top][1]
+        ]
+
+    for r in drift["missing"]:
+        log(f"  MISSING: {r}/")
+    for r in drift["extra"]:
+        log(f"  EXTRA:   {r}/")
+    for r in drift["missing_readme"]:
+        log(f"  NO README: {r}/")
+    total = sum(len(v) for v in drift.values())
+    log(f"\nVerify complete: {'no drift' if not total else f'{total} differences'} "
+        f"({len(rels)} template folders).")
+    return drift
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="RDC2 Scaffold Builder")
     parser.add_argument("root", help="Target root folder (e.g. C:/RDC2)")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--verify", action="store_true", help="Report drift only, no changes")
+    parser.add_argument("--template", help="Template file (.json / .yaml)")
+    parser.add_argument("--profile", action="store_true", help="Run under cProfile, save to the config dir")
     args = parser.parse_args()
-    build(args.root, dry_run=args.dry_run)
+    with metrics.profiled("scaffold") if args.profile else metrics.timer("scaffold.run"):
+        if args.verify:
+            drift = verify(args.root, template=args.template)
+        else:
+            build(args.root, dry_run=args.dry_run, template=args.template)
+    if args.verify:
+        sys.exit(1 if any(drift.values()) else 0)
@@ -0,0 +1,414 @@
+"""
+rdc_scheduler.py — Off-peak maintenance scheduler
+Runs the heavy jobs (archive, training sync, duplicate report and a full
+index rebuild, which also records a storage snapshot for rdc_stats) on
+every configured root while the dashboard sits in the tray, rather than
+during the workday.
+
+A job is due once its interval has passed since its last run and either
+the clock is inside its time window ("01:00-05:00", may wrap midnight) or
+the user has been idle for its idle_minutes. A job with neither runs on
+its interval alone. Nothing runs on battery unless the settings allow it.
+Runs missed while the app was closed are coalesced into one run, not
+replayed; how many were folded in is kept in the state.
+
+State (last run, outcome, duration, coalesced count) is kept in
+<config dir>/schedule_state.json, so intervals survive restarts. A run
+cut short by a crash or quit is marked interrupted and becomes due again.
+Job output is appended to <config dir>/maintenance.log.
+
+Jobs run one at a time on a dedicated worker thread at background
+priority. On Linux that is nice +10 and ionice best-effort level 7, on
+macOS the background QoS class (CPU and I/O), and on Windows
+THREAD_MODE_BACKGROUND. An idle-triggered run stops between roots when
+the user comes back.
+
+Settings:  "schedule_enabled": false, "schedule_on_battery": false,
+           "schedule": {"archive": {"enabled": true, "interval_hours": 24,
+                                    "window": "01:00-05:00", "idle_minutes": 0}, ...}
+
+CLI:  python rdc_scheduler.py [--status] [--due] [--run JOB ...]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import ctypes
+import platform
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import mru_manager as mru
+import rdc_index
+import rdc_quickopen
+import rdc_stats
+import rdc_storage
+from rdc_archive import run_archive
+from rdc_dedupe import run_dedupe
+from rdc_training_sync import run_sync
+
+JOBS = ("archive", "sync", "dedupe", "index")
+
+REMOTE_JOBS = ("archive", "sync")      # the jobs that also run on object-store roots
+DEFAULT_SCHEDULE = {
+    "archive": {"enabled": True, "interval_hours": 24, "window": "01:00-05:00", "idle_minutes": 0},
+    "sync":    {"enabled": True, "interval_hours": 24, "window": "01:00-05:00", "idle_minutes": 45},
+    "dedupe":  {"enabled": True, "interval_hours": 168, "window": "02:00-05:00", "idle_minutes": 0},
+    "index":   {"enabled": True, "interval_hours": 24, "window": "", "idle_minutes": 15},
+}
+
+LOG_MAX_BYTES = 1024 * 1024     # maintenance.log is rotated to .1 past this
+NICE = 10
+IOPRIO_BE_LOWEST = (2 << 13) | 7    # IOPRIO_CLASS_BE, level 7
+_IOPRIO_SET = {"x86_64": 251, "amd64": 251, "i386": 289, "i686": 289, "aarch64": 30, "arm64": 30,
+               "armv7l": 314, "ppc64le": 273}
+
+_worker = None
+_stop = threading.Event()
+
+
+# ── System probes ────────────────────────────────────────────────────────────
+def idle_seconds():
+    """Seconds since the last keyboard / mouse input, or None if unknown."""
+    try:
+        if sys.platform == "win32":
+            class LASTINPUTINFO(ctypes.Structure):
+                _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+            info = LASTINPUTINFO(ctypes.sizeof(LASTINPUTINFO), 0)
+            if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+                return None
+            return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+        if sys.platform == "darwin":
+            out = subprocess.run(["ioreg", "-c", "IOHIDSystem", "-d", "4"], capture_output=True,
+                                 text=True, timeout=5).stdout
+            for line in out.splitlines():
+                if '"HIDIdleTime"' in line:
+                    return int(line.rsplit("=", 1)[1]) / 1e9
+            return None
+        out = subprocess.run(["xprintidle"], capture_output=True, text=True, timeout=5)
+        return int(out.stdout.strip()) / 1000 if out.returncode == 0 else None
+    except (OSError, ValueError, AttributeError, subprocess.SubprocessError):
+        return None
+
+
+def on_battery() -> bool:
+    """True when running from a battery (False if unknown or on mains)."""
+    try:
+        if sys.platform == "win32":
+            class SYSTEM_POWER_STATUS(ctypes.Structure):
+                _fields_ = [("ACLineStatus", ctypes.c_ubyte), ("BatteryFlag", ctypes.c_ubyte),
+                            ("BatteryLifePercent", ctypes.c_ubyte), ("SystemStatusFlag", ctypes.c_ubyte),
+                            ("BatteryLifeTime", ctypes.c_ulong), ("BatteryFullLifeTime", ctypes.c_ulong)]
+            status = SYSTEM_POWER_STATUS()
+            if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+                return False
+            return status.ACLineStatus == 0
+        if sys.platform == "darwin":
+            out = subprocess.run(["pmset", "-g", "batt"], capture_output=True, text=True, timeout=5).stdout
+            return "'Battery Power'" in out
+        mains = []
+        for supply in glob.glob("/sys/class/power_supply/*"):
+            with open(os.path.join(supply, "type")) as f:
+                if f.read().strip() == "Mains":
+                    with open(os.path.join(supply, "online")) as g:
+                        mains.append(g.read().strip() == "1")
+        return bool(mains) and not any(mains)
+    except (OSError, ValueError, AttributeError, subprocess.SubprocessError):
+        return False
+
+
+def lower_priority():
+    """Put the calling thread at background CPU and I/O priority (best effort)."""
+    try:
+        if sys.platform == "win32":
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+            k32 = ctypes.windll.kernel32
+            k32.SetThreadPriority(k32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        elif sys.platform == "darwin":
+            QOS_CLASS_BACKGROUND = 0x09
+            ctypes.CDLL(None).pthread_set_qos_class_self_np(QOS_CLASS_BACKGROUND, 0)
+        else:
+            # On Linux nice and ioprio are per thread, so only the worker slows down
+            tid = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, tid, min(19, os.getpriority(os.PRIO_PROCESS, tid) + NICE))
+            nr = _IOPRIO_SET.get(platform.machine().lower())
+            if nr:
+                ctypes.CDLL(None, use_errno=True).syscall(nr, 1, tid, IOPRIO_BE_LOWEST)  # IOPRIO_WHO_PROCESS
+    except (OSError, AttributeError):
+        pass
+
+
+def worker() -> ThreadPoolExecutor:
+    """The single low-priority thread maintenance jobs run on."""
+    global _worker
+    if _worker is None:
+        _stop.clear()
+        _worker = ThreadPoolExecutor(1, thread_name_prefix="rdc-maint", initializer=lower_priority)
+    return _worker
+
+
+def shutdown():
+    """Stop after the current root and drop queued runs (called when the app quits)."""
+    global _worker
+    _stop.set()
+    if _worker is not None:
+        _worker.shutdown(wait=False, cancel_futures=True)
+        _worker = None
+
+
+# ── Windows of time ──────────────────────────────────────────────────────────
+def parse_window(text: str):
+    """"HH:MM-HH:MM" → (start, end) in minutes after midnight, or None if blank."""
+    if not text or not text.strip():
+        return None
+    try:
+        start, end = (t.strip() for t in text.split("-"))
+        (h1, m1), (h2, m2) = (map(int, start.split(":")), map(int, end.split(":")))
+    except ValueError:
+        raise ValueError(f"Bad time window {text!r} — use HH:MM-HH:MM")
+    return h1 * 60 + m1, h2 * 60 + m2
+
+
+def in_window(text: str, now: datetime) -> bool:
+    w = parse_window(text)
+    if w is None:
+        return False
+    start, end = w
+    m = now.hour * 60 + now.minute
+    return start <= m < end if start <= end else (m >= start or m < end)
+
+
+def schedule(settings: dict) -> dict:
+    """Job configs: the defaults overlaid with settings["schedule"]."""
+    user = settings.get("schedule") or {}
+    return {job: dict(DEFAULT_SCHEDULE[job], **user.get(job, {})) for job in JOBS}
+
+
+# ── Persisted state ──────────────────────────────────────────────────────────
+class ScheduleState:
+    def __init__(self, path=None):
+        self.path = path or (mru.config_dir() / "schedule_state.json")
+        self._lock = threading.Lock()
+        self.jobs = {}              # job -> {last_run, last_ok, last_result, duration_s, coalesced, ...}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.jobs = json.load(f)
+        except (OSError, ValueError):
+            pass
+        for st in self.jobs.values():
+            if st.pop("running_since", None):
+                st.update(last_ok=False, last_result="interrupted")
+
+    def get(self, job: str) -> dict:
+        return self.jobs.get(job, {})
+
+    def started(self, job: str, reason: str, coalesced: int):
+        with self._lock:
+            self.jobs.setdefault(job, {}).update(running_since=time.time(), reason=reason,
+                                                 coalesced=coalesced)
+            self.save()
+
+    def finished(self, job: str, ok: bool, result: str, duration: float, complete: bool = True):
+        with self._lock:
+            st = self.jobs.setdefault(job, {})
+            st.pop("running_since", None)
+            st.update(last_ok=ok, last_result=result, duration_s=round(duration, 1), last_attempt=time.time())
+            if complete:
+                st["last_run"] = time.time()
+            self.save()
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+# ── Scheduler ────────────────────────────────────────────────────────────────
+def run_job(job: str, root: str, settings: dict, log) -> str:
+    """Run one job on one root. Returns a one-line summary."""
+    ignore = settings.get("ignore_rules", [])
+    if job == "archive":
+        return f"{run_archive(root, log_callback=log, ignore=ignore)} archived"
+    if job == "sync":
+        added, removed, _ = run_sync(root, log_callback=log, ignore=ignore)
+        return f"{added} added, {removed} removed"
+    if job == "dedupe":
+        return f"{len(run_dedupe(root, log_callback=log, ignore=ignore))} duplicate groups"
+    if job == "index":
+        index = rdc_index.scan(root, previous=None, ignore=ignore, log=log)
+        index.save()
+        quick = rdc_quickopen.load(index.root) or rdc_quickopen.QuickOpenIndex(index.root)
+        quick.sync(index)
+        quick.save()
+        rdc_stats.record_snapshot(index.root, rdc_stats.analyze(rdc_stats.columns(index.root, index=index)))
+        return f"{index.file_count():,} files indexed"
+    raise ValueError(f"Unknown job: {job}")
+
+
+class Scheduler:
+    def __init__(self, settings: dict, state: ScheduleState = None,
+                 idle=idle_seconds, battery=on_battery, clock=datetime.now):
+        self.settings = settings
+        self.state = state or ScheduleState()
+        self._idle = idle
+        self._battery = battery
+        self._clock = clock
+        self._running = set()
+
+    def due(self, force: bool = False) -> list:
+        """[(job, reason, coalesced runs)] that should run now, in JOBS order.
+
+        force=True returns every enabled job (the "Run maintenance now" action).
+        """
+        if not force and (not self.settings.get("schedule_enabled")
+                          or (self._battery() and not self.settings.get("schedule_on_battery"))):
+            return []
+        now = self._clock()
+        ts = now.timestamp()
+        idle = None
+        out = []
+        for job, cfg in schedule(self.settings).items():
+            if not cfg.get("enabled") or job in self._running:
+                continue
+            if force:
+                out.append((job, "manual", 0))
+                continue
+            interval = max(0.25, float(cfg.get("interval_hours") or 24)) * 3600
+            last = self.state.get(job).get("last_run", 0)
+            if last and ts - last < interval:
+                continue
+            if cfg.get("window") and in_window(cfg["window"], now):
+                reason = "window"
+            elif cfg.get("idle_minutes"):
+                if idle is None:
+                    idle = self._idle()
+                if idle is None or idle < cfg["idle_minutes"] * 60:
+                    continue
+                reason = "idle"
+            elif not cfg.get("window"):
+                reason = "interval"
+            else:
+                continue
+            out.append((job, reason, max(0, int((ts - last) // interval) - 1) if last else 0))
+        return out
+
+    def _keep_going(self, job: str, reason: str) -> bool:
+        if _stop.is_set():
+            return False
+        if reason != "idle":
+            return True
+        cfg = schedule(self.settings)[job]
+        idle = self._idle()
+        return (idle is not None and idle >= cfg["idle_minutes"] * 60) or \
+            in_window(cfg.get("window", ""), self._clock())
+
+    def run(self, job: str, reason: str = "manual", coalesced: int = 0, log=None) -> tuple:
+        """Run `job` on every root (blocking; call it on worker()). Returns (ok, summary)."""
+        self._running.add(job)
+        self.state.started(job, reason, coalesced)
+        t0 = time.perf_counter()
+        results, ok, complete = [], True, True
+        with _MaintenanceLog(log) as out:
+            out(f"── {job} ({reason}{f', {coalesced} missed runs coalesced' if coalesced else ''}) ──")
+            try:
+                for root in mru.roots(self.settings):
+                    if not self._keep_going(job, reason):
+                        out("Stopped: user active again or app quitting; the rest runs next time.")
+                        complete = False
+                        break
+                    if rdc_storage.is_remote(root):
+                        if job not in REMOTE_JOBS:
+                            continue        # dedupe / index need a local folder
+                    elif not os.path.isdir(root):
+                        results.append(f"{os.path.basename(root) or root}: not found")
+                        ok = False
+                        continue
+                    try:
+                        results.append(f"{os.path.basename(root) or root}: {run_job(job, root, self.settings, out)}")
+                    except Exception as e:
+                        results.append(f"{os.path.basename(root) or root}: ❌ {e}")
+                        out(f"ERROR {root}: {type(e).__name__}: {e}")
+                        ok = False
+            finally:
+                summary = "; ".join(results) or "no roots configured"
+                self.state.finished(job, ok, summary, time.perf_counter() - t0, complete)
+                self._running.discard(job)
+                out(f"{job}: {summary}")
+        return ok, summary
+
+    def run_due(self, due: list, log=None) -> list:
+        """Run several due jobs in turn. Returns [(job, ok, summary)]."""
+        out = []
+        for job, reason, coalesced in due:
+            if _stop.is_set():
+                break
+            out.append((job,) + self.run(job, reason, coalesced, log))
+        return out
+
+    def status(self) -> list:
+        """Lines describing each job's last run and schedule, for the UI and CLI."""
+        lines = []
+        for job, cfg in schedule(self.settings).items():
+            st = self.state.get(job)
+            when = datetime.fromtimestamp(st["last_run"]).strftime("%Y-%m-%d %H:%M") \
+                if st.get("last_run") else "never"
+            mark = "" if "last_ok" not in st else ("✓ " if st["last_ok"] else "✗ ")
+            trigger = " or ".join(filter(None, [cfg.get("window") and f"in {cfg['window']}",
+                                                cfg.get("idle_minutes") and f"when idle {cfg['idle_minutes']} min"]))
+            lines.append(f"{job:<8} {'on ' if cfg.get('enabled') else 'off'} every "
+                         f"{cfg.get('interval_hours')}h{' ' + trigger if trigger else ''} · last {when} "
+                         f"{mark}{st.get('last_result', '')}".rstrip())
+        return lines
+
+
+class _MaintenanceLog:
+    """Appends job output to maintenance.log (and forwards it to `log`)."""
+
+    def __init__(self, log=None):
+        self.log = log
+        self.path = mru.config_dir() / "maintenance.log"
+
+    def __enter__(self):
+        if self.path.exists() and self.path.stat().st_size > LOG_MAX_BYTES:
+            os.replace(self.path, f"{self.path}.1")
+        self._f = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def __call__(self, msg):
+        for line in str(msg).splitlines():
+            if line.strip():
+                self._f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S}  {line}\n")
+        self._f.flush()
+        if self.log:
+            self.log(msg)
+
+    def __exit__(self, *exc):
+        self._f.close()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC off-peak maintenance scheduler")
+    parser.add_argument("--status", action="store_true", help="Show each job's schedule and last run")
+    parser.add_argument("--due", action="store_true", help="Run the jobs that are due now, then exit")
+    parser.add_argument("--run", nargs="+", choices=JOBS, metavar="JOB",
+                        help=f"Run these jobs now ({', '.join(JOBS)})")
+    args = parser.parse_args()
+    sched = Scheduler(mru.load_settings())
+    if args.run or args.due:
+        lower_priority()
+        due = [(j, "manual", 0) for j in args.run] if args.run else sched.due()
+        if not due:
+            print("Nothing due.")
+        results = sched.run_due(due, log=print)
+        sys.exit(0 if all(ok for _, ok, _ in results) else 3)
+    idle = idle_seconds()
+    print(f"Scheduler {'enabled' if sched.settings.get('schedule_enabled') else 'disabled'} · "
+          f"idle {'unknown' if idle is None else f'{idle:.0f}s'} · "
+          f"{'on battery' if on_battery() else 'on mains'}\n")
+    print("\n".join(sched.status()))
@@ -0,0 +1,430 @@
+"""
+rdc_stats.py — Storage analytics over the scan index
+Where the space and the file count go: per top-level (company) folder,
+in _archive/, per document type (Deck, PPM, NDA… from the RDC naming
+scheme), per extension, how many versions pile up per document, size
+and version histograms, the documents with the most archived bytes, and
+growth from one scan to the next.
+
+Nothing is walked: the scan index is flattened once into columns
+(size, mtime and small integer codes for folder / type / extension /
+version group) and every table is a bincount over them — numpy when
+installed, plain loops otherwise. The columns are cached next to the
+index (index/<root-hash>.cols) until the next scan, so a report over a
+1M-file index is a file read plus a few vector ops.
+
+Each new scan adds one line to stats/<root-hash>.jsonl in the config dir;
+the Growth table compares those snapshots.
+
+CLI:  python rdc_stats.py "C:/RDC2" [--top 20] [--json] [--rescan]
+"""
+import os
+import json
+import time
+import struct
+import argparse
+from array import array
+from datetime import datetime, timezone
+
+import mru_manager as mru
+import rdc_index
+import rdc_metrics as metrics
+from rdc_versions import DOC_TYPES, parse_filename
+
+COLS_VERSION = 1
+TOP_N = 20
+ARCHIVE_DIR = "_archive"
+
+SIZE_EDGES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000, 1_000_000_000)
+SIZE_LABELS = ("< 1 KB", "1–10 KB", "10–100 KB", "100 KB–1 MB", "1–10 MB", "10–100 MB",
+               "100 MB–1 GB", "≥ 1 GB")
+VERSION_EDGES = (2, 3, 4, 6, 11, 21)
+VERSION_LABELS = ("1", "2", "3", "4–5", "6–10", "11–20", "> 20")
+MONTHS = 12
+
+# name -> array typecode; group is -1 for unversioned files
+_COLUMNS = (("size", "q"), ("mtime", "d"), ("top", "i"), ("archived", "b"),
+            ("doc_type", "i"), ("ext", "i"), ("group", "i"))
+_DOC_TYPES = {t.lower(): t for t in DOC_TYPES}
+
+
+def _numpy():
+    try:
+        import numpy    # optional: vectorized aggregation
+        return numpy
+    except ImportError:
+        return None
+
+
+class Columns:
+    """The scan index as flat columns plus the string tables their codes index."""
+
+    def __init__(self, scanned_at: float, tops: list, doc_types: list, exts: list,
+                 groups: list, cols: dict, stamp: str = ""):
+        self.scanned_at = scanned_at
+        self.stamp = stamp              # size:mtime of the saved index these came from
+        self.tops = tops
+        self.doc_types = doc_types
+        self.exts = exts
+        self.groups = groups            # "folder/base.ext" per version group
+        self.cols = cols                # name -> array (or numpy array)
+
+    def __len__(self):
+        return len(self.cols["size"])
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+    def save(self, path):
+        header = json.dumps({"version": COLS_VERSION, "scanned_at": self.scanned_at, "n": len(self),
+                             "tops": self.tops, "doc_types": self.doc_types, "exts": self.exts,
+                             "groups": len(self.groups), "stamp": self.stamp}).encode("utf-8")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(struct.pack("<I", len(header)) + header)
+            for name, _ in _COLUMNS:
+                f.write(bytes(self.cols[name]))
+            f.write("\n".join(self.groups).encode("utf-8"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Cached columns, or None if missing or unreadable."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            (hlen,) = struct.unpack_from("<I", data)
+            h = json.loads(data[4:4 + hlen])
+            if h["version"] != COLS_VERSION:
+                return None
+            np = _numpy()
+            pos, cols = 4 + hlen, {}
+            for name, code in _COLUMNS:
+                width = array(code).itemsize * h["n"]
+                if np is not None:
+                    cols[name] = np.frombuffer(data, dtype=np.dtype(code), count=h["n"], offset=pos)
+                else:
+                    cols[name] = array(code, data[pos:pos + width])
+                pos += width
+            groups = data[pos:].decode("utf-8").split("\n") if h["groups"] else []
+            return cls(h["scanned_at"], h["tops"], h["doc_types"], h["exts"], groups, cols, h["stamp"])
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+
+
+def _codes():
+    table = {}
+    return table, lambda s: table.setdefault(s, len(table))
+
+
+def build_columns(index) -> Columns:
+    """Flatten a rdc_index.ScanIndex (one pass, parse results memoized)."""
+    cols = {name: array(code) for name, code in _COLUMNS}
+    tops, top_code = _codes()
+    types, type_code = _codes()
+    exts, ext_code = _codes()
+    groups, group_code = _codes()
+    type_code("")
+    with metrics.timer("stats.columns"):
+        for rel, d in index.dirs.items():
+            if not d.files:
+                continue
+            parts = rel.split("/") if rel else []
+            archived = ARCHIVE_DIR in parts
+            owner = "/".join(p for p in parts if p != ARCHIVE_DIR)
+            n = len(d.files)
+            cols["size"].extend(f.size for f in d.files)
+            cols["mtime"].extend(f.mtime for f in d.files)
+            cols["top"].extend([top_code(parts[0] if len(parts) > 1 or (parts and not archived)
+                                         else "(root)")] * n)
+            cols["archived"].extend([archived] * n)
+            for f in d.files:
+                info = parse_filename(f.name)
+                if info is None:
+                    cols["doc_type"].append(0)
+                    cols["ext"].append(ext_code(os.path.splitext(f.name)[1].lower()))
+                    cols["group"].append(-1)
+                else:
+                    cols["doc_type"].append(type_code(_DOC_TYPES.get(info.doc_type.lower(), "")))
+                    cols["ext"].append(ext_code(info.ext))
+                    cols["group"].append(group_code(f"{owner}/{info.base}{info.ext}" if owner
+                                                    else f"{info.base}{info.ext}"))
+    metrics.count("stats.files", len(cols["size"]))
+    np = _numpy()
+    if np is not None:
+        cols = {name: np.frombuffer(a, dtype=np.dtype(a.typecode)) for name, a in cols.items()}
+    return Columns(index.scanned_at, list(tops), list(types), list(exts), list(groups), cols)
+
+
+def _cols_path(root: str):
+    path = rdc_index.index_path(root)
+    return path.with_name(path.name.replace(".json.gz", ".cols"))
+
+
+def _stamp(path) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def columns(root: str, index=None, rescan: bool = False, ignore=()) -> Columns:
+    """Columns for the current scan of `root`: the cached ones while the
+    saved index is unchanged, else rebuilt from `index`, the saved index or
+    (with rescan, or when there is none) a fresh scan."""
+    root = os.path.normpath(os.fspath(root))
+    path = rdc_index.index_path(root)
+    if rescan or (index is None and not path.exists()):
+        index = rdc_index.scan(root, previous=rdc_index.load(root), ignore=ignore)
+        index.save()
+    stamp = _stamp(path)
+    cached = Columns.load(_cols_path(root))
+    if cached is not None and stamp and cached.stamp == stamp and \
+            (index is None or cached.scanned_at == index.scanned_at):
+        metrics.count("stats.cache_hits")
+        return cached
+    index = index or rdc_index.load(root)
+    if index is None:
+        raise FileNotFoundError(f"No scan index for {root}")
+    cols = build_columns(index)
+    cols.stamp = stamp
+    cols.save(_cols_path(root))
+    return cols
+
+
+# ── Aggregation ──────────────────────────────────────────────────────────────
+
+def _bincount(codes, n: int, weights=None, mask=None) -> list:
+    np = _numpy()
+    if np is not None and hasattr(codes, "dtype"):
+        if mask is not None:
+            codes = codes[mask]
+            weights = weights[mask] if weights is not None else None
+        return np.bincount(codes, weights=weights, minlength=n)[:n].astype(np.int64).tolist()
+    out = [0] * n
+    if weights is None:
+        for i, c in enumerate(codes):
+            if mask is None or mask[i]:
+                out[c] += 1
+    else:
+        for i, (c, w) in enumerate(zip(codes, weights)):
+            if mask is None or mask[i]:
+                out[c] += w
+    return out
+
+
+def _digitize(values, edges):
+    np = _numpy()
+    if np is not None and hasattr(values, "dtype"):
+        return np.searchsorted(np.asarray(edges), values, side="right")
+    from bisect import bisect_right
+    return array("i", (bisect_right(edges, v) for v in values))
+
+
+def _table(names: list, files: list, sizes: list, top: int = None) -> list:
+    rows = sorted(((n or "(none)", f, s) for n, f, s in zip(names, files, sizes) if f),
+                  key=lambda r: r[2], reverse=True)
+    return rows[:top] if top else rows
+
+
+def analyze(cols: Columns, top: int = TOP_N) -> dict:
+    """Every table of the report as plain lists / numbers (JSON-ready)."""
+    np = _numpy()
+    c = cols.cols
+    size, archived, group = c["size"], c["archived"], c["group"]
+    vec = np is not None and hasattr(size, "dtype")
+    with metrics.timer("stats.aggregate"):
+        if vec:
+            archived = archived.astype(bool)
+            versioned = group >= 0
+            arch_group = archived & versioned
+            total_bytes = int(size.sum())
+            archive_files = int(archived.sum())
+            archive_bytes = int(size[archived].sum())
+        else:
+            versioned = array("b", (g >= 0 for g in group))
+            arch_group = array("b", (a and v for a, v in zip(archived, versioned)))
+            total_bytes = sum(size)
+            archive_files = sum(archived)
+            archive_bytes = sum(s for s, a in zip(size, archived) if a)
+
+        nt = len(cols.tops)
+        by_top = list(zip(cols.tops, _bincount(c["top"], nt), _bincount(c["top"], nt, size),
+                          _bincount(c["top"], nt, mask=archived),
+                          _bincount(c["top"], nt, size, mask=archived)))
+        by_top.sort(key=lambda r: r[2], reverse=True)
+        nd, ne = len(cols.doc_types), len(cols.exts)
+        by_type = _table(cols.doc_types, _bincount(c["doc_type"], nd), _bincount(c["doc_type"], nd, size))
+        by_ext = _table(cols.exts, _bincount(c["ext"], ne), _bincount(c["ext"], ne, size), top)
+
+        size_hist = _bincount(_digitize(size, SIZE_EDGES), len(SIZE_LABELS))
+
+        ng = len(cols.groups)
+        if vec:
+            per_group = np.bincount(group[versioned], minlength=ng)
+            version_hist = np.bincount(_digitize(per_group[per_group > 0], VERSION_EDGES),
+                                       minlength=len(VERSION_LABELS)).tolist()
+            arch_bytes = np.bincount(group[arch_group], weights=size[arch_group], minlength=ng)
+            arch_count = np.bincount(group[arch_group], minlength=ng)
+            k = min(top, ng)
+            worst = np.argpartition(-arch_bytes, k - 1)[:k] if k else []
+            offenders = sorted(((cols.groups[g], int(arch_count[g]), int(arch_bytes[g]), int(per_group[g]))
+                                for g in worst if arch_bytes[g] > 0), key=lambda r: r[2], reverse=True)
+            months = (c["mtime"].astype("datetime64[s]").astype("datetime64[M]").astype(np.int64))
+            month_keys, inv = np.unique(months, return_inverse=True)
+            month_files = np.bincount(inv, minlength=len(month_keys))
+            month_bytes = np.bincount(inv, weights=size, minlength=len(month_keys))
+            by_month = [(f"{1970 + int(m) // 12:04d}-{int(m) % 12 + 1:02d}", int(f), int(b))
+                        for m, f, b in zip(month_keys, month_files, month_bytes)]
+        else:
+            per_group = [0] * ng
+            arch_bytes, arch_count = [0] * ng, [0] * ng
+            for g, s, a in zip(group, size, archived):
+                if g >= 0:
+                    per_group[g] += 1
+                    if a:
+                        arch_bytes[g] += s
+                        arch_count[g] += 1
+            version_hist = _bincount(_digitize([n for n in per_group if n], VERSION_EDGES),
+                                     len(VERSION_LABELS))
+            worst = sorted((g for g in range(ng) if arch_bytes[g]), key=lambda g: arch_bytes[g],
+                           reverse=True)[:top]
+            offenders = [(cols.groups[g], arch_count[g], arch_bytes[g], per_group[g]) for g in worst]
+            days, files_m, bytes_m = {}, {}, {}
+            for t, s in zip(c["mtime"], size):
+                day = int(t // 86400)
+                key = days.get(day)
+                if key is None:
+                    key = days[day] = datetime.fromtimestamp(day * 86400, timezone.utc).strftime("%Y-%m")
+                files_m[key] = files_m.get(key, 0) + 1
+                bytes_m[key] = bytes_m.get(key, 0) + s
+            by_month = [(k, files_m[k], bytes_m[k]) for k in sorted(files_m)]
+
+    return {
+        "scanned_at": cols.scanned_at,
+        "files": len(cols), "bytes": total_bytes,
+        "archive_files": archive_files, "archive_bytes": archive_bytes,
+        "documents": ng,
+        "by_top": by_top, "by_type": by_type, "by_ext": by_ext,
+        "size_hist": list(zip(SIZE_LABELS, size_hist)),
+        "version_hist": list(zip(VERSION_LABELS, version_hist)),
+        "archive_offenders": offenders,
+        "by_month": by_month[-MONTHS:],
+    }
+
+
+# ── Snapshots ────────────────────────────────────────────────────────────────
+
+def _history_path(root: str):
+    d = mru.config_dir() / "stats"
+    d.mkdir(exist_ok=True)
+    return d / rdc_index.index_path(root).name.replace(".json.gz", ".jsonl")
+
+
+def record_snapshot(root: str, report: dict):
+    """Append the report totals once per scan."""
+    history = load_history(root)
+    if history and history[-1]["scanned_at"] == report["scanned_at"]:
+        return
+    snap = {k: report[k] for k in ("scanned_at", "files", "bytes", "archive_files", "archive_bytes")}
+    snap["by_top"] = {name: b for name, _, b, _, _ in report["by_top"]}
+    with open(_history_path(root), "a", encoding="utf-8") as f:
+        f.write(json.dumps(snap, ensure_ascii=False) + "\n")
+
+
+def load_history(root: str) -> list:
+    try:
+        with open(_history_path(root), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+def growth(history: list, last: int = MONTHS) -> list:
+    """[(date, files, bytes, Δfiles, Δbytes, archive bytes)] between successive snapshots."""
+    rows, prev = [], None
+    for s in history:
+        rows.append((datetime.fromtimestamp(s["scanned_at"]).strftime("%Y-%m-%d %H:%M"),
+                     s["files"], s["bytes"],
+                     s["files"] - prev["files"] if prev else 0,
+                     s["bytes"] - prev["bytes"] if prev else 0,
+                     s["archive_bytes"]))
+        prev = s
+    return rows[-last:]
+
+
+# ── Report ───────────────────────────────────────────────────────────────────
+
+def _mb(n) -> str:
+    return f"{n / 1e6:,.1f} MB" if abs(n) < 1e9 else f"{n / 1e9:,.2f} GB"
+
+
+def _bar(n, most, width: int = 30) -> str:
+    return "█" * (round(width * n / most) if most else 0)
+
+
+def format_report(report: dict, history: list = ()) -> str:
+    r = report
+    share = r["archive_bytes"] / r["bytes"] if r["bytes"] else 0
+    out = [f"Scanned {datetime.fromtimestamp(r['scanned_at']):%Y-%m-%d %H:%M} · {r['files']:,} files · "
+           f"{_mb(r['bytes'])} · {r['documents']:,} versioned documents",
+           f"_archive/: {r['archive_files']:,} files · {_mb(r['archive_bytes'])} ({share:.0%} of the total)", ""]
+
+    out.append(f"{'Folder':<36}{'files':>10}{'size':>14}{'archived':>10}{'archive size':>14}")
+    for name, f, b, af, ab in r["by_top"]:
+        out.append(f"{name[:35]:<36}{f:>10,}{_mb(b):>14}{af:>10,}{_mb(ab):>14}")
+
+    for title, rows in (("Document type", r["by_type"]), ("Extension", r["by_ext"])):
+        out += ["", f"{title:<36}{'files':>10}{'size':>14}"]
+        out += [f"{name[:35]:<36}{f:>10,}{_mb(b):>14}" for name, f, b in rows]
+
+    for title, rows in (("File size", r["size_hist"]), ("Versions per document", r["version_hist"])):
+        most = max((n for _, n in rows), default=0)
+        out += ["", f"{title:<24}{'count':>10}"]
+        out += [f"{label:<24}{n:>10,}  {_bar(n, most)}" for label, n in rows]
+
+    if r["archive_offenders"]:
+        out += ["", f"{'Most archived bytes':<56}{'archived':>9}{'versions':>9}{'size':>12}"]
+        for name, n, b, versions in r["archive_offenders"]:
+            label = name if len(name) <= 55 else "…" + name[-54:]
+            out.append(f"{label:<56}{n:>9,}{versions:>9,}{_mb(b):>12}")
+
+    if r["by_month"]:
+        most = max(b for _, _, b in r["by_month"])
+        out += ["", f"{'Last modified':<14}{'files':>10}{'size':>14}"]
+        out += [f"{m:<14}{f:>10,}{_mb(b):>14}  {_bar(b, most)}" for m, f, b in r["by_month"]]
+
+    rows = growth(list(history))
+    if len(rows) > 1:
+        out += ["", f"{'Growth (scan)':<18}{'files':>10}{'Δ files':>10}{'size':>14}{'Δ size':>14}{'archive':>14}"]
+        out += [f"{d:<18}{f:>10,}{df:>+10,}{_mb(b):>14}{('+' if db >= 0 else '') + _mb(db):>14}{_mb(ab):>14}"
+                for d, f, b, df, db, ab in rows]
+    return "\n".join(out)
+
+
+def run_stats(root: str, top: int = TOP_N, rescan: bool = False, index=None, ignore=(),
+              log_callback=None) -> dict:
+    """Report for `root` (printed through log_callback); records a growth snapshot."""
+    log = log_callback or print
+    t0 = time.perf_counter()
+    cols = columns(root, index=index, rescan=rescan, ignore=ignore)
+    report = analyze(cols, top)
+    record_snapshot(root, report)
+    log(format_report(report, load_history(root)))
+    log(f"\n({len(cols):,} files analysed in {time.perf_counter() - t0:.2f}s)")
+    metrics.flush()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC storage analytics")
+    parser.add_argument("root", help="Root folder (uses its saved scan index)")
+    parser.add_argument("--top", type=int, default=TOP_N, help="Rows in the extension / offender tables")
+    parser.add_argument("--rescan", action="store_true", help="Refresh the scan index first")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if args.json:
+        rep = analyze(columns(args.root, rescan=args.rescan), args.top)
+        record_snapshot(args.root, rep)
+        print(json.dumps(rep, ensure_ascii=False, indent=1))
+    else:
+        run_stats(args.root, args.top, args.rescan)
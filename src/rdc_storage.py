@@ -0,0 +1,476 @@
+"""
+rdc_storage.py — Storage backends for the archive / sync / scaffold engines
+The engines work on root-relative paths ("/"-separated, "" = the root)
+through a backend, so the same code runs on a local (or mounted) folder
+and on a bucket:
+
+    C:/RDC2, /mnt/rdc2           LocalBackend — os.scandir / rename / copy2
+    s3://bucket/RDC2             ObjectStoreBackend over S3Client (boto3;
+                                 any S3-compatible endpoint, e.g. MinIO)
+    mem://name/RDC2              ObjectStoreBackend over an in-process
+                                 MemoryClient (tests, offline trials)
+
+An object store has no folders and every request is a round trip, so the
+object-store backend lists the whole prefix once in bulk (1000 keys per
+request) and serves walk / listdir / stat from that listing, copies
+server-side, turns a move into copy + one batched delete (1000 keys per
+request), and keeps its listing up to date as it changes things instead
+of listing again. Empty folders are "<dir>/" marker objects.
+
+Settings:  "s3_endpoint_url": ""   (MinIO / other S3-compatible servers;
+           credentials come from the usual AWS environment / config files)
+
+CLI:  python rdc_storage.py ROOT [--ls REL] [--stats]
+"""
+import os
+import time
+import shutil
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import rdc_ignore
+import rdc_metrics as metrics
+
+LIST_PAGE = 1000                # keys per list request (S3 maximum)
+DELETE_BATCH = 1000             # keys per delete request (S3 maximum)
+MAX_WORKERS = 16                # parallel server-side copies / marker puts
+SCHEMES = ("s3", "mem")
+
+
+class Stat(NamedTuple):
+    size: int
+    mtime: float
+
+
+def is_remote(root: str) -> bool:
+    return str(root).partition("://")[0] in SCHEMES
+
+
+def _join(*parts) -> str:
+    return "/".join(p for p in parts if p)
+
+
+class Backend:
+    """Root-relative file operations. Subclasses implement the primitives;
+    walk / move_many / delete_many have list-based defaults."""
+
+    root = ""
+    implicit_dirs = False           # True: a folder exists as soon as a file is put under it
+
+    def display(self, rel: str = "") -> str:
+        """Human-readable location (absolute path or URL)."""
+        raise NotImplementedError
+
+    def listdir(self, rel: str):
+        """(set of folder names, set of file names) in `rel`, or None if it does not exist."""
+        raise NotImplementedError
+
+    def stat(self, rel: str):
+        """Stat of a file, or None."""
+        raise NotImplementedError
+
+    def mkdir(self, rel: str):
+        """Create a folder (and missing parents); no error if it exists."""
+        raise NotImplementedError
+
+    def move(self, src: str, dst: str):
+        raise NotImplementedError
+
+    def copy(self, src: str, dst: str):
+        raise NotImplementedError
+
+    def delete(self, rel: str):
+        raise NotImplementedError
+
+    def read_text(self, rel: str) -> str:
+        raise NotImplementedError
+
+    def write_text(self, rel: str, text: str):
+        raise NotImplementedError
+
+    def append_text(self, rel: str, text: str):
+        try:
+            old = self.read_text(rel)
+        except FileNotFoundError:
+            old = ""
+        self.write_text(rel, old + text)
+
+    def local_path(self, rel: str = ""):
+        """Filesystem path for `rel`, or None if the backend is not a local folder."""
+        return None
+
+    def exists(self) -> bool:
+        return self.listdir("") is not None
+
+    def ignore_rules(self, extra=()) -> rdc_ignore.IgnoreRules:
+        def read(rel):
+            try:
+                return self.read_text(rel).splitlines(True)
+            except (OSError, UnicodeDecodeError):
+                return []
+        return rdc_ignore.IgnoreRules(self.display(), extra, read=read)
+
+    def walk(self, rules: rdc_ignore.IgnoreRules = None, extra=()):
+        """Yield (rel, dirnames, filenames) top-down with ignore rules applied;
+        callers may prune `dirnames` in place, as with os.walk."""
+        rules = rules or self.ignore_rules(extra)
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            listing = self.listdir(rel)
+            if listing is None:
+                continue
+            dirs, files = sorted(listing[0]), sorted(listing[1])
+            m = rules.for_dir(rel, files)
+            pre = rel + "/" if rel else ""
+            dirnames = [d for d in dirs if not m.ignored(pre + d, d, True)]
+            yield rel, dirnames, [f for f in files if not m.ignored(pre + f, f, False)]
+            stack.extend(pre + d for d in reversed(dirnames))
+
+    def move_many(self, pairs: list):
+        for src, dst in pairs:
+            self.move(src, dst)
+
+    def delete_many(self, rels: list):
+        for rel in rels:
+            self.delete(rel)
+
+
+# ── Local folders ────────────────────────────────────────────────────────────
+
+class LocalBackend(Backend):
+    def __init__(self, root: str):
+        self.root = os.path.normpath(os.fspath(root))
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split("/")) if rel else self.root
+
+    def display(self, rel: str = "") -> str:
+        return self._abs(rel)
+
+    def local_path(self, rel: str = ""):
+        return self._abs(rel)
+
+    def ignore_rules(self, extra=()) -> rdc_ignore.IgnoreRules:
+        return rdc_ignore.IgnoreRules(self.root, extra)
+
+    def listdir(self, rel: str):
+        try:
+            with os.scandir(self._abs(rel)) as it:
+                dirs, files = set(), set()
+                for e in it:
+                    (dirs if e.is_dir() else files).add(e.name)
+                return dirs, files
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def stat(self, rel: str):
+        try:
+            st = os.stat(self._abs(rel))
+        except OSError:
+            return None
+        return Stat(st.st_size, st.st_mtime)
+
+    def mkdir(self, rel: str):
+        os.makedirs(self._abs(rel), exist_ok=True)
+
+    def move(self, src: str, dst: str):
+        shutil.move(self._abs(src), self._abs(dst))
+
+    def copy(self, src: str, dst: str):
+        shutil.copy2(self._abs(src), self._abs(dst))
+
+    def delete(self, rel: str):
+        os.unlink(self._abs(rel))
+
+    def read_text(self, rel: str) -> str:
+        with open(self._abs(rel), encoding="utf-8") as f:
+            return f.read()
+
+    def write_text(self, rel: str, text: str):
+        with open(self._abs(rel), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def append_text(self, rel: str, text: str):
+        with open(self._abs(rel), "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def walk(self, rules: rdc_ignore.IgnoreRules = None, extra=()):
+        # os.walk via rdc_ignore: the same pruning the engines always had
+        for dirpath, dirnames, filenames in rdc_ignore.walk(self.root, rules, extra):
+            rel = os.path.relpath(dirpath, self.root)
+            yield ("" if rel == "." else rel.replace(os.sep, "/")), dirnames, filenames
+
+
+# ── Object stores ────────────────────────────────────────────────────────────
+
+class MemoryClient:
+    """In-process stand-in for an S3 bucket, with the S3Client interface.
+
+    `calls` counts requests by kind and `latency` adds a delay per request,
+    so tests can check round trips instead of wall time.
+    """
+
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, latency: float = 0.0):
+        self.objects = {}           # key -> (bytes, mtime)
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def named(cls, name: str) -> "MemoryClient":
+        """Shared store for mem://<name>/ roots (lives as long as the process)."""
+        with cls._stores_lock:
+            return cls._stores.setdefault(name, cls())
+
+    def _call(self, kind: str):
+        self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def list(self, prefix: str):
+        """Yield (key, size, mtime) for every key under prefix, a page per request."""
+        with self._lock:
+            keys = sorted(k for k in self.objects if k.startswith(prefix))
+        for i in range(0, max(len(keys), 1), LIST_PAGE):
+            self._call("list")
+            with self._lock:
+                page = [(k, len(self.objects[k][0]), self.objects[k][1])
+                        for k in keys[i:i + LIST_PAGE] if k in self.objects]
+            yield from page
+
+    def head(self, key: str):
+        self._call("head")
+        with self._lock:
+            obj = self.objects.get(key)
+        return None if obj is None else Stat(len(obj[0]), obj[1])
+
+    def get(self, key: str) -> bytes:
+        self._call("get")
+        with self._lock:
+            if key not in self.objects:
+                raise FileNotFoundError(key)
+            return self.objects[key][0]
+
+    def put(self, key: str, data: bytes):
+        self._call("put")
+        with self._lock:
+            self.objects[key] = (bytes(data), time.time())
+
+    def copy(self, src: str, dst: str):
+        self._call("copy")
+        with self._lock:
+            if src not in self.objects:
+                raise FileNotFoundError(src)
+            self.objects[dst] = (self.objects[src][0], time.time())
+
+    def delete(self, keys: list):
+        """Delete up to DELETE_BATCH keys in one request."""
+        if len(keys) > DELETE_BATCH:
+            raise ValueError(f"At most {DELETE_BATCH} keys per delete request")
+        self._call("delete")
+        with self._lock:
+            for k in keys:
+                self.objects.pop(k, None)
+
+
+class S3Client:
+    """S3 / S3-compatible bucket through boto3 (optional dependency)."""
+
+    def __init__(self, bucket: str, endpoint_url: str = None):
+        try:
+            import boto3    # optional, only for s3:// roots
+        except ImportError:
+            raise RuntimeError("boto3 is not installed — `pip install boto3` to use s3:// roots.")
+        self.bucket = bucket
+        self._s3 = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def list(self, prefix: str):
+        pages = self._s3.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket, Prefix=prefix, PaginationConfig={"PageSize": LIST_PAGE})
+        for page in pages:
+            for obj in page.get("Contents", ()):
+                yield obj["Key"], obj["Size"], obj["LastModified"].timestamp()
+
+    def head(self, key: str):
+        try:
+            r = self._s3.head_object(Bucket=self.bucket, Key=key)
+        except self._s3.exceptions.ClientError:
+            return None
+        return Stat(r["ContentLength"], r["LastModified"].timestamp())
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self._s3.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except self._s3.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def put(self, key: str, data: bytes):
+        self._s3.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def copy(self, src: str, dst: str):
+        # Managed copy: server-side, multipart for objects over 5 GB
+        self._s3.copy({"Bucket": self.bucket, "Key": src}, self.bucket, dst)
+
+    def delete(self, keys: list):
+        r = self._s3.delete_objects(Bucket=self.bucket,
+                                    Delete={"Objects": [{"Key": k} for k in keys], "Quiet": True})
+        if r.get("Errors"):
+            e = r["Errors"][0]
+            raise OSError(f"Delete failed for {len(r['Errors'])} keys, e.g. {e['Key']}: {e['Message']}")
+
+
+class ObjectStoreBackend(Backend):
+    implicit_dirs = True
+
+    def __init__(self, client, prefix: str = "", url: str = ""):
+        self.client = client
+        self.prefix = prefix.strip("/")
+        self.root = url or f"mem://{self.prefix}"
+        self._tree = None           # rel dir -> [set of dirs, {file: Stat}]
+        self._lock = threading.Lock()
+
+    def display(self, rel: str = "") -> str:
+        return _join(self.root.rstrip("/"), rel)
+
+    def _key(self, rel: str) -> str:
+        return _join(self.prefix, rel)
+
+    def _load(self) -> dict:
+        if self._tree is None:
+            tree = {"": [set(), {}]}
+            pre = self.prefix + "/" if self.prefix else ""
+            with metrics.timer("storage.list"):
+                for key, size, mtime in self.client.list(pre):
+                    rel = key[len(pre):]
+                    if rel.endswith("/"):
+                        self._add_dir(tree, rel.rstrip("/"))
+                    elif rel:
+                        parent, _, name = rel.rpartition("/")
+                        self._add_dir(tree, parent)[1][name] = Stat(size, mtime)
+            self._tree = tree
+        return self._tree
+
+    @staticmethod
+    def _add_dir(tree: dict, rel: str):
+        node = tree.get(rel)
+        if node is None:
+            node = tree[rel] = [set(), {}]
+            if rel:
+                parent, _, name = rel.rpartition("/")
+                ObjectStoreBackend._add_dir(tree, parent)[0].add(name)
+        return node
+
+    def refresh(self):
+        """Drop the cached listing (something else changed the bucket)."""
+        self._tree = None
+
+    def listdir(self, rel: str):
+        with self._lock:
+            node = self._load().get(rel)
+            return None if node is None else (set(node[0]), set(node[1]))
+
+    def stat(self, rel: str):
+        parent, _, name = rel.rpartition("/")
+        with self._lock:
+            node = self._load().get(parent)
+            return node[1].get(name) if node else None
+
+    def mkdir(self, rel: str):
+        with self._lock:
+            if rel in self._load():
+                return
+        self.client.put(self._key(rel) + "/", b"")
+        with self._lock:
+            self._add_dir(self._tree, rel)
+
+    def _set(self, rel: str, st):
+        parent, _, name = rel.rpartition("/")
+        with self._lock:
+            tree = self._load()
+            if st is None:
+                node = tree.get(parent)
+                if node:
+                    node[1].pop(name, None)
+            else:
+                self._add_dir(tree, parent)[1][name] = st
+
+    def copy(self, src: str, dst: str):
+        with metrics.timer("storage.copy"):
+            self.client.copy(self._key(src), self._key(dst))
+        self._set(dst, Stat(self.stat(src).size, time.time()))
+
+    def move(self, src: str, dst: str):
+        self.move_many([(src, dst)])
+
+    def move_many(self, pairs: list):
+        """Server-side copies in parallel, then the sources in batched deletes."""
+        if not pairs:
+            return
+        with ThreadPoolExecutor(min(MAX_WORKERS, len(pairs)), thread_name_prefix="storage") as pool:
+            list(pool.map(lambda p: self.copy(*p), pairs))
+        self.delete_many([src for src, _ in pairs])
+
+    def delete(self, rel: str):
+        self.delete_many([rel])
+
+    def delete_many(self, rels: list):
+        keys = [self._key(r) for r in rels]
+        with metrics.timer("storage.delete"):
+            for i in range(0, len(keys), DELETE_BATCH):
+                self.client.delete(keys[i:i + DELETE_BATCH])
+        for rel in rels:
+            self._set(rel, None)
+
+    def read_text(self, rel: str) -> str:
+        return self.client.get(self._key(rel)).decode("utf-8")
+
+    def write_text(self, rel: str, text: str):
+        data = text.encode("utf-8")
+        self.client.put(self._key(rel), data)
+        self._set(rel, Stat(len(data), time.time()))
+
+
+def backend_for(root: str, settings: dict = None) -> Backend:
+    """Backend for a root path or URL (s3://bucket/prefix, mem://name/prefix)."""
+    root = os.fspath(root)
+    scheme, sep, rest = root.partition("://")
+    if not sep or scheme not in SCHEMES:
+        return LocalBackend(root)
+    bucket, _, prefix = rest.partition("/")
+    if scheme == "mem":
+        return ObjectStoreBackend(MemoryClient.named(bucket), prefix, root)
+    if settings is None:
+        import mru_manager as mru
+        settings = mru.load_settings()
+    return ObjectStoreBackend(S3Client(bucket, settings.get("s3_endpoint_url") or None), prefix, root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC storage backend check")
+    parser.add_argument("root", help="Folder, s3://bucket/prefix or mem://name/prefix")
+    parser.add_argument("--ls", metavar="REL", default=None, help="List one folder (root-relative)")
+    parser.add_argument("--stats", action="store_true", help="Count folders / files (one walk)")
+    args = parser.parse_args()
+    b = backend_for(args.root)
+    if args.ls is not None:
+        listing = b.listdir(args.ls.strip("/"))
+        if listing is None:
+            raise SystemExit(f"Not found: {b.display(args.ls)}")
+        for d in sorted(listing[0]):
+            print(f"  {d}/")
+        for f in sorted(listing[1]):
+            print(f"  {f}")
+    if args.stats or args.ls is None:
+        t0 = time.perf_counter()
+        dirs = files = 0
+        for _, dirnames, filenames in b.walk(extra=["!_archive/"]):
+            dirs += len(dirnames)
+            files += len(filenames)
+        print(f"{b.display()}: {dirs} folders, {files} files ({time.perf_counter() - t0:.2f}s)")
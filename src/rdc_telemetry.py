@@ -0,0 +1,287 @@
+"""
+rdc_telemetry.py — Local store of AI request telemetry
+Every provider call (chat turns, long-document map/reduce calls) is
+recorded with model, provider, time to first token, total latency, token
+counts, cache hits, stop reason and error into <config dir>/telemetry.db
+(SQLite, WAL). record() only appends to an in-memory batch; a writer
+thread inserts batches with executemany in one transaction, so batch runs
+with hundreds of calls cost one commit per second at most.
+
+summary() gives per-model counts and latency / TTFT percentiles,
+histogram() bucketed latency or token counts, export_csv() the raw rows.
+
+CLI:  python rdc_telemetry.py [--days 7] [--csv out.csv] [--hist latency_ms]
+      python rdc_telemetry.py --check      verify percentile() against PERCENTILE_EXAMPLES
+"""
+import csv
+import math
+import time
+import atexit
+import sqlite3
+import argparse
+import threading
+
+import mru_manager as mru
+
+FLUSH_SECONDS = 1.0
+FLUSH_ROWS = 200
+
+COLUMNS = ("ts", "model", "provider", "kind", "ttft_ms", "latency_ms", "input_tokens",
+           "output_tokens", "cached_tokens", "cache_write_tokens", "stop_reason", "error")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    model TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'chat',
+    ttft_ms REAL,
+    latency_ms REAL NOT NULL,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cached_tokens INTEGER DEFAULT 0,
+    cache_write_tokens INTEGER DEFAULT 0,
+    stop_reason TEXT DEFAULT '',
+    error TEXT DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS calls_ts ON calls(ts);
+CREATE INDEX IF NOT EXISTS calls_model_ts ON calls(model, ts);
+"""
+
+_lock = threading.Lock()
+_flushing = threading.Lock()    # held from taking a batch until it is committed
+_pending = []
+_wake = threading.Event()
+_writer = None
+_enabled = True
+
+
+def db_path():
+    return mru.config_dir() / "telemetry.db"
+
+
+def connect(path=None) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path or db_path()), timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def record(model: str, provider: str, latency: float, ttft: float = None, usage=None,
+           stop_reason: str = "", error: str = "", kind: str = "chat"):
+    """Queue one call (seconds in, milliseconds stored). Never blocks on the database."""
+    global _writer
+    if not _enabled:
+        return
+    u = usage
+    row = (time.time(), model, provider, kind,
+           None if ttft is None else round(ttft * 1000, 1), round(latency * 1000, 1),
+           u.input_tokens if u else 0, u.output_tokens if u else 0,
+           u.cached_tokens if u else 0, u.cache_write_tokens if u else 0,
+           stop_reason or "", (error or "")[:500])
+    with _lock:
+        _pending.append(row)
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="telemetry", daemon=True)
+            _writer.start()
+        if len(_pending) >= FLUSH_ROWS:
+            _wake.set()
+
+
+def _write_loop():
+    conn = connect()
+    while True:
+        _wake.wait(FLUSH_SECONDS)
+        _wake.clear()
+        _flush(conn)
+
+
+def _flush(conn):
+    with _flushing:
+        with _lock:
+            rows = _pending[:]
+            del _pending[:]
+        if rows:
+            with conn:
+                conn.executemany(f"INSERT INTO calls ({', '.join(COLUMNS)}) VALUES "
+                                 f"({', '.join('?' * len(COLUMNS))})", rows)
+
+
+def flush():
+    """Write queued rows now (called at exit and before reads). Also waits
+    for a batch the writer thread has taken but not committed yet."""
+    with _flushing:
+        if not _pending:
+            return
+    conn = connect()
+    try:
+        _flush(conn)
+    finally:
+        conn.close()
+
+
+atexit.register(flush)
+
+
+# ── Queries ──────────────────────────────────────────────────────────────────
+def percentile(sorted_values: list, p: float):
+    """Nearest-rank percentile of an ascending list (None if empty)."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+# (n, p) -> expected percentile of [1..n]; checked by --check (and the build smoke test)
+PERCENTILE_EXAMPLES = {
+    (10, 50): 5, (10, 90): 9, (10, 100): 10, (10, 0): 1, (10, 95): 10,
+    (100, 99): 99, (100, 50): 50, (1, 50): 1, (4, 25): 1, (4, 75): 3,
+}
+
+
+def check() -> list:
+    """PERCENTILE_EXAMPLES that come out wrong: [((n, p), expected, got)]."""
+    bad = []
+    for (n, p), expected in PERCENTILE_EXAMPLES.items():
+        got = percentile(list(range(1, n + 1)), p)
+        if got != expected:
+            bad.append(((n, p), expected, got))
+    return bad
+
+
+def _since(days: float) -> float:
+    return time.time() - days * 86400 if days else 0.0
+
+
+def summary(days: float = 7, kind: str = None) -> list:
+    """Per-model rows: dict(model, provider, calls, errors, p50/p90/p99 latency,
+    p50/p90 ttft, mean input/output tokens, cache_hit = cached / input tokens)."""
+    flush()
+    conn = connect()
+    try:
+        where, args = "ts >= ?", [_since(days)]
+        if kind:
+            where += " AND kind = ?"
+            args.append(kind)
+        out = []
+        for model, provider, n, errors, tin, tout, tcached in conn.execute(
+                f"SELECT model, provider, COUNT(*), SUM(error != ''), SUM(input_tokens), "
+                f"SUM(output_tokens), SUM(cached_tokens) FROM calls WHERE {where} "
+                f"GROUP BY model, provider ORDER BY COUNT(*) DESC", args):
+            lat = [r[0] for r in conn.execute(
+                f"SELECT latency_ms FROM calls WHERE {where} AND model = ? AND error = '' "
+                f"ORDER BY latency_ms", args + [model])]
+            ttft = [r[0] for r in conn.execute(
+                f"SELECT ttft_ms FROM calls WHERE {where} AND model = ? AND error = '' "
+                f"AND ttft_ms IS NOT NULL ORDER BY ttft_ms", args + [model])]
+            ok = max(1, n - errors)
+            out.append({
+                "model": model, "provider": provider, "calls": n, "errors": errors,
+                "p50_ms": percentile(lat, 50), "p90_ms": percentile(lat, 90), "p99_ms": percentile(lat, 99),
+                "ttft_p50_ms": percentile(ttft, 50), "ttft_p90_ms": percentile(ttft, 90),
+                "mean_in": tin / ok, "mean_out": tout / ok,
+                "cache_hit": (tcached / tin) if tin else 0.0,
+            })
+        return out
+    finally:
+        conn.close()
+
+
+def histogram(column: str = "latency_ms", model: str = None, days: float = 7, buckets: int = 12) -> list:
+    """[(low, high, count)] with log-spaced buckets over the observed range."""
+    if column not in ("latency_ms", "ttft_ms", "input_tokens", "output_tokens", "cached_tokens"):
+        raise ValueError(f"Not a numeric column: {column}")
+    flush()
+    conn = connect()
+    try:
+        where, args = f"ts >= ? AND error = '' AND {column} IS NOT NULL", [_since(days)]
+        if model:
+            where += " AND model = ?"
+            args.append(model)
+        values = [r[0] for r in conn.execute(f"SELECT {column} FROM calls WHERE {where}", args)]
+    finally:
+        conn.close()
+    if not values:
+        return []
+    lo, hi = max(1.0, min(values)), max(values)
+    if hi <= lo:
+        return [(lo, hi, len(values))]
+    ratio = (hi / lo) ** (1 / buckets)
+    edges = [lo * ratio ** i for i in range(buckets + 1)]
+    edges[-1] = hi
+    counts = [0] * buckets
+    for v in values:
+        i = 0
+        while i < buckets - 1 and v > edges[i + 1]:
+            i += 1
+        counts[i] += 1
+    return [(edges[i], edges[i + 1], counts[i]) for i in range(buckets)]
+
+
+def format_summary(rows: list) -> str:
+    def ms(v):
+        return "—" if v is None else f"{v / 1000:.2f}s" if v >= 1000 else f"{v:.0f}ms"
+    out = [f"{'Model':<28}{'Calls':>7}{'Err':>5}{'p50':>9}{'p90':>9}{'p99':>9}"
+           f"{'TTFT p50':>10}{'In avg':>9}{'Out avg':>9}{'Cached':>8}"]
+    for r in rows:
+        out.append(f"{r['model']:<28}{r['calls']:>7,}{r['errors']:>5}{ms(r['p50_ms']):>9}"
+                   f"{ms(r['p90_ms']):>9}{ms(r['p99_ms']):>9}{ms(r['ttft_p50_ms']):>10}"
+                   f"{r['mean_in']:>9,.0f}{r['mean_out']:>9,.0f}{r['cache_hit']:>8.0%}")
+    return "\n".join(out)
+
+
+def format_histogram(hist: list, width: int = 40) -> str:
+    if not hist:
+        return "(no data)"
+    peak = max(c for _, _, c in hist) or 1
+    return "\n".join(f"{lo:>10,.0f} – {hi:<10,.0f} {'█' * max(1 if c else 0, round(c / peak * width)):<{width}} {c:,}"
+                     for lo, hi, c in hist)
+
+
+def export_csv(path: str, days: float = 0) -> int:
+    """Write raw rows (all time by default) to `path`. Returns the row count."""
+    flush()
+    conn = connect()
+    try:
+        cur = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM calls WHERE ts >= ? ORDER BY ts",
+                           (_since(days),))
+        n = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(("time",) + COLUMNS[1:])
+            for row in cur:
+                w.writerow((time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row[0])),) + row[1:])
+                n += 1
+        return n
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC AI telemetry")
+    parser.add_argument("--days", type=float, default=7, help="Window in days (0 = all)")
+    parser.add_argument("--csv", help="Export raw rows to this CSV file")
+    parser.add_argument("--hist", choices=["latency_ms", "ttft_ms", "input_tokens", "output_tokens"],
+                        help="Show a histogram of this column")
+    parser.add_argument("--model", help="Limit the histogram to one model")
+    parser.add_argument("--check", action="store_true", help="Verify percentile(), exit 1 on mismatch")
+    args = parser.parse_args()
+    if args.check:
+        failures = check()
+        for case, expected, got in failures:
+            print(f"✗ percentile{case}: expected {expected}, got {got}")
+        print(f"{len(PERCENTILE_EXAMPLES) - len(failures)}/{len(PERCENTILE_EXAMPLES)} examples OK")
+        raise SystemExit(1 if failures else 0)
+    if args.csv:
+        print(f"{export_csv(args.csv, args.days):,} rows → {args.csv}")
+    elif args.hist:
+        print(format_histogram(histogram(args.hist, args.model, args.days)))
+    else:
+        print(format_summary(summary(args.days)))
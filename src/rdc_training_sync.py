@@ -3,101 +3,88 @@ rdc_training_sync.py — AI Training Set Sync
 Finds files tagged _TRAIN_ (or TRAIN), copies only the latest version
 to 00 - _AI-Training/ in the RDC2 root, removes stale copies.
 
-CLI:  python rdc_training_sync.py "C:/RDC2" [--dry-run]
+Folders/files matched by rdc_ignore rules (.rdcignore) are skipped.
+The root may be a local folder or an object-store URL (see rdc_storage);
+on a bucket copies are server-side and stale copies go in one batched
+delete.
+
+CLI:  python rdc_training_sync.py "C:/RDC2" [--dry-run] [--ignore PATTERN ...]
 """
-import os
-import re
-import shutil
 import argparse
 from datetime import datetime
-from pathlib import Path
-
-SKIP_DIRS = {
-    "_archive", ".tmp.driveupload", "$RECYCLE.BIN",
-    ".git", "node_modules", "__pycache__"
-}
-SKIP_PREFIXES = ("~$",)
-TRAIN_DIR_NAME = "00 - _AI-Training"
 
-TRAIN_RE = re.compile(
-    r'^(.+?)[\s_]TRAIN[\s_][vV](\d+)\.(\d+)(.*?)(\.[^.]+)$',
-    re.IGNORECASE
-)
+import rdc_metrics as metrics
+import rdc_storage
+from rdc_versions import parse_filename
 
-
-def _parse_train(filename: str):
-    m = TRAIN_RE.match(filename)
-    if not m:
-        return None
-    base, major, minor, suffix, ext = m.groups()
-    return {
-        "base": base.strip(),
-        "major": int(major),
-        "minor": int(minor),
-        "ext": ext.lower(),
-        "sort_key": (int(major), int(minor)),
-    }
+TRAIN_DIR_NAME = "00 - _AI-Training"
 
 
-def run_sync(root: str, dry_run: bool = False, log_callback=None):
-    root = Path(root)
+def run_sync(root: str, dry_run: bool = False, log_callback=None, ignore=(), backend=None):
+    store = backend or rdc_storage.backend_for(root)
     log = log_callback or print
-    train_dir = root / TRAIN_DIR_NAME
-    log(f"{'[DRY RUN] ' if dry_run else ''}Syncing training files → {train_dir}\n")
+    train_dir = TRAIN_DIR_NAME
+    log(f"{'[DRY RUN] ' if dry_run else ''}Syncing training files → {store.display(train_dir)}\n")
 
     if not dry_run:
-        train_dir.mkdir(exist_ok=True)
+        store.mkdir(train_dir)
 
     # Collect all _TRAIN_ files grouped by (base, ext)
     groups = {}
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames
-                       if d not in SKIP_DIRS and Path(dirpath) / d != train_dir]
-        for fname in filenames:
-            if any(fname.startswith(p) for p in SKIP_PREFIXES):
-                continue
-            info = _parse_train(fname)
-            if not info:
-                continue
-            key = (info["base"].lower(), info["ext"])
-            groups.setdefault(key, []).append((info["sort_key"], Path(dirpath) / fname, info))
+    for dirpath, dirnames, filenames in metrics.timed_iter("sync.scan", store.walk(extra=ignore)):
+        if dirpath == "":
+            dirnames[:] = [d for d in dirnames if d != train_dir]
+        metrics.count("sync.files_seen", len(filenames))
+        with metrics.timer("sync.parse"):
+            for fname in filenames:
+                info = parse_filename(fname)
+                if not info or not info.train:
+                    continue
+                groups.setdefault(info.key, []).append(
+                    (info.sort_key, f"{dirpath}/{fname}" if dirpath else fname, info))
 
     manifest_lines = []
     files_added = 0
     files_removed = 0
+    stale_paths = []
 
     # For each group, copy only the latest version
     for key, versions in groups.items():
-        versions.sort(key=lambda x: x[0], reverse=True)
+        with metrics.timer("sync.group"):
+            versions.sort(key=lambda x: x[0], reverse=True)
         sort_key, src_path, info = versions[0]
-        dest_name = src_path.name
-        dest_path = train_dir / dest_name
+        dest_name = src_path.rpartition("/")[2]
+        dest_path = f"{train_dir}/{dest_name}"
 
-        if not dest_path.exists() or src_path.stat().st_mtime > dest_path.stat().st_mtime:
+        dest = store.stat(dest_path)
+        if dest is None or store.stat(src_path).mtime > dest.mtime:
             log(f"  ADD: {dest_name}")
             if not dry_run:
-                shutil.copy2(str(src_path), str(dest_path))
+                with metrics.timer("sync.copy"):
+                    store.copy(src_path, dest_path)
             files_added += 1
 
-        manifest_lines.append(f"{dest_name}  ←  {src_path}")
+        manifest_lines.append(f"{dest_name}  ←  {store.display(src_path)}")
 
         # Remove stale older versions from train_dir
         for _, old_path, old_info in versions[1:]:
-            stale = train_dir / old_path.name
-            if stale.exists():
-                log(f"  REMOVE stale: {stale.name}")
-                if not dry_run:
-                    stale.unlink()
+            stale = f"{train_dir}/{old_path.rpartition('/')[2]}"
+            if store.stat(stale) is not None:
+                log(f"  REMOVE stale: {stale.rpartition('/')[2]}")
+                stale_paths.append(stale)
                 files_removed += 1
 
-    # Write manifest
     if not dry_run:
-        manifest_path = train_dir / "_manifest.txt"
-        with open(manifest_path, "w", encoding="utf-8") as f:
-            f.write(f"RDC AI Training Manifest — {datetime.now():%Y-%m-%d %H:%M}\n")
-            f.write(f"Files: {len(manifest_lines)}\n\n")
-            f.write("\n".join(manifest_lines))
-
+        with metrics.timer("sync.remove"):
+            store.delete_many(list(dict.fromkeys(stale_paths)))
+        # Write manifest
+        store.write_text(f"{train_dir}/_manifest.txt",
+                         f"RDC AI Training Manifest — {datetime.now():%Y-%m-%d %H:%M}\n"
+                         f"Files: {len(manifest_lines)}\n\n" + "\n".join(manifest_lines))
+
+    metrics.count("sync.files_added", files_added)
+    metrics.count("sync.files_removed", files_removed)
+    metrics.flush()
     log(f"\nDone. {files_added} added, {files_removed} stale removed.")
     return files_added, files_removed, manifest_lines
 
@@ -106,5 +93,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="RDC Training Set Sync")
     parser.add_argument("root", help="RDC2 root folder")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--ignore", action="append", default=[],
+                        help="Extra ignore rule (gitignore syntax), repeatable")
+    parser.add_argument("--profile", action="store_true", help="Run under cProfile, save to the config dir")
     args = parser.parse_args()
-    run_sync(args.root, dry_run=args.dry_run)
+    if args.profile:
+        with metrics.profiled("sync"):
+            run_sync(args.root, dry_run=args.dry_run, ignore=args.ignore)
+    else:
+        run_sync(args.root, dry_run=args.dry_run, ignore=args.ignore)
@@ -0,0 +1,206 @@
+"""
+rdc_uploads.py — Upload attachments once, reference them by file ID
+Attached documents are uploaded through the provider file APIs the first
+time they are used and referenced by ID afterwards. IDs are cached in
+<config dir>/uploads.json per (provider, sha256 of the uploaded bytes),
+with the expiry the provider reports (Gemini files live 48 h), so an
+unchanged deck is never re-sent and a re-saved copy with the same content
+reuses the same upload.
+
+What gets uploaded:
+  anthropic — extracted text as text/plain (document blocks, Files API beta)
+  openai    — original .pdf files only (other types stay inline)
+  google    — extracted text as text/plain
+
+If a provider answers 404 for a cached ID the entry is dropped and the
+call is retried once with fresh uploads.
+
+CLI:  python rdc_uploads.py --list | --clear
+"""
+import os
+import io
+import json
+import time
+import hashlib
+import asyncio
+import argparse
+import threading
+
+import mru_manager as mru
+import rdc_ai
+from rdc_ai import FileRef
+
+EXPIRY_MARGIN = 15 * 60     # re-upload when a file expires within this many seconds
+MIN_UPLOAD_CHARS = 4000     # shorter documents are cheaper to send inline
+
+_lock = threading.Lock()
+_cache = None
+
+
+class UploadCache:
+    def __init__(self, path=None):
+        self.path = path or (mru.config_dir() / "uploads.json")
+        self.entries = {}           # "provider:sha256" -> FileRef fields
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, provider: str, digest: str):
+        e = self.entries.get(f"{provider}:{digest}")
+        if e is None:
+            return None
+        ref = FileRef(**e)
+        if ref.expires and ref.expires - EXPIRY_MARGIN < time.time():
+            return None
+        return ref
+
+    def put(self, digest: str, ref: FileRef):
+        self.entries[f"{ref.provider}:{digest}"] = ref._asdict()
+        self.save()
+
+    def invalidate(self, refs):
+        ids = {(r.provider, r.file_id) for r in refs}
+        self.entries = {k: e for k, e in self.entries.items() if (e["provider"], e["file_id"]) not in ids}
+        self.save()
+
+    def prune(self):
+        now = time.time()
+        self.entries = {k: e for k, e in self.entries.items() if not e["expires"] or e["expires"] > now}
+        self.save()
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+def cache() -> UploadCache:
+    global _cache
+    if _cache is None:
+        _cache = UploadCache()
+    return _cache
+
+
+def payload(provider: str, path: str, text: str):
+    """(bytes, mime, filename) to upload for this provider, or None to send inline."""
+    name = os.path.basename(path)
+    if provider == "openai":
+        if not path.lower().endswith(".pdf"):
+            return None
+        with open(path, "rb") as f:
+            return f.read(), "application/pdf", name
+    if len(text) < MIN_UPLOAD_CHARS:
+        return None
+    return text.encode("utf-8"), "text/plain", os.path.splitext(name)[0] + ".txt"
+
+
+def upload(provider: str, data: bytes, mime: str, name: str, keys: dict) -> FileRef:
+    if provider == "anthropic":
+        f = rdc_ai.anthropic_client(keys).beta.files.upload(file=(name, data, mime),
+                                                            betas=[rdc_ai.FILES_BETA])
+        return FileRef(provider, f.id, name, mime)
+    if provider == "openai":
+        f = rdc_ai.openai_client(keys).files.create(file=(name, data, mime), purpose="user_data")
+        return FileRef(provider, f.id, name, mime, expires=float(getattr(f, "expires_at", 0) or 0))
+    genai = rdc_ai.google_configure(keys)
+    f = genai.upload_file(io.BytesIO(data), mime_type=mime, display_name=name)
+    exp = getattr(f, "expiration_time", None)
+    return FileRef(provider, f.name, name, mime, f.uri, exp.timestamp() if exp else 0.0)
+
+
+def prepare(provider: str, documents, keys: dict, log=None) -> tuple:
+    """Split (path, text) documents into (FileRefs, inline (name, text) pairs).
+
+    Cached IDs are reused; new content is uploaded. An upload failure
+    leaves that document inline.
+    """
+    refs, inline = [], []
+    for path, text in documents:
+        p = payload(provider, path, text)
+        if p is None:
+            inline.append((os.path.basename(path), text))
+            continue
+        data, mime, name = p
+        digest = hashlib.sha256(data).hexdigest()
+        with _lock:
+            ref = cache().get(provider, digest)
+        if ref is None:
+            try:
+                ref = upload(provider, data, mime, name, keys)
+            except Exception as e:
+                if log:
+                    log(f"Upload of {name} failed, sending inline: {e}")
+                inline.append((os.path.basename(path), text))
+                continue
+            with _lock:
+                cache().put(digest, ref)
+            if log:
+                log(f"Uploaded {name} → {ref.file_id}")
+        refs.append(ref)
+    return refs, inline
+
+
+def _stale(refs: list, error: Exception) -> list:
+    """Cached refs a provider error says it no longer knows: only a 404 from
+    the SDK (anthropic / openai NotFoundError, google NotFound) and only
+    the refs it names. A missing model or a proxy's 404 page drops nothing."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status != 404 and type(error).__name__ not in ("NotFoundError", "NotFound"):
+        return []
+    msg = str(error)
+    return [r for r in refs if r.file_id in msg]
+
+
+def complete(model: str, system: str, messages: list, keys: dict, documents=(),
+             max_tokens: int = rdc_ai.MAX_TOKENS, log=None) -> rdc_ai.Reply:
+    """rdc_ai.complete() with (path, text) documents uploaded once and referenced by ID."""
+    provider = rdc_ai.provider_for(model)
+    refs, inline = prepare(provider, documents, keys, log)
+    try:
+        return rdc_ai.complete(model, system, messages, keys, inline, max_tokens, files=refs)
+    except Exception as e:
+        stale = _stale(refs, e)
+        if not stale:
+            raise
+    with _lock:
+        cache().invalidate(stale)
+    refs, inline = prepare(provider, documents, keys, log)
+    return rdc_ai.complete(model, system, messages, keys, inline, max_tokens, files=refs)
+
+
+async def acomplete(model: str, system: str, messages: list, keys: dict, documents=(),
+                    max_tokens: int = rdc_ai.MAX_TOKENS, log=None) -> rdc_ai.Reply:
+    """complete() for the event loop: uploads run on the default executor, the call is async."""
+    loop = asyncio.get_running_loop()
+    provider = rdc_ai.provider_for(model)
+    refs, inline = await loop.run_in_executor(None, prepare, provider, documents, keys, log)
+    try:
+        return await rdc_ai.acomplete(model, system, messages, keys, inline, max_tokens, files=refs)
+    except Exception as e:
+        stale = _stale(refs, e)
+        if not stale:
+            raise
+    with _lock:
+        cache().invalidate(stale)
+    refs, inline = await loop.run_in_executor(None, prepare, provider, documents, keys, log)
+    return await rdc_ai.acomplete(model, system, messages, keys, inline, max_tokens, files=refs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC provider upload cache")
+    parser.add_argument("--list", action="store_true", help="Show cached file IDs")
+    parser.add_argument("--clear", action="store_true", help="Forget all cached IDs (files stay uploaded)")
+    args = parser.parse_args()
+    c = cache()
+    if args.clear:
+        c.entries = {}
+        c.save()
+        print("Cleared.")
+    else:
+        c.prune()
+        for key, e in sorted(c.entries.items(), key=lambda kv: kv[1]["name"].lower()):
+            exp = time.strftime("%Y-%m-%d %H:%M", time.localtime(e["expires"])) if e["expires"] else "never"
+            print(f"{e['provider']:<10} {e['file_id']:<36} {e['name']:<40} expires {exp}")
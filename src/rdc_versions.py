@@ -0,0 +1,201 @@
+"""
+rdc_versions.py — Filename version parser
+Shared by rdc_archive and rdc_training_sync. Compiles a configurable set
+of version-token patterns into one combined regex, skips names with no
+version marker via a cheap pre-filter, and memoizes results.
+
+Naming schemes understood (default set):
+    CompanyCode_Purpose_Type_V1.23.ext      RDC scheme (company + type captured)
+    CompanyCode_Purpose_TRAIN_V1.23.ext     TRAIN tag
+    Project Name v1.2.ext / name_V2.ext     1-3 part versions
+    name_v1.2.3.ext
+    Report 2024-03-15.ext / name_20240315   date stamps
+
+CLI:  python rdc_versions.py "RDC_Investor_Deck_V1.03.pptx" [...]
+      python rdc_versions.py --check      verify the EXAMPLES table
+"""
+import re
+import argparse
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+CACHE_SIZE = 65536
+
+COMPANY_CODES = ("RDC", "TPF", "FP", "LBS", "LifeAI", "RC", "D6", "DEM", "SPIG", "REG", "REF")
+DOC_TYPES = ("Deck", "Exec_Sum", "One_Pager", "Overview", "BizPlan", "NDA", "PPM")
+
+# name -> (version-token regex, pre-filter marker regex)
+# Each token regex must define exactly one named group with the pattern's name.
+PATTERNS = {
+    "semver": (r'[vV](?P<semver>\d+(?:\.\d+){0,2})', r'[vV]\d'),
+    "date":   (r'(?P<date>(?:19|20)\d{2}-?(?:0[1-9]|1[0-2])-?(?:0[1-9]|[12]\d|3[01]))',
+               r'(?:19|20)\d{2}-?[01]\d'),
+}
+DEFAULT_PATTERNS = ("semver", "date")
+
+
+class VersionInfo(NamedTuple):
+    base: str
+    version: tuple          # (major, minor, patch) or (yyyy, mm, dd)
+    scheme: str             # pattern name that matched
+    suffix: str
+    ext: str
+    train: bool = False
+    company: str = ""
+    doc_type: str = ""
+    raw: str = ""           # version token as written ("1.03", "20240315")
+
+    @property
+    def sort_key(self) -> tuple:
+        return self.version
+
+    @property
+    def key(self) -> tuple:
+        """Group key: versions of the same document share it. The scheme is
+        part of it, so "Report v3.pdf" never competes with "Report 2020-01-01.pdf"."""
+        return (self.base.lower(), self.ext, self.train, self.scheme)
+
+    @property
+    def label(self) -> str:
+        """"V1.03" as in the file name (not the padded "V1.3.0"); dates as 2024-03-15."""
+        if self.scheme == "date":
+            return "%04d-%02d-%02d" % self.version
+        return "V" + (self.raw or ".".join(str(p) for p in self.version))
+
+
+def register_pattern(name: str, token: str, marker: str):
+    """Add a naming pattern; `token` must contain the named group `(?P<name>...)`."""
+    if f"(?P<{name}>" not in token:
+        raise ValueError(f"Pattern token must define group (?P<{name}>...)")
+    PATTERNS[name] = (token, marker)
+
+
+def _version_tuple(scheme: str, raw: str) -> tuple:
+    if scheme == "date":
+        digits = raw.replace("-", "")
+        return (int(digits[:4]), int(digits[4:6]), int(digits[6:8]))
+    parts = [int(p) for p in raw.split(".")]
+    return tuple(parts + [0] * (3 - len(parts))) if len(parts) < 3 else tuple(parts)
+
+
+class VersionParser:
+    """Combined matcher for a set of PATTERNS names, with its own bounded cache."""
+
+    def __init__(self, patterns=DEFAULT_PATTERNS, cache_size: int = CACHE_SIZE):
+        unknown = [p for p in patterns if p not in PATTERNS]
+        if unknown:
+            raise ValueError(f"Unknown version pattern(s): {', '.join(unknown)}")
+        self.patterns = tuple(patterns)
+        tokens = "|".join(PATTERNS[p][0] for p in self.patterns)
+        # Same tokens without their named groups, for the lookahead below
+        bare = re.sub(r'\(\?P<\w+>', '(?:', tokens)
+        companies = "|".join(COMPANY_CODES)
+        types = "|".join(DOC_TYPES)
+        # The version is the *last* token: the suffix may not contain another
+        # one, so "Minutes 2023-01-01 v1.2.docx" is V1.2 of "Minutes 2023-01-01"
+        self._match = re.compile(
+            rf'^(?P<base>(?:(?P<company>{companies})_)?.*?(?:(?:_|(?<=_))(?P<doc_type>{types}))?)'
+            rf'(?P<train>[\s_]TRAIN)?[\s_-]+(?:{tokens})'
+            rf'(?P<suffix>(?:(?![\s_-]+(?:{bare})).)*?)(?P<ext>\.(?!\d+$)[^.]+)$',
+            re.IGNORECASE,
+        ).match
+        self._prefilter = re.compile(
+            "|".join(PATTERNS[p][1] for p in self.patterns)
+        ).search
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def _parse(self, filename: str) -> Optional[VersionInfo]:
+        if not self._prefilter(filename):
+            return None
+        m = self._match(filename)
+        if not m:
+            return None
+        base = m.group("base").strip()
+        if not base:
+            return None
+        for scheme in self.patterns:
+            raw = m.group(scheme)
+            if raw:
+                break
+        suffix = m.group("suffix").strip()
+        if suffix and (scheme == "date" or "." not in raw):
+            # Dates and bare "v2" only count right before the extension
+            # ("Report 2024-03-15.pdf", "name_V2.ext"): "IMG_20240315_120000.jpg"
+            # and "My device v2 notes.txt" are not versioned files
+            return None
+        return VersionInfo(
+            base=base,
+            version=_version_tuple(scheme, raw),
+            scheme=scheme,
+            suffix=m.group("suffix"),
+            ext=m.group("ext").lower(),
+            train=bool(m.group("train")),
+            company=m.group("company") or "",
+            doc_type=m.group("doc_type") or "",
+            raw=raw,
+        )
+
+
+_default = VersionParser()
+
+# filename -> (base, version) or None; checked by --check (and the build smoke test)
+EXAMPLES = {
+    "RDC_Investor_Deck_V1.03.pptx": ("RDC_Investor_Deck", (1, 3, 0)),
+    "Project Name v1.2.pptx": ("Project Name", (1, 2, 0)),
+    "Deck v1.2 final.pptx": ("Deck", (1, 2, 0)),
+    "name_V2.pptx": ("name", (2, 0, 0)),
+    "Report 2024-03-15.pdf": ("Report", (2024, 3, 15)),
+    # The last version token wins; earlier ones belong to the base
+    "Board Minutes 2023-01-01 v1.2.docx": ("Board Minutes 2023-01-01", (1, 2, 0)),
+    "Board Minutes 2023-01-01 v1.3.docx": ("Board Minutes 2023-01-01", (1, 3, 0)),
+    # A bare "v2" inside a name is not a version
+    "My device v2 notes.txt": None,
+    # A date is a version only with nothing after it
+    "IMG_20240315_120000.jpg": None,
+    "Budget 2024-03-15 draft.xlsx": None,
+    # The version needs a real extension after it
+    "file v1.2": None,
+    "notes.txt": None,
+}
+
+# Name pairs that must not be versions of the same document
+DISTINCT = [
+    ("Report v3.pdf", "Report 2020-01-01.pdf"),
+]
+
+
+def parse_filename(filename: str) -> Optional[VersionInfo]:
+    """Parse with the default pattern set. Returns None for unversioned names."""
+    return _default.parse(filename)
+
+
+def check() -> list:
+    """EXAMPLES that parse differently than expected: [(name, expected, got)],
+    plus any DISTINCT pair that shares a group key."""
+    bad = []
+    for name, expected in EXAMPLES.items():
+        info = parse_filename(name)
+        got = (info.base, info.version) if info else None
+        if got != expected:
+            bad.append((name, expected, got))
+    for a, b in DISTINCT:
+        if parse_filename(a).key == parse_filename(b).key:
+            bad.append((f"{a} / {b}", "different groups", "same group"))
+    return bad
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RDC filename version parser")
+    parser.add_argument("names", nargs="*", help="Filenames to parse")
+    parser.add_argument("--check", action="store_true", help="Verify the built-in EXAMPLES, exit 1 on mismatch")
+    args = parser.parse_args()
+    if args.check:
+        failures = check()
+        for name, expected, got in failures:
+            print(f"✗ {name}: expected {expected}, got {got}")
+        total = len(EXAMPLES) + len(DISTINCT)
+        print(f"{total - len(failures)}/{total} examples OK")
+        raise SystemExit(1 if failures else 0)
+    for name in args.names:
+        info = parse_filename(name)
+        print(f"{name}: {info._asdict() if info else 'no version'}")